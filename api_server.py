@@ -0,0 +1,358 @@
+"""Serve ReviewService as a JSON HTTP API from one long-running process.
+
+    python api_server.py --port 8080
+    python api_server.py --local local.db --port 8080
+
+Every client shares one ReviewService, so one connection pool, one query
+cache and one search index serve all of them. Connections are kept alive
+between requests. ReviewService calls block, so they run on a thread pool
+while the asyncio loop keeps accepting and reading requests.
+
+    GET  /categories
+    GET  /reviews?category_id=&item=&search=&after=&limit=   newest first
+    GET  /search?q=&category_id=&after=&limit=                best match first
+    GET  /items/<item name>/stats
+    GET  /popular?category_id=&limit=
+    POST /reviews                 {"category_id", "item_name", "rating", "content"}
+    POST /reviews/<id>/helpful
+    GET  /health
+    GET  /metrics                 Prometheus text, with METRICS_ENABLED
+
+List responses are {"reviews": [...], "next": cursor}; pass the cursor back
+as ?after= for the next page, it is null on the last page.
+"""
+import argparse
+import asyncio
+import json
+import re
+import signal
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from config.settings import Settings
+from services.metrics import metrics
+from services.review_service import ReviewService
+
+
+class APIError(Exception):
+    def __init__(self, status, message):
+        """An error returned to the client as {"error": message}"""
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def review_json(review):
+    data = review.to_dict()
+    del data["flagged"]
+    return data
+
+
+def int_param(query, name, default=None, minimum=None, maximum=None):
+    """Integer query parameter, clamped to maximum; 400 if it is not a number"""
+    values = query.get(name)
+    if not values or values[0] == "":
+        return default
+    try:
+        value = int(values[0])
+    except ValueError:
+        raise APIError(HTTPStatus.BAD_REQUEST, f"{name} must be an integer")
+    if minimum is not None and value < minimum:
+        raise APIError(HTTPStatus.BAD_REQUEST, f"{name} must be at least {minimum}")
+    return min(value, maximum) if maximum is not None else value
+
+
+def str_param(query, name):
+    values = query.get(name)
+    return values[0] if values and values[0] else None
+
+
+class ReviewAPI:
+    def __init__(self, service):
+        """Map HTTP requests onto one shared ReviewService"""
+        self.service = service
+        self.routes = [
+            ("GET", re.compile(r"/categories"), self.categories),
+            ("GET", re.compile(r"/reviews"), self.reviews),
+            ("POST", re.compile(r"/reviews"), self.submit),
+            ("POST", re.compile(r"/reviews/(?P<review_id>[^/]+)/helpful"), self.vote),
+            ("GET", re.compile(r"/search"), self.search),
+            ("GET", re.compile(r"/items/(?P<item_name>[^/]+)/stats"), self.item_stats),
+            ("GET", re.compile(r"/popular"), self.popular),
+            ("GET", re.compile(r"/health"), self.health),
+            ("GET", re.compile(r"/metrics"), self.metrics_text),
+        ]
+
+    def handle(self, method, target, body):
+        """Return (status, payload) for a request; payload is JSON-ready or a str"""
+        url = urlsplit(target)
+        path = url.path.rstrip("/") or "/"
+        query = parse_qs(url.query)
+
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.fullmatch(path)
+            if not match:
+                continue
+            if route_method != method:
+                allowed = True
+                continue
+            params = {key: unquote(value) for key, value in match.groupdict().items()}
+            with metrics.flow(handler.__name__):
+                return handler(query, body, **params)
+
+        if allowed:
+            raise APIError(HTTPStatus.METHOD_NOT_ALLOWED, f"{method} not allowed on {path}")
+        raise APIError(HTTPStatus.NOT_FOUND, f"No such endpoint: {path}")
+
+    def page_limit(self, query):
+        return int_param(query, "limit", Settings.REVIEW_PAGE_SIZE, 1, Settings.API_MAX_PAGE_SIZE)
+
+    def categories(self, query, body):
+        return HTTPStatus.OK, {
+            "categories": [category.to_dict() for category in self.service.get_categories()]
+        }
+
+    def reviews(self, query, body):
+        reviews, next_cursor = self.service.get_reviews_page(
+            str_param(query, "after"), self.page_limit(query),
+            category_id=int_param(query, "category_id"),
+            item_name=str_param(query, "item"),
+            search_term=str_param(query, "search")
+        )
+        return HTTPStatus.OK, {"reviews": [review_json(r) for r in reviews], "next": next_cursor}
+
+    def search(self, query, body):
+        search_term = str_param(query, "q")
+        is_valid, message = self.service.validator.validate_search_term(search_term or "")
+        if not is_valid:
+            raise APIError(HTTPStatus.BAD_REQUEST, message)
+        reviews, next_cursor = self.service.search_reviews_page(
+            search_term, int_param(query, "category_id"),
+            int_param(query, "after", minimum=0), self.page_limit(query)
+        )
+        return HTTPStatus.OK, {"reviews": [review_json(r) for r in reviews], "next": next_cursor}
+
+    def item_stats(self, query, body, item_name):
+        return HTTPStatus.OK, self.service.get_item_statistics(item_name)
+
+    def popular(self, query, body):
+        items = self.service.get_popular_items(
+            int_param(query, "category_id"),
+            limit=int_param(query, "limit", 5, 1, Settings.API_MAX_PAGE_SIZE)
+        )
+        return HTTPStatus.OK, {"items": items}
+
+    def submit(self, query, body):
+        try:
+            data = json.loads(body or b"{}")
+        except ValueError:
+            raise APIError(HTTPStatus.BAD_REQUEST, "Request body must be JSON")
+        if not isinstance(data, dict):
+            raise APIError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object")
+
+        fields = [data.get(key) for key in ("category_id", "item_name", "rating", "content")]
+        is_valid, message = self.service.validator.validate_review(*fields)
+        if not is_valid:
+            raise APIError(HTTPStatus.UNPROCESSABLE_ENTITY, message)
+        if not self.service.submit_review(*fields):
+            raise APIError(HTTPStatus.SERVICE_UNAVAILABLE, "Failed to save review")
+        # With write-behind enabled the review is journaled, not yet in listings
+        return HTTPStatus.ACCEPTED, {"status": "accepted"}
+
+    def vote(self, query, body, review_id):
+        if not self.service.vote_helpful(review_id):
+            raise APIError(HTTPStatus.SERVICE_UNAVAILABLE, "Failed to record vote")
+        return HTTPStatus.ACCEPTED, {"status": "accepted"}
+
+    def health(self, query, body):
+        storage = self.service.storage
+        available = storage.is_available()
+        return (HTTPStatus.OK if available else HTTPStatus.SERVICE_UNAVAILABLE), {
+            "database": "available" if available else "unavailable",
+            "pool": storage.pool_stats(),
+            "cache": self.service.cache_stats(),
+        }
+
+    def metrics_text(self, query, body):
+        if not metrics.enabled:
+            raise APIError(HTTPStatus.NOT_FOUND, "Metrics are disabled (Settings.METRICS_ENABLED)")
+        return HTTPStatus.OK, metrics.to_prometheus()
+
+
+class HTTPServer:
+    def __init__(self, api, workers=None, keep_alive=None, max_body=None):
+        """Minimal HTTP/1.1 server with keep-alive, running API calls on a thread pool"""
+        self.api = api
+        self.keep_alive = keep_alive or Settings.API_KEEP_ALIVE_SECONDS
+        self.max_body = max_body or Settings.API_MAX_BODY_BYTES
+        self.executor = ThreadPoolExecutor(max_workers=workers or Settings.API_WORKER_THREADS,
+                                           thread_name_prefix="api")
+        self._connections = {}  # handler task -> its stream writer
+        self._idle = set()  # handler tasks waiting for the next request
+        self._closing = False
+
+    async def handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while not self._closing:
+                self._idle.add(task)
+                try:
+                    request = await asyncio.wait_for(self.read_request(reader), self.keep_alive)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                finally:
+                    self._idle.discard(task)
+                if request is None:
+                    break
+
+                method, target, version, headers, body, error = request
+                if error is not None:
+                    status, payload = error.status, {"error": error.message}
+                else:
+                    status, payload = await self.respond(method, target, body)
+
+                connection = headers.get("connection", "").lower()
+                keep_open = error is None and not self._closing and (
+                    connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+                )
+                writer.write(self.encode_response(status, payload, keep_open, version))
+                await writer.drain()
+                if not keep_open:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+
+    async def read_request(self, reader):
+        """Parse one request; None when the client closed the connection"""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if not e.partial.strip():
+                return None
+            raise
+        except asyncio.LimitOverrunError:
+            return "", "", "HTTP/1.1", {}, b"", APIError(
+                HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Request headers too large")
+
+        lines = head.decode("latin-1").split("\r\n")
+        parts = lines[0].split()
+        if len(parts) != 3 or not parts[2].startswith("HTTP/1."):
+            return "", "", "HTTP/1.1", {}, b"", APIError(HTTPStatus.BAD_REQUEST, "Malformed request line")
+        method, target, version = parts
+
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            if name:
+                headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            return method, target, version, headers, b"", APIError(
+                HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        if length > self.max_body:
+            return method, target, version, headers, b"", APIError(
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE, f"Request body is limited to {self.max_body} bytes")
+        body = await reader.readexactly(length) if length else b""
+        return method, target, version, headers, body, None
+
+    async def respond(self, method, target, body):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.executor, self.api.handle, method, target, body)
+        except APIError as e:
+            return e.status, {"error": e.message}
+        except Exception as e:
+            print(f"Error handling {method} {target}: {e}")
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error"}
+
+    @staticmethod
+    def encode_response(status, payload, keep_open, version):
+        if isinstance(payload, str):
+            body = payload.encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body = json.dumps(payload).encode("utf-8")
+            content_type = "application/json"
+        head = (
+            f"{version} {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_open else 'close'}\r\n"
+            "\r\n"
+        )
+        return head.encode("latin-1") + body
+
+    async def close(self):
+        """Close kept-alive connections, letting requests in progress finish, then stop the threads"""
+        self._closing = True
+        for task, writer in list(self._connections.items()):
+            if task in self._idle:
+                writer.close()  # the pending read sees end of input
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        self.executor.shutdown(wait=True)
+
+
+async def serve(service, host, port, workers=None):
+    """Serve until SIGINT or SIGTERM, then close the shared ReviewService"""
+    http = HTTPServer(ReviewAPI(service), workers)
+    server = await asyncio.start_server(http.handle_connection, host, port)
+    print(f"Serving the reviews API on http://{host}:{port}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # e.g. Windows; Ctrl-C still raises KeyboardInterrupt
+
+    try:
+        async with server:
+            await stop.wait()
+    finally:
+        server.close()
+        await http.close()
+        # Writes any queued reviews and buffered votes
+        service.close()
+        if metrics.enabled and Settings.METRICS_EXPORT_PATH:
+            metrics.export(Settings.METRICS_EXPORT_PATH)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=Settings.API_HOST)
+    parser.add_argument("--port", type=int, default=Settings.API_PORT)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="threads running ReviewService calls (default Settings.API_WORKER_THREADS)")
+    parser.add_argument("--local", metavar="DB_FILE",
+                        help="use a local sqlite stand-in database file (*.db) instead of Azure SQL")
+    args = parser.parse_args(argv)
+
+    if args.local:
+        from services import sqlite_driver
+        service = ReviewService(storage=sqlite_driver.local_storage(args.local))
+    else:
+        service = ReviewService()
+    service = metrics.instrument(service, "service")
+
+    try:
+        asyncio.run(serve(service, args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
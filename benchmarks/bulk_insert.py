@@ -0,0 +1,51 @@
+"""Compare single-row save_review against batched save_reviews throughput.
+
+    python -m benchmarks.bulk_insert --rows 2000 --latency-ms 2
+"""
+import argparse
+
+from benchmarks.common import local_storage, random_review_rows, timed
+from models.review import Review
+from services.review_service import ReviewService
+
+
+def single_insert(storage, reviews):
+    for review in reviews:
+        storage.save_review(review)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--latency-ms", type=float, default=1.0,
+                        help="simulated network round-trip per statement")
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+
+    rows = list(random_review_rows(args.rows))
+    reviews = [Review(**row) for row in rows]
+
+    storage, keepalive = local_storage(latency)
+    _, single_seconds = timed(single_insert, storage, reviews)
+    storage.close()
+
+    storage, keepalive = local_storage(latency)
+    _, batch_seconds = timed(storage.save_reviews, reviews, args.batch_size)
+    storage.close()
+
+    storage, keepalive = local_storage(latency)
+    service = ReviewService(storage=storage)
+    result, submit_seconds = timed(service.submit_reviews, rows, args.batch_size)
+    storage.close()
+
+    print(f"{args.rows} rows, {args.latency_ms} ms simulated round-trip")
+    print(f"  save_review loop:        {args.rows / single_seconds:10.0f} rows/sec")
+    print(f"  save_reviews batched:    {args.rows / batch_seconds:10.0f} rows/sec "
+          f"({single_seconds / batch_seconds:.1f}x)")
+    print(f"  submit_reviews+validate:{args.rows / submit_seconds:10.0f} rows/sec "
+          f"({result['saved']} saved, {len(result['errors'])} rejected)")
+
+
+if __name__ == "__main__":
+    main()
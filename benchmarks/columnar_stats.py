@@ -0,0 +1,79 @@
+"""Time per-item statistics with ReviewColumns against the pure-Python aggregator.
+
+    python -m benchmarks.columnar_stats --sizes 10000 100000 1000000 5000000
+
+The Python aggregator needs a Review object per row, so it only runs up to
+--python-max rows; the columnar store is built straight from arrays.
+"""
+import argparse
+
+import numpy as np
+
+from benchmarks.common import ITEM_NAMES, timed
+from models.review import Review
+from services.item_statistics import aggregate_items, top_items
+from services.review_columns import ReviewColumns
+
+
+def synthetic_columns(size, item_count, seed=0):
+    """Columns with Zipf-skewed item popularity"""
+    rng = np.random.default_rng(seed)
+    item_codes = (rng.zipf(1.3, size) - 1) % item_count
+    item_names = [f"{ITEM_NAMES[i % len(ITEM_NAMES)]} {i}" for i in range(item_count)]
+    return ReviewColumns(
+        review_ids=[str(i) for i in range(size)],
+        ratings=rng.integers(1, 6, size),
+        category_ids=rng.integers(1, 5, size),
+        helpful_votes=rng.poisson(0.5, size),
+        timestamps=np.sort(rng.integers(1_600_000_000_000_000, 1_700_000_000_000_000, size)),
+        item_codes=item_codes,
+        item_names=item_names,
+    )
+
+
+def as_reviews(columns):
+    """Review objects with the same data, for the pure-Python path"""
+    reviews = []
+    for row in range(len(columns)):
+        reviews.append(Review.from_dict({
+            "id": columns.review_ids[row],
+            "category_id": int(columns.category_ids[row]),
+            "item_name": columns.item_names[columns.item_codes[row]],
+            "rating": int(columns.ratings[row]),
+            "content": "",
+            "anonymous_id": "",
+            "timestamp": int(columns.timestamps[row]),
+            "helpful_votes": int(columns.helpful_votes[row]),
+        }))
+    return reviews
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--items", type=int, default=5_000)
+    parser.add_argument("--python-max", type=int, default=200_000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'popular (np)':>14} {'popular (py)':>14} "
+          f"{'histogram':>11} {'window':>9}")
+    for size in args.sizes:
+        columns = synthetic_columns(size, args.items)
+
+        _, numpy_seconds = timed(columns.popular_items, 2, 10)
+        _, histogram_seconds = timed(columns.rating_histogram, columns.mask(category_id=1))
+        since = int(columns.timestamps[len(columns) // 2])
+        _, window_seconds = timed(columns.mask, None, None, since)
+
+        python_text = "-"
+        if size <= args.python_max:
+            reviews = [r for r in as_reviews(columns) if r.category_id == 2]
+            _, python_seconds = timed(lambda: top_items(aggregate_items(reviews), 10))
+            python_text = f"{python_seconds * 1000:.1f} ms"
+
+        print(f"{size:>10} {numpy_seconds * 1000:>11.1f} ms {python_text:>14} "
+              f"{histogram_seconds * 1000:>8.1f} ms {window_seconds * 1000:>6.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
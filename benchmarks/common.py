@@ -0,0 +1,90 @@
+"""Helpers shared by the benchmark scripts.
+
+Benchmarks run against services.sqlite_driver, the local pymssql stand-in,
+with an optional simulated network round-trip latency. Run them from the
+repository root, e.g. ``python -m benchmarks.bulk_insert``.
+"""
+import itertools
+import random
+import time
+import uuid
+
+from services import sqlite_driver
+
+ITEM_NAMES = [
+    "CS101", "Calculus I", "Linear Algebra", "Data Structures", "Main Library",
+    "Dining Hall", "IT Helpdesk", "Study Room B", "Sports Center", "Career Fair",
+]
+WORDS = [
+    "great", "lecture", "helpful", "slow", "crowded", "quiet", "clear", "boring",
+    "friendly", "staff", "assignments", "exam", "useful", "noisy", "organized",
+]
+
+
+def local_storage(latency=0.0):
+    """Create an AzureStorageService on a fresh in-memory stand-in database
+
+    Returns (storage, keepalive); keep a reference to keepalive for as long as
+    the database is needed, the shared in-memory database disappears with its
+    last connection.
+    """
+    sqlite_driver.simulated_latency = 0.0
+    database = f"bench_{uuid.uuid4().hex[:8]}"
+    keepalive = sqlite_driver.connect(database=database)
+    storage = sqlite_driver.local_storage(database)
+    sqlite_driver.simulated_latency = latency
+    return storage, keepalive
+
+
+def random_review_rows(count, seed=0):
+    """Yield review input dicts with random items, ratings and content"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield {
+            "category_id": rng.randint(1, 4),
+            "item_name": rng.choice(ITEM_NAMES),
+            "rating": rng.randint(1, 5),
+            "content": " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 30))),
+        }
+
+
+def synthetic_review_rows(count, item_count=None, skew=1.1, seed=0):
+    """Yield review input dicts with Zipf-skewed item popularity
+
+    Item k (0-based) is reviewed in proportion to 1 / (k + 1) ** skew, so a
+    few items collect most reviews and there is a long tail. Each item
+    belongs to one category and has its own typical rating. item_count
+    defaults to one item per 100 reviews.
+    """
+    rng = random.Random(seed)
+    item_count = item_count or max(count // 100, len(ITEM_NAMES))
+    items = [
+        (f"{ITEM_NAMES[k % len(ITEM_NAMES)]} {k}", k % 4 + 1, rng.randint(2, 5))
+        for k in range(item_count)
+    ]
+    cumulative = list(itertools.accumulate(1 / (k + 1) ** skew for k in range(item_count)))
+
+    for _ in range(count):
+        item_name, category_id, typical = rng.choices(items, cum_weights=cumulative)[0]
+        rating = min(max(typical + rng.choice((-1, 0, 0, 0, 1)), 1), 5)
+        yield {
+            "category_id": category_id,
+            "item_name": item_name,
+            "rating": rating,
+            "content": " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 30))),
+        }
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank q-th percentile (0-100) of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(q / 100 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def timed(func, *args, **kwargs):
+    """Call func and return (result, elapsed seconds)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
@@ -0,0 +1,265 @@
+"""Simulate many concurrent users of ReviewService at increasing concurrency.
+
+    python -m benchmarks.load_test --sessions 1 4 16 64 --duration 10
+    python -m benchmarks.load_test --mix submit=5,browse=50,search=25,vote=15,popular=5
+    python -m benchmarks.load_test --separate-services --latency-ms 2
+
+Each session is a thread that picks actions from --mix (relative weights)
+with --think-ms pause between them. By default all sessions share one
+ReviewService, with one connection pool and cache, the way a server would;
+--separate-services gives each session its own, like one app process per
+user. Runs against a stand-in database file in WAL mode (so, as on SQL
+Server, writers wait for locks instead of failing) preloaded with --rows
+synthetic reviews.
+
+An action counts as an error if it raises, returns False, or prints an
+error message, which is how ReviewService reports failures.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.common import percentile, synthetic_review_rows
+from config.settings import Settings
+from models.review import Review
+from services import sqlite_driver
+from services.review_service import ReviewService
+
+DEFAULT_MIX = "submit=10,browse=40,search=25,vote=15,popular=10"
+SEARCH_TERMS = ["great", "helpful", "lecture", "quiet staff", "exam", "boring"]
+
+
+class LockedIterator:
+    def __init__(self, iterator):
+        """Iterator that several threads can draw from (generators are not thread safe)"""
+        self._iterator = iterator
+        self._lock = threading.Lock()
+
+    def __next__(self):
+        with self._lock:
+            return next(self._iterator)
+
+
+class SessionOutput(io.TextIOBase):
+    def __init__(self):
+        """Stand-in for stdout that keeps what each thread printed since it last asked"""
+        self._local = threading.local()
+
+    def write(self, text):
+        self._local.text = getattr(self._local, "text", "") + text
+        return len(text)
+
+    def take(self):
+        text = getattr(self._local, "text", "")
+        self._local.text = ""
+        return text
+
+
+def parse_mix(text):
+    """"submit=10,browse=40" -> {"submit": 10.0, "browse": 40.0}"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ACTIONS:
+            raise ValueError(f"Unknown action {name.strip()!r}, expected one of {', '.join(ACTIONS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def submit(service, rng, context):
+    row = next(context["rows"])
+    return service.submit_review(**row)
+
+
+def browse(service, rng, context):
+    category_id = rng.randint(1, 4)
+    page, after = service.get_reviews_page(category_id=category_id)
+    if page and after and rng.random() < 0.3:
+        # Some users look at the next page too
+        service.get_reviews_page(after, category_id=category_id)
+    if page and rng.random() < 0.5:
+        service.get_reviews_page(item_name=rng.choice(page).item_name)
+    return True
+
+
+def search(service, rng, context):
+    service.search_reviews_page(rng.choice(SEARCH_TERMS))
+    return True
+
+
+def vote(service, rng, context):
+    return service.vote_helpful(rng.choice(context["review_ids"]))
+
+
+def popular(service, rng, context):
+    service.get_popular_items(rng.choice([None, 1, 2, 3, 4]), limit=10)
+    return True
+
+
+ACTIONS = {"submit": submit, "browse": browse, "search": search,
+           "vote": vote, "popular": popular}
+
+
+def run_session(service, mix, deadline, think, seed, context, output, samples):
+    """Perform random actions until the deadline, appending (action, seconds, error) to samples"""
+    rng = random.Random(seed)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    while time.monotonic() < deadline:
+        name = rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            result = ACTIONS[name](service, rng, context)
+            printed = output.take().lower()
+            error = result is False or "error" in printed or "failed" in printed
+        except Exception:
+            output.take()
+            error = True
+        samples.append((name, time.perf_counter() - start, error))
+        if think:
+            time.sleep(think)
+
+
+def run_level(sessions, args, database, shared, context):
+    """Run one concurrency level and return per-action results"""
+    services = [shared] * sessions if shared else [
+        ReviewService(storage=sqlite_driver.local_storage(database)) for _ in range(sessions)
+    ]
+    output = SessionOutput()
+    samples = [[] for _ in range(sessions)]
+    deadline = time.monotonic() + args.duration
+    threads = [
+        threading.Thread(target=run_session, args=(
+            services[i], args.mix, deadline, args.think_ms / 1000,
+            args.seed * 1000 + sessions * 100 + i, context, output, samples[i]))
+        for i in range(sessions)
+    ]
+
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(output):
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        pool_waits = sum(service.storage.pool_stats()["waits"] for service in set(services))
+        if not shared:
+            for service in services:
+                service.close()
+
+    by_action = {}
+    for session_samples in samples:
+        for name, seconds, error in session_samples:
+            entry = by_action.setdefault(name, {"latencies": [], "errors": 0})
+            entry["latencies"].append(seconds)
+            entry["errors"] += error
+
+    total = sum(len(entry["latencies"]) for entry in by_action.values())
+    level = {
+        "sessions": sessions,
+        "seconds": elapsed,
+        "operations": total,
+        "throughput": total / elapsed,
+        "errors": sum(entry["errors"] for entry in by_action.values()),
+        "pool_waits": pool_waits,
+        "actions": {},
+    }
+    for name, entry in sorted(by_action.items()):
+        latencies = sorted(entry["latencies"])
+        level["actions"][name] = {
+            "count": len(latencies),
+            "errors": entry["errors"],
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+        }
+    return level
+
+
+def print_level(level):
+    error_rate = level["errors"] / level["operations"] if level["operations"] else 0.0
+    print(f"\n{level['sessions']} sessions: {level['throughput']:.0f} ops/sec, "
+          f"{error_rate:.2%} errors, {level['pool_waits']} pool waits")
+    print(f"  {'action':10} {'count':>7} {'errors':>7} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for name, action in level["actions"].items():
+        print(f"  {name:10} {action['count']:7} {action['errors']:7} "
+              f"{action['p50_ms']:6.1f} ms {action['p95_ms']:6.1f} ms {action['p99_ms']:6.1f} ms")
+
+
+def run(args, database):
+    """Preload the database, then run each concurrency level and report it"""
+    sqlite_driver.simulated_latency = 0.0
+    storage = sqlite_driver.local_storage(database, wal=True)
+    rows = list(synthetic_review_rows(args.rows, seed=args.seed))
+    reviews = [Review(**row) for row in rows]
+    storage.save_reviews(reviews)
+    sqlite_driver.simulated_latency = args.latency_ms / 1000
+
+    context = {
+        "review_ids": [review.id for review in reviews],
+        # New reviews for submissions, on the same items as the preloaded ones
+        "rows": LockedIterator(synthetic_review_rows(
+            10 ** 9, item_count=max(args.rows // 100, 10), seed=args.seed + 1)),
+    }
+    shared = None if args.separate_services else ReviewService(storage=storage)
+
+    mode = "one ReviewService per session" if args.separate_services else "one shared ReviewService"
+    print(f"{args.rows} reviews, {args.latency_ms} ms simulated round-trip, {mode}, "
+          f"pool size {Settings.POOL_MAX_SIZE}, {args.duration:g}s per level")
+
+    levels = []
+    for sessions in args.sessions:
+        level = run_level(sessions, args, database, shared, context)
+        print_level(level)
+        levels.append(level)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        if shared is not None:
+            shared.close()
+        else:
+            storage.close()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump({"mix": args.mix, "latency_ms": args.latency_ms, "levels": levels},
+                      output_file, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16, 64],
+                        help="concurrency levels to run, one after another")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per level")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"action weights (default {DEFAULT_MIX})")
+    parser.add_argument("--think-ms", type=float, default=0.0,
+                        help="pause between a session's actions")
+    parser.add_argument("--rows", type=int, default=20000, help="reviews preloaded before the run")
+    parser.add_argument("--latency-ms", type=float, default=1.0,
+                        help="simulated network round-trip per statement")
+    parser.add_argument("--pool-size", type=int, default=None,
+                        help="connections per pool (default Settings.POOL_MAX_SIZE)")
+    parser.add_argument("--separate-services", action="store_true",
+                        help="one ReviewService (and pool) per session instead of one shared")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", metavar="PATH", help="write the results as JSON")
+    args = parser.parse_args()
+
+    if args.pool_size:
+        Settings.POOL_MAX_SIZE = args.pool_size
+
+    with tempfile.TemporaryDirectory() as directory:
+        run(args, os.path.join(directory, "load_test.db"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
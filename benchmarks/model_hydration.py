@@ -0,0 +1,88 @@
+"""Compare per-object memory and hydration rate of Review against the old
+dict-backed model and its row -> dict -> from_dict loading path.
+
+    python -m benchmarks.model_hydration --rows 200000
+"""
+import argparse
+import gc
+import tracemalloc
+from datetime import datetime, timedelta
+
+from benchmarks.common import ITEM_NAMES, timed
+from models.review import Review
+
+
+class DictReview:
+    """The model as it was before __slots__, loaded the way load_all_reviews used to"""
+
+    @classmethod
+    def from_dict(cls, data):
+        review = cls.__new__(cls)
+        review.id = data["id"]
+        review.category_id = data["category_id"]
+        review.item_name = data["item_name"]
+        review.rating = data["rating"]
+        review.content = data["content"]
+        review.anonymous_id = data["anonymous_id"]
+        review.timestamp = data["timestamp"]
+        review.helpful_votes = data.get("helpful_votes", 0)
+        review.flagged = data.get("flagged", False)
+        return review
+
+    @classmethod
+    def from_row(cls, row):
+        return cls.from_dict({
+            "id": row[0],
+            "category_id": row[1],
+            "item_name": row[2],
+            "rating": row[3],
+            "content": row[4],
+            "anonymous_id": row[5],
+            "timestamp": row[6].isoformat() if hasattr(row[6], 'isoformat') else str(row[6]),
+            "helpful_votes": row[7] or 0,
+            "flagged": False
+        })
+
+
+def database_rows(count):
+    """Rows shaped like the reviews SELECT; item names arrive as fresh strings"""
+    start = datetime(2024, 1, 1)
+    return [
+        (f"{i:032x}", i % 4 + 1, ITEM_NAMES[i % len(ITEM_NAMES)].encode().decode(), i % 5 + 1,
+         "A short review of the course content", f"user_{i:08x}",
+         start + timedelta(seconds=i), i % 3)
+        for i in range(count)
+    ]
+
+
+def measure(model, rows):
+    """Return (bytes per object, rows per second) for hydrating rows into model"""
+    gc.collect()
+    tracemalloc.start()
+    objects = [model.from_row(row) for row in rows]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+
+    gc.collect()
+    _, seconds = timed(lambda: [model.from_row(row) for row in rows])
+    return size / len(rows), len(rows) / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    rows = database_rows(args.rows)
+    old_size, old_rate = measure(DictReview, rows)
+    new_size, new_rate = measure(Review, rows)
+
+    print(f"{args.rows} rows (bytes include the timestamp value built per row)")
+    print(f"  dict-backed + from_dict: {old_size:7.0f} bytes/review {old_rate:12.0f} rows/sec")
+    print(f"  __slots__ + from_row:    {new_size:7.0f} bytes/review {new_rate:12.0f} rows/sec")
+    print(f"  {old_size / new_size:.2f}x smaller, {new_rate / old_rate:.2f}x faster")
+
+
+if __name__ == "__main__":
+    main()
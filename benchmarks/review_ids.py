@@ -0,0 +1,65 @@
+"""Compare insert throughput of random (UUIDv4) and time-ordered (UUIDv7) review IDs.
+
+    python -m benchmarks.review_ids --rows 200000 --rounds 5
+
+Reviews are saved in rounds into a file-backed stand-in database, so later
+rounds insert into a larger primary key index. Random keys land on any page
+of the index; time-ordered keys always append to its right-hand edge.
+"""
+import argparse
+import os
+import tempfile
+import uuid
+
+from benchmarks.common import random_review_rows, timed
+from models.review import Review, new_review_id
+from services import sqlite_driver
+
+
+def file_storage(directory, name):
+    """AzureStorageService on a fresh stand-in database file"""
+    path = os.path.join(directory, f"{name}.db")
+    return sqlite_driver.local_storage(path), path
+
+
+def insert_rounds(storage, reviews, rounds, batch_size):
+    """Save reviews in equal rounds, returning the seconds each round took"""
+    per_round = len(reviews) // rounds
+    return [
+        timed(storage.save_reviews, reviews[start:start + per_round], batch_size)[1]
+        for start in range(0, per_round * rounds, per_round)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=None)
+    args = parser.parse_args()
+
+    rows = list(random_review_rows(args.rows))
+    schemes = {
+        "uuid4 (random)": lambda: str(uuid.uuid4()),
+        "uuid7 (time-ordered)": new_review_id,
+    }
+
+    print(f"{args.rows} rows in {args.rounds} rounds")
+    with tempfile.TemporaryDirectory() as directory:
+        for label, make_id in schemes.items():
+            reviews = [Review(**row) for row in rows]
+            for review in reviews:
+                review.id = make_id()
+
+            storage, path = file_storage(directory, label.split()[0])
+            seconds = insert_rounds(storage, reviews, args.rounds, args.batch_size)
+            storage.close()
+
+            per_round = args.rows // args.rounds
+            print(f"  {label:22} {per_round * len(seconds) / sum(seconds):9.0f} rows/sec overall, "
+                  "by round: " + " ".join(f"{per_round / s:.0f}" for s in seconds)
+                  + f"  ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Time the ReviewService hot paths on a synthetic corpus and compare against a baseline.
+
+    python -m benchmarks.suite --rows 100000 --output results.json
+    python -m benchmarks.suite --rows 100000 --baseline results.json
+    python -m benchmarks.suite --rows 10000000 --db corpus.db --only get_popular_items
+
+The corpus has Zipf-skewed item popularity (see synthetic_review_rows) and is
+written to a sqlite stand-in database file; pass --db to keep it and reuse it
+on later runs. Query caches are cleared before every run, so each run goes to
+the database. search_reviews is timed after one untimed call has built the
+search index.
+
+Results are JSON (--output). With --baseline, each benchmark's fastest run is
+compared with the baseline's (the minimum is the least noisy for short
+benchmarks) and the exit status is 1 if any is slower by more than --threshold.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+
+from benchmarks.common import synthetic_review_rows, timed
+from models.review import Review
+from services import sqlite_driver
+from services.review_service import ReviewService
+from services.validation_service import ValidationService
+
+LOAD_CHUNK = 10000
+VALIDATION_ROWS = 1000  # rows validated per validate_review run
+SEARCH_TERM = "helpful"
+
+
+def corpus_storage(path, rows, item_count, skew, seed):
+    """AzureStorageService on a corpus database file, generating the corpus if the file is empty"""
+    storage = sqlite_driver.local_storage(path)
+    connection = sqlite_driver.connect(database=path)
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM reviews")
+    existing = cursor.fetchone()[0]
+    connection.close()
+
+    if existing:
+        print(f"Reusing {existing} reviews in {path}", file=sys.stderr)
+        return storage, existing
+
+    chunk = []
+    for count, row in enumerate(synthetic_review_rows(rows, item_count, skew, seed), 1):
+        chunk.append(Review(**row))
+        if len(chunk) == LOAD_CHUNK or count == rows:
+            if not storage.save_reviews(chunk):
+                raise RuntimeError("Failed to load the synthetic corpus")
+            chunk = []
+            print(f"\rGenerated {count}/{rows} reviews", end="", file=sys.stderr)
+    print(file=sys.stderr)
+    return storage, rows
+
+
+def measure(func, repeat, setup=None):
+    """Run func repeat times, returning its last result and the seconds of each run"""
+    result, seconds = None, []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        result, elapsed = timed(func)
+        seconds.append(elapsed)
+    return result, seconds
+
+
+def benchmarks(service, storage, validation_rows):
+    """(name, function, setup) for each hot path"""
+    hot_item = next(synthetic_review_rows(1))["item_name"]  # rank 0, the most reviewed item
+    validator = ValidationService()
+    cold = service.cache.clear
+
+    def validate_all():
+        for row in validation_rows:
+            validator.validate_review(**row)
+
+    return [
+        ("get_reviews_by_category", lambda: service.get_reviews_by_category(1), cold),
+        ("get_reviews_by_item", lambda: service.get_reviews_by_item(hot_item), cold),
+        ("search_reviews", lambda: service.search_reviews(SEARCH_TERM), cold),
+        ("get_item_statistics", lambda: service.get_item_statistics(hot_item), cold),
+        ("get_popular_items", lambda: service.get_popular_items(limit=10), cold),
+        ("load_all_reviews", storage.load_all_reviews, None),
+        ("validate_review", validate_all, None),
+    ]
+
+
+def summarize(seconds, result):
+    milliseconds = [s * 1000 for s in seconds]
+    summary = {
+        "runs": len(milliseconds),
+        "min_ms": min(milliseconds),
+        "median_ms": statistics.median(milliseconds),
+        "max_ms": max(milliseconds),
+    }
+    if isinstance(result, list):
+        summary["rows"] = len(result)
+    return summary
+
+
+def compare(results, baseline, threshold):
+    """Print each fastest run against the baseline's; return the names that regressed"""
+    if baseline["meta"].get("rows") != results["meta"]["rows"]:
+        print(f"Warning: baseline has {baseline['meta'].get('rows')} rows, "
+              f"this run {results['meta']['rows']}")
+
+    regressions = []
+    print(f"\n{'benchmark':26} {'min':>11} {'baseline':>11} {'change':>8}")
+    for name, current in results["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            print(f"{name:26} {current['min_ms']:8.2f} ms {'-':>11} {'new':>8}")
+            continue
+        change = current["min_ms"] / previous["min_ms"] - 1 if previous["min_ms"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:26} {current['min_ms']:8.2f} ms {previous['min_ms']:8.2f} ms "
+              f"{change:+7.1%}{flag}")
+    return regressions
+
+
+def run(args, path):
+    storage, rows = corpus_storage(path, args.rows, args.items, args.skew, args.seed)
+    sqlite_driver.simulated_latency = args.latency_ms / 1000
+    service = ReviewService(storage=storage)
+    validation_rows = list(synthetic_review_rows(VALIDATION_ROWS, seed=args.seed + 1))
+
+    results = {
+        "meta": {
+            "rows": rows,
+            "items": args.items,
+            "skew": args.skew,
+            "seed": args.seed,
+            "latency_ms": args.latency_ms,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "results": {},
+    }
+
+    print(f"{'benchmark':26} {'median':>11} {'min':>11} {'rows':>9}")
+    try:
+        for name, func, setup in benchmarks(service, storage, validation_rows):
+            if args.only and name not in args.only:
+                continue
+            if name == "search_reviews":
+                func()  # build the search index outside the timed runs
+            result, seconds = measure(func, args.repeat, setup)
+            summary = results["results"][name] = summarize(seconds, result)
+            print(f"{name:26} {summary['median_ms']:8.2f} ms {summary['min_ms']:8.2f} ms "
+                  f"{summary.get('rows', ''):>9}")
+    finally:
+        service.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="corpus size (1k to 10M)")
+    parser.add_argument("--items", type=int, default=None,
+                        help="distinct items (default: one per 100 reviews)")
+    parser.add_argument("--skew", type=float, default=1.1, help="Zipf exponent of item popularity")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db", metavar="DB_FILE",
+                        help="keep the corpus in this .db file and reuse it on later runs")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="simulated network round-trip per statement")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="run only these benchmarks")
+    parser.add_argument("--output", metavar="PATH", help="write the results as JSON")
+    parser.add_argument("--baseline", metavar="PATH", help="compare against earlier --output results")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="slowdown counted as a regression (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    if args.db:
+        results = run(args, args.db)
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            results = run(args, os.path.join(directory, "corpus.db"))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Compare review submission latency with direct saves and write-behind.
+
+    python -m benchmarks.write_behind --reviews 500 --latency 0.002
+
+Direct saves wait for one database round-trip per review. Write-behind
+appends each review to an fsync'd local journal and returns; a background
+thread writes them to the database in batches.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.common import local_storage, random_review_rows
+from models.review import Review
+from services.review_journal import ReviewJournal
+from services.review_writer import ReviewWriter
+
+
+def submit_latencies(submit, reviews):
+    """Call submit for each review, returning the milliseconds each call took"""
+    latencies = []
+    for review in reviews:
+        start = time.perf_counter()
+        submit(review)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label, latencies, total):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"  {label:14} median {statistics.median(latencies):7.3f} ms  p99 {p99:7.3f} ms  "
+          f"all in database after {total:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--reviews", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.002)
+    parser.add_argument("--batch-size", type=int, default=250)
+    args = parser.parse_args()
+
+    rows = list(random_review_rows(args.reviews))
+    print(f"{args.reviews} submissions, {args.latency * 1000:.1f} ms simulated latency")
+
+    storage, keepalive = local_storage(args.latency)
+    start = time.perf_counter()
+    latencies = submit_latencies(storage.save_review, [Review(**row) for row in rows])
+    report("direct", latencies, time.perf_counter() - start)
+    storage.close()
+
+    storage, keepalive = local_storage(args.latency)
+    with tempfile.TemporaryDirectory() as directory:
+        journal = ReviewJournal(os.path.join(directory, "reviews.journal"))
+        writer = ReviewWriter(storage, journal, batch_size=args.batch_size)
+        start = time.perf_counter()
+        latencies = submit_latencies(writer.add, [Review(**row) for row in rows])
+        writer.close()
+        report("write-behind", latencies, time.perf_counter() - start)
+    storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Stream reviews between CSV/JSONL files and the reviews database.
+
+    python bulk_reviews.py import reviews.csv --batch-size 1000 --workers 4
+    python bulk_reviews.py export reviews.jsonl
+    python bulk_reviews.py --local local.db import reviews.jsonl
+
+Both commands run in constant memory: imports read, validate and write one
+batch at a time, exports stream rows from the database with fetchmany.
+--local points at a sqlite stand-in database file instead of Azure SQL.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+
+from services.azure_storage_service import AzureStorageService
+from services.review_service import ReviewService
+
+EXPORT_FIELDS = ["id", "category_id", "item_name", "rating", "content",
+                 "anonymous_id", "timestamp", "helpful_votes"]
+
+
+def read_rows(path):
+    """Yield review input dicts from a .csv or .jsonl file"""
+    with open(path, newline="", encoding="utf-8") as input_file:
+        if path.endswith(".csv"):
+            for row in csv.DictReader(input_file):
+                yield coerce_row(row)
+        else:
+            for line in input_file:
+                if line.strip():
+                    yield coerce_row(json.loads(line))
+
+
+def coerce_row(row):
+    """Keep the export fields and turn numeric text into ints, leaving anything else for validation to reject"""
+    row = {key: row.get(key) for key in EXPORT_FIELDS}
+    for key in ("category_id", "rating", "helpful_votes"):
+        if isinstance(row[key], str) and row[key].strip():
+            try:
+                row[key] = int(row[key].strip())
+            except ValueError:
+                pass
+    return row
+
+
+class Progress:
+    def __init__(self, label, every=5.0):
+        """Print running totals and throughput to stderr at most every few seconds"""
+        self.label = label
+        self.every = every
+        self.count = 0
+        self.started = time.monotonic()
+        self._last_report = self.started
+
+    def add(self, count, **extra):
+        self.count += count
+        now = time.monotonic()
+        if now - self._last_report >= self.every:
+            self._last_report = now
+            self.report(**extra)
+
+    def report(self, **extra):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        details = "".join(f", {key} {value}" for key, value in extra.items())
+        print(f"{self.label}: {self.count} rows{details} "
+              f"({self.count / elapsed:.0f} rows/sec)", file=sys.stderr)
+
+
+def import_reviews(service, path, batch_size, workers, errors_path):
+    """Validate and save every row in path; rejected rows go to errors_path"""
+    progress = Progress("import")
+    saved = rejected = 0
+    errors_file = open(errors_path, "w", encoding="utf-8") if errors_path else None
+
+    try:
+        for report in service.import_reviews(read_rows(path), batch_size, workers):
+            saved += report["saved"]
+            rejected += len(report["errors"])
+            if errors_file:
+                for index, message in report["errors"]:
+                    errors_file.write(json.dumps({"row": index, "error": message}) + "\n")
+            progress.add(report["rows"], saved=saved, rejected=rejected)
+    finally:
+        if errors_file:
+            errors_file.close()
+
+    progress.report(saved=saved, rejected=rejected)
+    return rejected == 0
+
+
+def export_reviews(storage, path, batch_size):
+    """Write every review to path as CSV or JSONL, newest first"""
+    progress = Progress("export")
+
+    with open(path, "w", newline="", encoding="utf-8") as output_file:
+        if path.endswith(".csv"):
+            writer = csv.writer(output_file)
+            writer.writerow(EXPORT_FIELDS)
+            write = lambda data: writer.writerow(data[field] for field in EXPORT_FIELDS)
+        else:
+            write = lambda data: output_file.write(json.dumps(data) + "\n")
+
+        try:
+            for review in storage.iter_reviews(batch_size=batch_size, raise_errors=True):
+                data = review.to_dict()
+                del data["flagged"]
+                write(data)
+                progress.add(1)
+        except Exception:
+            progress.report()
+            print(f"Export stopped early, {path} is incomplete", file=sys.stderr)
+            return False
+
+    progress.report()
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--local", metavar="DB_FILE",
+                        help="use a local sqlite stand-in database file (*.db) instead of Azure SQL")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    import_command = commands.add_parser("import", help="load reviews from a .csv or .jsonl file")
+    import_command.add_argument("path")
+    import_command.add_argument("--batch-size", type=int, default=None,
+                                help="rows validated and written per transaction")
+    import_command.add_argument("--workers", type=int, default=None,
+                                help="validation worker processes")
+    import_command.add_argument("--errors", metavar="PATH",
+                                help="write rejected rows as JSONL to this file")
+
+    export_command = commands.add_parser("export", help="write all reviews to a .csv or .jsonl file")
+    export_command.add_argument("path")
+    export_command.add_argument("--batch-size", type=int, default=None,
+                                help="rows fetched from the database at a time")
+
+    args = parser.parse_args(argv)
+
+    if args.local:
+        from services import sqlite_driver
+        storage = sqlite_driver.local_storage(args.local)
+    else:
+        storage = AzureStorageService()
+
+    service = ReviewService(storage=storage)
+    try:
+        if args.command == "import":
+            success = import_reviews(service, args.path, args.batch_size,
+                                     args.workers, args.errors)
+        else:
+            success = export_reviews(storage, args.path, args.batch_size)
+    finally:
+        service.close()
+
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
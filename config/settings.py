@@ -14,4 +14,87 @@ class Settings:
     ]
     
     # Basic content filtering
-    INAPPROPRIATE_WORDS = ["spam", "inappropriate", "offensive"]
\ No newline at end of file
+    INAPPROPRIATE_WORDS = ["spam", "inappropriate", "offensive"]
+    MODERATION_TERMS_FILE = None  # optional file with one more term per line
+    MODERATION_WHOLE_WORDS = False  # True ignores terms inside longer words
+    MODERATION_LEETSPEAK = False  # True also catches e.g. "sp4m"
+    
+    # Database connection pool
+    POOL_MIN_SIZE = 1  # connections opened on first use and kept through idle eviction
+    POOL_MAX_SIZE = 5
+    POOL_MAX_IDLE_SECONDS = 300  # close idle connections after this long
+    POOL_CHECKOUT_TIMEOUT = 10  # seconds to wait for a free connection
+    POOL_HEALTH_CHECK_AFTER = 10  # re-check connections idle longer than this
+    
+    # Database timeouts and circuit breaker: after CIRCUIT_FAILURE_THRESHOLD
+    # consecutive connection failures, calls fail at once instead of waiting on
+    # timeouts; one retry is let through after CIRCUIT_RESET_SECONDS (doubling
+    # on each further failure, up to CIRCUIT_MAX_RESET_SECONDS, with jitter)
+    DB_CONNECT_TIMEOUT = 5  # seconds to establish a connection and log in
+    DB_QUERY_TIMEOUT = 30  # seconds for a single query
+    CIRCUIT_FAILURE_THRESHOLD = 3
+    CIRCUIT_RESET_SECONDS = 5
+    CIRCUIT_MAX_RESET_SECONDS = 60
+    
+    # Review loading
+    FETCH_BATCH_SIZE = 500  # rows per fetchmany() when streaming reviews
+    REVIEW_PAGE_SIZE = 10  # reviews shown per page in the app
+    
+    # Bulk ingestion
+    BULK_INSERT_BATCH_SIZE = 250  # rows per multi-row INSERT (capped at 262 by SQL Server's parameter limit)
+    BULK_SUBMIT_BATCH_SIZE = 1000  # rows per transaction in ReviewService.submit_reviews
+    
+    # Helpful vote buffering
+    VOTE_FLUSH_INTERVAL = 5  # seconds between background vote flushes
+    VOTE_FLUSH_THRESHOLD = 100  # flush immediately once this many votes are pending
+    
+    # Write-behind submissions: reviews are fsync'd to this journal file and
+    # acknowledged at once, then written to the database in batches in the
+    # background (replayed on the next start if the app stops first).
+    # None writes each review to the database before acknowledging it.
+    WRITE_BEHIND_JOURNAL = None  # e.g. "pending_reviews.journal"
+    WRITE_BEHIND_FLUSH_INTERVAL = 2  # seconds between background writes
+    
+    # Review query cache
+    CACHE_TTL_SECONDS = 30
+    CACHE_MAX_ENTRIES = 256  # least recently used results are evicted beyond this
+    
+    # Where item statistics come from:
+    #   "table"  - the item_stats table maintained on every write (O(k) reads)
+    #   "query"  - a GROUP BY over reviews, only per-item rows are sent
+    #   "python" - aggregate cached reviews in process (includes unflushed votes)
+    #   "columns" - vectorized NumPy aggregation over an in-process snapshot
+    ITEM_STATS_SOURCE = "table"
+    
+    # Search: an in-process inverted index built from all reviews on first
+    # search, or SQL LIKE queries when disabled
+    SEARCH_INDEX_ENABLED = True
+    
+    # How often the query cache, search index and columns snapshot pick up
+    # reviews other clients added or voted on (via the row_version column)
+    CHANGE_SYNC_SECONDS = 10
+    
+    # Instrumentation: latency histograms (p50/p95/p99), rows and bytes for
+    # storage calls and database round-trips, and query counts per menu action.
+    # Off by default, in which case no wrappers are installed at all.
+    METRICS_ENABLED = False
+    METRICS_EXPORT_PATH = None  # written on exit; ".json" for a JSON dump, else Prometheus text
+    
+    # HTTP API server (api_server.py): one process, ReviewService and connection
+    # pool shared by every client
+    API_HOST = "127.0.0.1"
+    API_PORT = 8080
+    API_WORKER_THREADS = 16  # threads running ReviewService calls
+    API_KEEP_ALIVE_SECONDS = 15  # idle time before a kept-alive connection is closed
+    API_MAX_BODY_BYTES = 16384
+    API_MAX_PAGE_SIZE = 100  # upper bound on ?limit=
+    
+    # Batch validation (ValidationService.validate_many)
+    VALIDATION_CHUNK_SIZE = 2000
+    VALIDATION_WORKERS = 1  # > 1 validates chunks in a process pool
+    
+    # Local review snapshot: reads come from a memory-mapped file topped up with
+    # new rows, and keep working read-only while the database is unreachable
+    SNAPSHOT_PATH = None  # e.g. "reviews.snapshot"; None reads straight from the database
+    SNAPSHOT_CATCH_UP_SECONDS = 30  # how often to fetch reviews added since the snapshot
+    SNAPSHOT_REWRITE_ROWS = 1000  # rewrite the file on exit once this many rows changed
\ No newline at end of file
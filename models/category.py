@@ -1,4 +1,6 @@
 class Category:
+    __slots__ = ("id", "name", "description")
+    
     def __init__(self, id, name, description=""):
         """Create a new category"""
         self.id = id
@@ -1,21 +1,103 @@
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+import os
+import sys
+import threading
+import time
 import uuid
 
+# Review timestamps are integer microseconds since 1970-01-01 of the naive
+# wall-clock time they were written at (DATETIME2 in the database)
+EPOCH = datetime(1970, 1, 1)
+ONE_MICROSECOND = timedelta(microseconds=1)
+MICROS_PER_DAY = 86_400_000_000
+
+_id_lock = threading.Lock()
+_last_id_millis = 0
+_id_sequence = 0
+
+
+def new_review_id(created_at=None):
+    """Time-ordered review ID: a UUIDv7 string, so IDs sort by creation time as text
+    
+    The first 48 bits are Unix milliseconds, then a 12-bit sequence keeps IDs made
+    in the same millisecond in order, then 62 random bits. Pass created_at (a
+    datetime or ISO string) to build an ID for an existing review's timestamp.
+    """
+    global _last_id_millis, _id_sequence
+    
+    if created_at is None:
+        with _id_lock:
+            millis = time.time_ns() // 1_000_000
+            if millis > _last_id_millis:
+                # Random start, leaving room to count up within the millisecond
+                _last_id_millis, _id_sequence = millis, int.from_bytes(os.urandom(1), "big")
+            else:
+                _id_sequence += 1
+                if _id_sequence > 0xFFF:
+                    _last_id_millis, _id_sequence = _last_id_millis + 1, 0
+            millis, sequence = _last_id_millis, _id_sequence
+    else:
+        if not isinstance(created_at, datetime):
+            created_at = datetime.fromisoformat(str(created_at))
+        # Naive timestamps are local time, as written by datetime.now()
+        millis = int(created_at.timestamp() * 1000)
+        sequence = int.from_bytes(os.urandom(2), "big") & 0xFFF
+    
+    random_bits = int.from_bytes(os.urandom(8), "big") & ((1 << 62) - 1)
+    value = (millis << 80) | (0x7 << 76) | (sequence << 64) | (0b10 << 62) | random_bits
+    return str(uuid.UUID(int=value))
+
+
+def epoch_micros(timestamp):
+    """Convert a datetime, ISO timestamp string or epoch micros to epoch microseconds
+    
+    Aware datetimes are converted to UTC first; naive ones are taken as is.
+    """
+    if isinstance(timestamp, int):
+        return timestamp
+    if isinstance(timestamp, float):
+        return int(timestamp)
+    if not isinstance(timestamp, datetime):
+        timestamp = datetime.fromisoformat(str(timestamp))
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return (timestamp - EPOCH) // ONE_MICROSECOND
+
+
+def micros_to_datetime(micros):
+    """The naive datetime for an epoch-microsecond review timestamp"""
+    return EPOCH + timedelta(microseconds=micros)
+
+
+def is_time_ordered_id(review_id):
+    """True for IDs from new_review_id, False for older random (version 4) UUIDs"""
+    return len(review_id) == 36 and review_id[14] == "7"
+
+
 class Review:
+    # Slots instead of a per-instance __dict__ keep large result sets small
+    __slots__ = ("id", "category_id", "item_name", "rating", "content",
+                 "anonymous_id", "timestamp", "helpful_votes", "flagged")
+    
     def __init__(self, category_id, item_name, rating, content):
         """Create a new review"""
-        self.id = str(uuid.uuid4())
+        self.id = new_review_id()
         self.category_id = category_id
-        self.item_name = item_name.strip()
+        self.item_name = sys.intern(item_name.strip())
         self.rating = rating
         self.content = content.strip()
         self.anonymous_id = f"user_{str(uuid.uuid4())[:8]}"
-        self.timestamp = datetime.now().isoformat()
+        self.timestamp = epoch_micros(datetime.now())
         self.helpful_votes = 0
         self.flagged = False  # Add flagged field for compatibility
     
+    @property
+    def created_at(self):
+        """The timestamp as a naive datetime, for the database and for display"""
+        return micros_to_datetime(self.timestamp)
+    
     def to_dict(self):
-        """Convert review to dictionary for storage"""
+        """Convert review to dictionary for storage (timestamp as an ISO string)"""
         return {
             "id": self.id,
             "category_id": self.category_id,
@@ -23,7 +105,7 @@ class Review:
             "rating": self.rating,
             "content": self.content,
             "anonymous_id": self.anonymous_id,
-            "timestamp": self.timestamp,
+            "timestamp": self.created_at.isoformat(),
             "helpful_votes": self.helpful_votes,
             "flagged": self.flagged
         }
@@ -38,11 +120,25 @@ class Review:
         review.rating = data["rating"]
         review.content = data["content"]
         review.anonymous_id = data["anonymous_id"]
-        review.timestamp = data["timestamp"]
+        review.timestamp = epoch_micros(data["timestamp"])
         review.helpful_votes = data.get("helpful_votes", 0)
         review.flagged = data.get("flagged", False)
         return review
     
+    @classmethod
+    def from_row(cls, row):
+        """Create review straight from an (id, category_id, item_name, rating, content,
+        anonymous_id, timestamp, helpful_votes) database row"""
+        review = cls.__new__(cls)
+        (review.id, review.category_id, item_name, review.rating, review.content,
+         review.anonymous_id, timestamp, helpful_votes) = row
+        # Many reviews share an item name, keep one copy of each
+        review.item_name = sys.intern(item_name)
+        review.timestamp = epoch_micros(timestamp)
+        review.helpful_votes = helpful_votes or 0
+        review.flagged = False
+        return review
+    
     def __str__(self):
         """String representation for debugging"""
         return f"Review for {self.item_name}: {self.rating}/5 stars"
\ No newline at end of file
@@ -1,149 +1,650 @@
 import pymssql
 import os
 from dotenv import load_dotenv
-from models.review import Review
+from config.settings import Settings
+from models.review import Review, new_review_id
 from models.category import Category
+from services.circuit_breaker import CircuitBreaker
+from services.connection_pool import ConnectionPool
+from services.metrics import metrics
 
 load_dotenv()
 
+MAX_QUERY_PARAMETERS = 2100
+REVIEW_INSERT_COLUMNS = 8
+ALL_CATEGORIES = 0  # item_stats rows with this category_id total every category
+ITEM_STATS_COLUMNS = (
+    "item_name_normalized, category_id, item_name, total_reviews, rating_sum, "
+    "rating_1, rating_2, rating_3, rating_4, rating_5, total_helpful_votes"
+)
+
+def normalize_item_name(item_name):
+    """Normalize an item name the way the item_name_normalized column does"""
+    return item_name.strip().lower()
+
+def escape_like(term):
+    """Escape LIKE wildcards so user input is matched literally"""
+    for char in ("\\", "%", "_", "["):
+        term = term.replace(char, "\\" + char)
+    return term
+
 class AzureStorageService:
-    def __init__(self):  # Fixed: was _init_
-        """Initialize Azure storage service"""
+    def __init__(self, driver=None, pool=None, database=None):  # Fixed: was _init_
+        """Initialize Azure storage service (database defaults to AZURE_SQL_DATABASE)"""
         self.server = os.getenv('AZURE_SQL_SERVER')
-        self.database = os.getenv('AZURE_SQL_DATABASE')
+        self.database = database or os.getenv('AZURE_SQL_DATABASE')
         self.username = os.getenv('AZURE_SQL_USERNAME')
         self.password = os.getenv('AZURE_SQL_PASSWORD')
+        
+        # Any DB-API module with a pymssql-compatible connect() works here,
+        # e.g. services.sqlite_driver for local runs
+        self.driver = metrics.instrument_driver(driver or pymssql)
+        
+        # Errors meaning the server could not be reached, as opposed to bad SQL
+        connectivity_errors = (ConnectionError, TimeoutError, OSError) + tuple(
+            getattr(self.driver, name) for name in ("OperationalError", "InterfaceError")
+            if hasattr(self.driver, name)
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=Settings.CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=Settings.CIRCUIT_RESET_SECONDS,
+            max_reset_timeout=Settings.CIRCUIT_MAX_RESET_SECONDS,
+            failure_exceptions=connectivity_errors
+        )
+        self.pool = pool or ConnectionPool(
+            self._connect,
+            min_size=Settings.POOL_MIN_SIZE,
+            max_size=Settings.POOL_MAX_SIZE,
+            max_idle_time=Settings.POOL_MAX_IDLE_SECONDS,
+            checkout_timeout=Settings.POOL_CHECKOUT_TIMEOUT,
+            health_check_after=Settings.POOL_HEALTH_CHECK_AFTER,
+            breaker=self.breaker
+        )
+    
+    def _connect(self):
+        """Open a new database connection (one full login handshake)"""
+        return self.driver.connect(
+            server=self.server,
+            user=self.username,
+            password=self.password,
+            database=self.database,
+            port=1433,
+            login_timeout=Settings.DB_CONNECT_TIMEOUT,
+            timeout=Settings.DB_QUERY_TIMEOUT
+        )
     
     def get_connection(self):
-        """Get database connection"""
-        try:
-            return pymssql.connect(
-                server=self.server,
-                user=self.username,
-                password=self.password,
-                database=self.database,
-                port=1433,
-                timeout=30
-            )
+        """Get a standalone database connection outside the pool"""
+        try:
+            return self._connect()
         except Exception as e:
             print(f"Database connection failed: {e}")
             return None
     
+    def pool_stats(self):
+        """Get connection pool counters (checkouts, waits, handshakes avoided)"""
+        return self.pool.stats()
+    
+    def is_available(self):
+        """False after a connectivity failure, until a database call succeeds again"""
+        return self.breaker.healthy
+    
+    def circuit_stats(self):
+        """Get circuit breaker state and failure counters"""
+        return self.breaker.stats()
+    
+    def close(self):
+        """Close all pooled connections"""
+        self.pool.close()
+    
     def save_review(self, review):
         """Save a review to the database"""
-        connection = self.get_connection()
-        if not connection:
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute("""
+                    INSERT INTO reviews (id, category_id, item_name, rating, content, 
+                                       anonymous_id, timestamp, helpful_votes)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                """, (
+                    review.id,
+                    review.category_id,
+                    review.item_name,
+                    review.rating,
+                    review.content,
+                    review.anonymous_id,
+                    review.created_at,
+                    review.helpful_votes
+                ))
+                self._add_item_stats(cursor, self._review_stats_deltas([review]))
+                
+                connection.commit()
+            return True
+            
+        except Exception as e:
+            print(f"Failed to save review: {e}")
             return False
+    
+    def save_reviews(self, reviews, batch_size=None):
+        """Save many reviews in one transaction using multi-row INSERT statements"""
+        reviews = list(reviews)
+        if not reviews:
+            return True
+        
+        # SQL Server allows at most 2100 parameters per statement
+        batch_size = min(batch_size or Settings.BULK_INSERT_BATCH_SIZE,
+                         MAX_QUERY_PARAMETERS // REVIEW_INSERT_COLUMNS)
         
         try:
-            cursor = connection.cursor()
-            cursor.execute("""
-                INSERT INTO reviews (id, category_id, item_name, rating, content, 
-                                   anonymous_id, timestamp, helpful_votes)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                review.id,
-                review.category_id,
-                review.item_name,
-                review.rating,
-                review.content,
-                review.anonymous_id,
-                review.timestamp,
-                review.helpful_votes
-            ))
-            
-            connection.commit()
-            connection.close()
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                for start in range(0, len(reviews), batch_size):
+                    chunk = reviews[start:start + batch_size]
+                    placeholders = ", ".join(
+                        ["(%s, %s, %s, %s, %s, %s, %s, %s)"] * len(chunk)
+                    )
+                    params = []
+                    for review in chunk:
+                        params.extend((
+                            review.id,
+                            review.category_id,
+                            review.item_name,
+                            review.rating,
+                            review.content,
+                            review.anonymous_id,
+                            review.created_at,
+                            review.helpful_votes
+                        ))
+                    cursor.execute(f"""
+                        INSERT INTO reviews (id, category_id, item_name, rating, content, 
+                                           anonymous_id, timestamp, helpful_votes)
+                        VALUES {placeholders}
+                    """, tuple(params))
+                
+                self._add_item_stats(cursor, self._review_stats_deltas(reviews))
+                connection.commit()
             return True
             
         except Exception as e:
-            print(f"Failed to save review: {e}")
-            connection.close()
+            print(f"Failed to save reviews: {e}")
             return False
     
     def load_all_reviews(self):
         """Load all reviews from database"""
-        connection = self.get_connection()
-        if not connection:
-            return []
+        return self._query_reviews()
+    
+    def load_reviews_by_category(self, category_id):
+        """Load reviews for one category, newest first"""
+        return self._query_reviews(category_id=category_id)
+    
+    def load_reviews_by_item(self, item_name):
+        """Load reviews for one item (case-insensitive), newest first"""
+        return self._query_reviews(item_name=item_name)
+    
+    def search_reviews(self, search_term, category_id=None):
+        """Load reviews whose item name or content contains the search term"""
+        return self._query_reviews(category_id=category_id, search_term=search_term)
+    
+    def iter_reviews(self, category_id=None, item_name=None, search_term=None,
+                     batch_size=None, raise_errors=False):
+        """Stream matching reviews newest first, fetching batch_size rows at a time
+        
+        Review IDs are time-ordered, so primary key order is creation order.
+        A failure ends the stream early; with raise_errors it is re-raised
+        instead, for callers that need every row or none.
+        """
+        batch_size = batch_size or Settings.FETCH_BATCH_SIZE
+        where, params = self._review_filters(category_id, item_name, search_term)
         
         try:
-            cursor = connection.cursor()
-            cursor.execute("""
-                SELECT id, category_id, item_name, rating, content, 
-                       anonymous_id, timestamp, helpful_votes
-                FROM reviews
-                ORDER BY timestamp DESC
-            """)
-            
-            reviews = []
-            for row in cursor.fetchall():
-                review_data = {
-                    "id": row[0],
-                    "category_id": row[1],
-                    "item_name": row[2],
-                    "rating": row[3],
-                    "content": row[4],
-                    "anonymous_id": row[5],
-                    "timestamp": row[6].isoformat() if hasattr(row[6], 'isoformat') else str(row[6]),
-                    "helpful_votes": row[7] or 0,
-                    "flagged": False  # Add flagged field for compatibility
-                }
-                reviews.append(Review.from_dict(review_data))
-            
-            connection.close()
-            return reviews
+            # The connection stays checked out until the generator is exhausted or closed
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(f"""
+                    SELECT id, category_id, item_name, rating, content, 
+                           anonymous_id, timestamp, helpful_votes
+                    FROM reviews
+                    {where}
+                    ORDER BY id DESC
+                """, params)
+                
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield Review.from_row(row)
             
         except Exception as e:
             print(f"Failed to load reviews: {e}")
-            connection.close()
-            return []
+            if raise_errors:
+                raise
     
-    def load_categories(self):
-        """Load all categories from database"""
-        connection = self.get_connection()
-        if not connection:
+    def load_reviews_page(self, after_id=None, limit=20,
+                          category_id=None, item_name=None, search_term=None):
+        """Load the next page of reviews older than the review after_id"""
+        where, params = self._review_filters(category_id, item_name, search_term)
+        
+        if after_id is not None:
+            where = f"{where} AND id < %s" if where else "WHERE id < %s"
+            params += (after_id,)
+        
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(f"""
+                    SELECT id, category_id, item_name, rating, content, 
+                           anonymous_id, timestamp, helpful_votes
+                    FROM reviews
+                    {where}
+                    ORDER BY id DESC
+                    OFFSET 0 ROWS FETCH NEXT %s ROWS ONLY
+                """, params + (limit,))
+                
+                return [Review.from_row(row) for row in cursor.fetchall()]
+            
+        except Exception as e:
+            print(f"Failed to load reviews: {e}")
             return []
+    
+    def existing_review_ids(self, review_ids):
+        """Return the subset of review_ids already in the database, or None on failure"""
+        review_ids = list(review_ids)
+        chunk_size = MAX_QUERY_PARAMETERS - 1
+        try:
+            existing = set()
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                for start in range(0, len(review_ids), chunk_size):
+                    chunk = review_ids[start:start + chunk_size]
+                    placeholders = ", ".join(["%s"] * len(chunk))
+                    cursor.execute(f"SELECT id FROM reviews WHERE id IN ({placeholders})",
+                                   tuple(chunk))
+                    existing.update(row[0] for row in cursor.fetchall())
+            return existing
+            
+        except Exception as e:
+            print(f"Failed to check review IDs: {e}")
+            return None
+    
+    def load_changes_since(self, row_version=None):
+        """Load reviews inserted or updated after a row_version high-water mark
         
+        row_version is a ROWVERSION column, so helpful vote updates show up here
+        as well as new reviews. Rows still being written by open transactions
+        are held back (MIN_ACTIVE_ROWVERSION) so a later call cannot miss them.
+        Returns (reviews, new high-water mark), oldest change first, or None
+        when the query fails.
+        """
         try:
-            cursor = connection.cursor()
-            cursor.execute("SELECT id, name, description FROM categories ORDER BY id")
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute("""
+                    SELECT id, category_id, item_name, rating, content, 
+                           anonymous_id, timestamp, helpful_votes,
+                           CAST(row_version AS BIGINT)
+                    FROM reviews
+                    WHERE row_version > CAST(CAST(%s AS BIGINT) AS BINARY(8))
+                      AND row_version < MIN_ACTIVE_ROWVERSION()
+                    ORDER BY row_version
+                """, (row_version or 0,))
+                
+                reviews = []
+                for row in cursor.fetchall():
+                    reviews.append(Review.from_row(row[:8]))
+                    row_version = row[8]
+                return reviews, row_version or 0
             
-            categories = []
-            for row in cursor.fetchall():
-                category_data = {
-                    "id": row[0],
-                    "name": row[1],
-                    "description": row[2] or ""
-                }
-                categories.append(Category.from_dict(category_data))
+        except Exception as e:
+            print(f"Failed to load review changes: {e}")
+            return None
+    
+    def load_row_version(self):
+        """Current change high-water mark, to sync from without loading any rows"""
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute("""
+                    SELECT CAST(MAX(row_version) AS BIGINT) FROM reviews
+                    WHERE row_version < MIN_ACTIVE_ROWVERSION()
+                """)
+                return cursor.fetchone()[0] or 0
+            
+        except Exception as e:
+            print(f"Failed to load review changes: {e}")
+            return None
+    
+    def ping(self):
+        """Check that the database answers a trivial query"""
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute("SELECT 1")
+                cursor.fetchall()
+            return True
+        except Exception:
+            return False
+    
+    def load_item_statistics(self, category_id=None, item_name=None, limit=None):
+        """Aggregate per-item totals with GROUP BY, most reviewed items first
+        
+        Returns running-totals dicts (rating_sum rather than an average), so only
+        one row per item crosses the network.
+        """
+        where, params = self._review_filters(category_id, item_name)
+        fetch = ""
+        if limit:
+            fetch = "OFFSET 0 ROWS FETCH NEXT %s ROWS ONLY"
+            params += (limit,)
+        
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(f"""
+                    SELECT MAX(item_name), COUNT(*), SUM(rating),
+                           SUM(CASE WHEN rating = 1 THEN 1 ELSE 0 END),
+                           SUM(CASE WHEN rating = 2 THEN 1 ELSE 0 END),
+                           SUM(CASE WHEN rating = 3 THEN 1 ELSE 0 END),
+                           SUM(CASE WHEN rating = 4 THEN 1 ELSE 0 END),
+                           SUM(CASE WHEN rating = 5 THEN 1 ELSE 0 END),
+                           SUM(COALESCE(helpful_votes, 0))
+                    FROM reviews
+                    {where}
+                    GROUP BY item_name_normalized
+                    ORDER BY COUNT(*) DESC, SUM(COALESCE(helpful_votes, 0)) DESC
+                    {fetch}
+                """, params)
+                
+                return [
+                    {
+                        "item_name": row[0],
+                        "total_reviews": row[1],
+                        "rating_sum": row[2],
+                        "rating_distribution": {i: row[2 + i] for i in range(1, 6)},
+                        "total_helpful_votes": row[8]
+                    }
+                    for row in cursor.fetchall()
+                ]
+            
+        except Exception as e:
+            print(f"Failed to load item statistics: {e}")
+            return []
+    
+    def _query_reviews(self, **filters):
+        """Run a filtered reviews query and build Review objects"""
+        return list(self.iter_reviews(**filters))
+    
+    def _review_filters(self, category_id=None, item_name=None, search_term=None):
+        """Build the WHERE clause and parameters for a reviews query"""
+        clauses = []
+        params = ()
+        
+        if category_id:
+            clauses.append("category_id = %s")
+            params += (category_id,)
+        
+        if item_name:
+            clauses.append("item_name_normalized = %s")
+            params += (normalize_item_name(item_name),)
+        
+        if search_term:
+            pattern = f"%{escape_like(search_term.lower())}%"
+            clauses.append("(item_name_normalized LIKE %s ESCAPE '\\' "
+                           "OR LOWER(content) LIKE %s ESCAPE '\\')")
+            params += (pattern, pattern)
+        
+        where = "WHERE " + " AND ".join(clauses) if clauses else ""
+        return where, params
+    
+    def load_categories(self):
+        """Load all categories from database"""
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute("SELECT id, name, description FROM categories ORDER BY id")
+                
+                categories = []
+                for row in cursor.fetchall():
+                    category_data = {
+                        "id": row[0],
+                        "name": row[1],
+                        "description": row[2] or ""
+                    }
+                    categories.append(Category.from_dict(category_data))
             
-            connection.close()
             return categories
             
         except Exception as e:
             print(f"Failed to load categories: {e}")
-            connection.close()
             return []
     
     def update_helpful_votes(self, review_id):
         """Increment helpful votes for a review"""
-        connection = self.get_connection()
-        if not connection:
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(
+                    "UPDATE reviews SET helpful_votes = helpful_votes + 1 WHERE id = %s",
+                    (review_id,)
+                )
+                self._add_vote_stats(cursor, {review_id: 1})
+                
+                connection.commit()
+            return True
+            
+        except Exception as e:
+            print(f"Failed to update helpful votes: {e}")
             return False
+    
+    def apply_helpful_votes(self, increments):
+        """Add buffered vote counts ({review_id: n}) in batched UPDATE statements"""
+        items = list(increments.items())
+        if not items:
+            return True
+        
+        # Each id takes three parameters: id and count in the CASE, id in the IN list
+        chunk_size = MAX_QUERY_PARAMETERS // 3
         
         try:
-            cursor = connection.cursor()
-            cursor.execute(
-                "UPDATE reviews SET helpful_votes = helpful_votes + 1 WHERE id = %s",
-                (review_id,)
-            )
-            
-            connection.commit()
-            connection.close()
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                for start in range(0, len(items), chunk_size):
+                    chunk = items[start:start + chunk_size]
+                    cases = " ".join(["WHEN %s THEN %s"] * len(chunk))
+                    id_list = ", ".join(["%s"] * len(chunk))
+                    params = []
+                    for review_id, count in chunk:
+                        params.extend((review_id, count))
+                    params.extend(review_id for review_id, _ in chunk)
+                    cursor.execute(f"""
+                        UPDATE reviews
+                        SET helpful_votes = COALESCE(helpful_votes, 0) + CASE id {cases} ELSE 0 END
+                        WHERE id IN ({id_list})
+                    """, tuple(params))
+                
+                self._add_vote_stats(cursor, increments)
+                connection.commit()
             return True
             
         except Exception as e:
             print(f"Failed to update helpful votes: {e}")
-            connection.close()
-            return False
\ No newline at end of file
+            return False
+    
+    def load_item_stats(self, category_id=None, item_name=None, limit=None):
+        """Read per-item totals from the item_stats table, most reviewed first"""
+        where = "WHERE category_id = %s"
+        params = (category_id or ALL_CATEGORIES,)
+        if item_name:
+            where += " AND item_name_normalized = %s"
+            params += (normalize_item_name(item_name),)
+        fetch = ""
+        if limit:
+            fetch = "OFFSET 0 ROWS FETCH NEXT %s ROWS ONLY"
+            params += (limit,)
+        
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(f"""
+                    SELECT item_name, total_reviews, rating_sum, rating_1, rating_2,
+                           rating_3, rating_4, rating_5, total_helpful_votes
+                    FROM item_stats
+                    {where}
+                    ORDER BY total_reviews DESC, total_helpful_votes DESC
+                    {fetch}
+                """, params)
+                
+                return [
+                    {
+                        "item_name": row[0],
+                        "total_reviews": row[1],
+                        "rating_sum": row[2],
+                        "rating_distribution": {i: row[2 + i] for i in range(1, 6)},
+                        "total_helpful_votes": row[8]
+                    }
+                    for row in cursor.fetchall()
+                ]
+            
+        except Exception as e:
+            print(f"Failed to load item statistics: {e}")
+            return []
+    
+    def rebuild_item_stats(self):
+        """Recompute the item_stats table from the reviews table"""
+        totals = """
+            COUNT(*), SUM(rating),
+            SUM(CASE WHEN rating = 1 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN rating = 2 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN rating = 3 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN rating = 4 THEN 1 ELSE 0 END),
+            SUM(CASE WHEN rating = 5 THEN 1 ELSE 0 END),
+            SUM(COALESCE(helpful_votes, 0))
+        """
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute("DELETE FROM item_stats")
+                cursor.execute(f"""
+                    INSERT INTO item_stats ({ITEM_STATS_COLUMNS})
+                    SELECT item_name_normalized, category_id, MAX(item_name), {totals}
+                    FROM reviews
+                    GROUP BY item_name_normalized, category_id
+                """)
+                cursor.execute(f"""
+                    INSERT INTO item_stats ({ITEM_STATS_COLUMNS})
+                    SELECT item_name_normalized, %s, MAX(item_name), {totals}
+                    FROM reviews
+                    GROUP BY item_name_normalized
+                """, (ALL_CATEGORIES,))
+                
+                connection.commit()
+            return True
+            
+        except Exception as e:
+            print(f"Failed to rebuild item statistics: {e}")
+            return False
+    
+    def migrate_review_ids(self, batch_size=500):
+        """Replace random (version 4) review IDs with time-ordered ones
+        
+        Each new ID is built from the review's own timestamp, so migrated
+        reviews sort among new ones by when they were written. Runs in
+        batches, one transaction each, and can be re-run after a failure.
+        Returns the number of reviews migrated, or None on failure.
+        """
+        try:
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                cursor.execute(
+                    "SELECT id, timestamp FROM reviews WHERE SUBSTRING(id, 15, 1) <> '7'"
+                )
+                old_ids = cursor.fetchall()
+                
+                for start in range(0, len(old_ids), batch_size):
+                    cursor.executemany(
+                        "UPDATE reviews SET id = %s WHERE id = %s",
+                        [(new_review_id(timestamp), review_id)
+                         for review_id, timestamp in old_ids[start:start + batch_size]]
+                    )
+                    connection.commit()
+            return len(old_ids)
+            
+        except Exception as e:
+            print(f"Failed to migrate review IDs: {e}")
+            return None
+    
+    def _review_stats_deltas(self, reviews):
+        """Per-item changes to item_stats caused by inserting reviews"""
+        deltas = {}
+        for review in reviews:
+            key = normalize_item_name(review.item_name)
+            for category_id in (review.category_id, ALL_CATEGORIES):
+                delta = deltas.get((key, category_id))
+                if delta is None:
+                    delta = deltas[(key, category_id)] = {
+                        "item_name": review.item_name,
+                        "reviews": 0,
+                        "rating_sum": 0,
+                        "ratings": [0] * 5,
+                        "helpful_votes": 0
+                    }
+                delta["reviews"] += 1
+                delta["rating_sum"] += review.rating
+                delta["ratings"][review.rating - 1] += 1
+                delta["helpful_votes"] += review.helpful_votes or 0
+        return deltas
+    
+    def _add_vote_stats(self, cursor, increments):
+        """Add helpful vote increments ({review_id: n}) to the reviewed items' stats"""
+        review_ids = list(increments)
+        deltas = {}
+        chunk_size = MAX_QUERY_PARAMETERS // 2
+        for start in range(0, len(review_ids), chunk_size):
+            chunk = review_ids[start:start + chunk_size]
+            cursor.execute(f"""
+                SELECT id, item_name, item_name_normalized, category_id
+                FROM reviews
+                WHERE id IN ({", ".join(["%s"] * len(chunk))})
+            """, tuple(chunk))
+            for review_id, item_name, key, category_id in cursor.fetchall():
+                for stats_category in (category_id, ALL_CATEGORIES):
+                    delta = deltas.setdefault((key, stats_category), {
+                        "item_name": item_name,
+                        "reviews": 0,
+                        "rating_sum": 0,
+                        "ratings": [0] * 5,
+                        "helpful_votes": 0
+                    })
+                    delta["helpful_votes"] += increments[review_id]
+        self._add_item_stats(cursor, deltas)
+    
+    def _add_item_stats(self, cursor, deltas):
+        """Apply per-item deltas to item_stats inside the caller's transaction
+        
+        UPDLOCK and SERIALIZABLE keep a lock on the key (or the gap where it
+        would be) until commit, so two writers adding the first review of an
+        item cannot both miss the row and both insert it. Keys are locked in
+        sorted order so concurrent batches do not deadlock.
+        """
+        for (key, category_id), delta in sorted(deltas.items()):
+            cursor.execute("""
+                UPDATE item_stats WITH (UPDLOCK, SERIALIZABLE)
+                SET total_reviews = total_reviews + %s,
+                    rating_sum = rating_sum + %s,
+                    rating_1 = rating_1 + %s,
+                    rating_2 = rating_2 + %s,
+                    rating_3 = rating_3 + %s,
+                    rating_4 = rating_4 + %s,
+                    rating_5 = rating_5 + %s,
+                    total_helpful_votes = total_helpful_votes + %s
+                WHERE item_name_normalized = %s AND category_id = %s
+            """, (delta["reviews"], delta["rating_sum"], *delta["ratings"],
+                  delta["helpful_votes"], key, category_id))
+            
+            # A vote for an item that has no stats row yet is picked up by a rebuild
+            if cursor.rowcount == 0 and delta["reviews"]:
+                cursor.execute(f"""
+                    INSERT INTO item_stats ({ITEM_STATS_COLUMNS})
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                """, (key, category_id, delta["item_name"], delta["reviews"],
+                      delta["rating_sum"], *delta["ratings"], delta["helpful_votes"]))
\ No newline at end of file
@@ -0,0 +1,113 @@
+import random
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of trying the database while the circuit is open"""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=3, reset_timeout=5, max_reset_timeout=60,
+                 failure_exceptions=(ConnectionError, TimeoutError, OSError)):
+        """Stop calling an unreachable database after repeated connectivity failures
+
+        After failure_threshold consecutive failures the circuit opens and
+        allow() raises CircuitOpenError at once. Once the retry delay has
+        passed, one trial call is let through (half-open): success closes the
+        circuit, failure opens it again with the delay doubled, up to
+        max_reset_timeout. Delays are jittered so clients don't retry in step.
+        Only failure_exceptions count as failures; other errors (bad SQL, a
+        duplicate key) show the database is reachable.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.failure_exceptions = tuple(failure_exceptions)
+
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_count = 0  # consecutive openings, for the backoff
+        self._retry_at = 0.0
+        self._trial_started = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "failures": 0,
+            "opened": 0,
+            "rejected": 0,
+            "trials": 0,
+        }
+
+    @property
+    def healthy(self):
+        """True once the last call succeeded (closed with no recent failures)"""
+        with self._lock:
+            return self.state == CLOSED and not self._failures
+
+    def allow(self):
+        """Raise CircuitOpenError unless a call to the database may go ahead"""
+        with self._lock:
+            if self.state == CLOSED:
+                return
+
+            now = time.monotonic()
+            if self.state == OPEN and now >= self._retry_at:
+                self.state = HALF_OPEN
+                self._trial_started = None
+
+            # Half-open: one trial at a time; a trial that never reported back
+            # is given up on after the retry delay
+            if self.state == HALF_OPEN and (
+                    self._trial_started is None
+                    or now - self._trial_started >= self._delay()):
+                self._trial_started = now
+                self._stats["trials"] += 1
+                return
+
+            self._stats["rejected"] += 1
+            wait = max(self._retry_at - now, 0)
+            raise CircuitOpenError(f"Database unavailable, retrying in {wait:.0f}s")
+
+    def is_failure(self, error):
+        """True if an error means the database could not be reached"""
+        return isinstance(error, self.failure_exceptions)
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self._failures = 0
+            self._opened_count = 0
+            self._trial_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self._stats["failures"] += 1
+            self._failures += 1
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._open()
+
+    def stats(self):
+        """Return the state and failure/rejection counters"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot["state"] = self.state
+            snapshot["consecutive_failures"] = self._failures
+            return snapshot
+
+    def _open(self):
+        """Open the circuit and schedule the next trial (caller holds the lock)"""
+        self.state = OPEN
+        self._opened_count += 1
+        self._stats["opened"] += 1
+        self._trial_started = None
+        # Jitter between half and the full delay
+        self._retry_at = time.monotonic() + self._delay() * random.uniform(0.5, 1.0)
+
+    def _delay(self):
+        """Retry delay for the current number of consecutive openings"""
+        exponent = max(self._opened_count - 1, 0)
+        return min(self.reset_timeout * 2 ** exponent, self.max_reset_timeout)
@@ -0,0 +1,243 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes available before the checkout timeout"""
+
+
+class ConnectionPool:
+    def __init__(self, connect, min_size=1, max_size=5, max_idle_time=300,
+                 checkout_timeout=10, health_check_after=10,
+                 health_check_query="SELECT 1", breaker=None):
+        """Create a bounded pool around a DB-API connect function
+
+        The first checkout also opens min_size connections in the background,
+        and idle eviction never shrinks the pool below min_size. With a
+        CircuitBreaker, checkouts fail fast while the circuit is open, and
+        connect failures and connectivity errors raised inside connection()
+        blocks count towards opening it.
+        """
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_idle_time = max_idle_time
+        self.checkout_timeout = checkout_timeout
+        self.health_check_after = health_check_after
+        self.health_check_query = health_check_query
+        self.breaker = breaker
+
+        self._idle = []  # (connection, last_used) pairs, most recently used last
+        self._size = 0   # idle + checked out
+        self._closed = False
+        self._warmed = False  # set once the background fill has been started
+        self._condition = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "handshakes": 0,
+            "handshakes_avoided": 0,
+            "health_check_failures": 0,
+            "evictions": 0,
+            "discarded": 0,
+        }
+
+    def fill(self):
+        """Open connections until the pool holds at least min_size"""
+        while True:
+            with self._condition:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                connection = self._open()
+            except Exception:
+                with self._condition:
+                    self._size -= 1
+                    self._condition.notify()
+                raise
+            with self._condition:
+                if not self._closed:
+                    self._idle.append((connection, time.monotonic()))
+                    self._condition.notify()
+                    continue
+                self._size -= 1
+            self._close_quietly(connection)
+            return
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of a with-block"""
+        connection = self.acquire()
+        try:
+            yield connection
+        except BaseException as e:
+            # The connection may be mid-transaction, mid-result-set (an abandoned
+            # streaming generator) or broken, so don't hand it out again
+            self._discard(connection)
+            if self.breaker is not None:
+                if self.breaker.is_failure(e):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+            raise
+        else:
+            self.release(connection)
+            if self.breaker is not None:
+                self.breaker.record_success()
+
+    def acquire(self):
+        """Check out a healthy connection, opening one if the pool has room"""
+        if self.breaker is not None:
+            self.breaker.allow()
+        self._warm_up()
+        deadline = time.monotonic() + self.checkout_timeout
+        waited = False
+
+        while True:
+            with self._condition:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed")
+
+                self._evict_idle()
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"No connection available after {self.checkout_timeout}s"
+                        )
+                    if not waited:
+                        self._stats["waits"] += 1
+                        waited = True
+                    self._condition.wait(remaining)
+                    if self._closed:
+                        raise RuntimeError("Connection pool is closed")
+
+                if self._idle:
+                    connection, last_used = self._idle.pop()
+                else:
+                    connection, last_used = None, None
+                    self._size += 1
+
+            if connection is None:
+                try:
+                    connection = self._open()
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+                with self._condition:
+                    self._stats["checkouts"] += 1
+                return connection
+
+            if (time.monotonic() - last_used >= self.health_check_after
+                    and not self._is_healthy(connection)):
+                with self._condition:
+                    self._stats["health_check_failures"] += 1
+                self._discard(connection)
+                continue
+
+            with self._condition:
+                self._stats["checkouts"] += 1
+                self._stats["handshakes_avoided"] += 1
+            return connection
+
+    def release(self, connection):
+        """Return a connection to the pool"""
+        with self._condition:
+            if self._closed:
+                self._size -= 1
+                self._close_quietly(connection)
+                return
+            self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    def stats(self):
+        """Return a snapshot of pool counters and current sizes"""
+        with self._condition:
+            snapshot = dict(self._stats)
+            snapshot["size"] = self._size
+            snapshot["idle"] = len(self._idle)
+            snapshot["in_use"] = self._size - len(self._idle)
+            return snapshot
+
+    def close(self):
+        """Close all idle connections and refuse further checkouts"""
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for connection, _ in idle:
+            self._close_quietly(connection)
+
+    def _warm_up(self):
+        """Start filling the pool to min_size in the background, once"""
+        with self._condition:
+            if self._warmed or self.min_size <= 1:
+                return  # a single connection is opened by the checkout itself
+            self._warmed = True
+        threading.Thread(target=self._fill_quietly, name="pool-fill", daemon=True).start()
+
+    def _fill_quietly(self):
+        try:
+            self.fill()
+        except Exception as e:
+            print(f"Could not open {self.min_size} pooled connections: {e}")
+
+    def _open(self):
+        """Open a new connection through the driver"""
+        try:
+            connection = self._connect()
+            if connection is None:
+                raise ConnectionError("Database connection failed")
+        except Exception as e:
+            if self.breaker is not None and self.breaker.is_failure(e):
+                self.breaker.record_failure()
+            raise
+        with self._condition:
+            self._stats["handshakes"] += 1
+        return connection
+
+    def _discard(self, connection):
+        """Drop a connection that should not be reused"""
+        with self._condition:
+            self._size -= 1
+            self._stats["discarded"] += 1
+            self._condition.notify()
+        self._close_quietly(connection)
+
+    def _evict_idle(self):
+        """Close connections idle for longer than max_idle_time (caller holds the lock)"""
+        if self.max_idle_time is None:
+            return
+        cutoff = time.monotonic() - self.max_idle_time
+        # Oldest connections sit at the front of the idle list
+        while (self._idle and self._size > self.min_size
+               and self._idle[0][1] < cutoff):
+            connection, _ = self._idle.pop(0)
+            self._size -= 1
+            self._stats["evictions"] += 1
+            self._close_quietly(connection)
+
+    def _is_healthy(self, connection):
+        """Run a trivial query to confirm the connection is still usable"""
+        try:
+            cursor = connection.cursor()
+            cursor.execute(self.health_check_query)
+            cursor.fetchall()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
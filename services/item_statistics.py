@@ -0,0 +1,57 @@
+import heapq
+
+from services.azure_storage_service import normalize_item_name
+
+
+def new_item_stats(item_name):
+    """Empty running totals for one item"""
+    return {
+        "item_name": item_name,
+        "total_reviews": 0,
+        "rating_sum": 0,
+        "rating_distribution": {i: 0 for i in range(1, 6)},
+        "total_helpful_votes": 0
+    }
+
+
+def aggregate_items(reviews):
+    """Compute per-item totals for every item in a single pass over the reviews
+
+    Items are grouped case-insensitively, like the item_name_normalized column.
+    """
+    items = {}
+    for review in reviews:
+        key = normalize_item_name(review.item_name)
+        stats = items.get(key)
+        if stats is None:
+            stats = items[key] = new_item_stats(review.item_name)
+        stats["total_reviews"] += 1
+        stats["rating_sum"] += review.rating
+        stats["rating_distribution"][review.rating] = (
+            stats["rating_distribution"].get(review.rating, 0) + 1
+        )
+        stats["total_helpful_votes"] += review.helpful_votes or 0
+    return items
+
+
+def finish_item_stats(stats):
+    """Turn running totals into the statistics shown to users"""
+    if not stats["total_reviews"]:
+        return {"item_name": stats["item_name"], "total_reviews": 0}
+
+    return {
+        "item_name": stats["item_name"],
+        "total_reviews": stats["total_reviews"],
+        "average_rating": round(stats["rating_sum"] / stats["total_reviews"], 1),
+        "rating_distribution": dict(stats["rating_distribution"]),
+        "total_helpful_votes": stats["total_helpful_votes"]
+    }
+
+
+def top_items(items, limit):
+    """Pick the most reviewed items with a heap instead of sorting them all"""
+    top = heapq.nlargest(
+        limit, items.values(),
+        key=lambda stats: (stats["total_reviews"], stats["total_helpful_votes"])
+    )
+    return [finish_item_stats(stats) for stats in top]
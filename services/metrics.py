@@ -0,0 +1,405 @@
+import bisect
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+from config.settings import Settings
+
+# Histogram bucket upper bounds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)  # seconds
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100, 250, 1000, 10000)  # queries or rows
+
+METRIC_HELP = {
+    "reviews_call_seconds": "Latency of storage and service method calls",
+    "reviews_call_rows_total": "Reviews or items returned by storage and service method calls",
+    "reviews_call_errors_total": "Storage and service method calls that raised",
+    "reviews_db_query_seconds": "Latency of database round-trips by statement type",
+    "reviews_db_round_trips_total": "Database round-trips (each executemany parameter set is one)",
+    "reviews_db_rows_fetched_total": "Rows fetched from the database",
+    "reviews_db_bytes_sent_total": "Approximate bytes of SQL and parameters sent to the database",
+    "reviews_db_bytes_received_total": "Approximate bytes of row data received from the database",
+    "reviews_flow_seconds": "Duration of user-facing actions, including time at input prompts",
+    "reviews_flow_queries": "Database round-trips per user-facing action",
+    "reviews_flow_rows": "Rows fetched from the database per user-facing action",
+    "reviews_flow_bytes_total": "Approximate bytes sent and received per user-facing action",
+}
+
+_NO_FLOW = nullcontext()
+
+
+def value_size(value):
+    """Approximate wire size of a column or parameter value"""
+    if value is None:
+        return 0
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    return 8
+
+
+def rows_size(rows):
+    return sum(value_size(value) for row in rows for value in row)
+
+
+def result_rows(result):
+    """Number of records in a list result or the list leading a tuple result, e.g. a page"""
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    return len(result) if isinstance(result, (list, set)) else 0
+
+
+class Histogram:
+    def __init__(self, buckets):
+        """Counts of observed values per bucket, with a running sum and range"""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+        if self.min is None or value < self.min:
+            self.min = value
+
+    def percentile(self, q):
+        """Estimate the q-th quantile (0-1) by interpolating within its bucket"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if count and cumulative + count >= target:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.max
+                estimate = lower + (upper - lower) * (target - cumulative) / count
+                return min(max(estimate, self.min), self.max)
+            cumulative += count
+        return self.max
+
+
+class Metrics:
+    def __init__(self, enabled=False):
+        """Latency histograms and counters for storage calls, queries and user actions
+
+        Nothing is measured while disabled: instrument() and instrument_driver()
+        hand back their argument unchanged and flow() returns a shared no-op
+        context manager, so enable metrics before building the services.
+        """
+        self.enabled = enabled
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._counters = {}  # (name, labels) -> number
+        self._lock = threading.Lock()
+        self._local = threading.local()  # current flow of each thread
+
+    def flow(self, name):
+        """Context manager attributing the database round-trips inside it to a user action"""
+        if not self.enabled:
+            return _NO_FLOW
+        return _Flow(self, name)
+
+    def instrument(self, target, layer):
+        """Wrap an object so each public method call is timed under the given layer"""
+        if not self.enabled:
+            return target
+        return InstrumentedProxy(target, self, layer)
+
+    def instrument_driver(self, driver):
+        """Wrap a DB-API module so every round-trip, row and byte is counted"""
+        if not self.enabled:
+            return driver
+        return InstrumentedDriver(driver, self)
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def increment(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def record_call(self, layer, method, seconds, rows=0, error=False):
+        self.observe("reviews_call_seconds", seconds, layer=layer, method=method)
+        if rows:
+            self.increment("reviews_call_rows_total", rows, layer=layer, method=method)
+        if error:
+            self.increment("reviews_call_errors_total", layer=layer, method=method)
+
+    def record_query(self, statement, seconds, sent, round_trips=1):
+        self.observe("reviews_db_query_seconds", seconds, statement=statement)
+        self.increment("reviews_db_round_trips_total", round_trips)
+        self.increment("reviews_db_bytes_sent_total", sent)
+        flow = getattr(self._local, "flow", None)
+        if flow is not None:
+            flow.queries += round_trips
+            flow.bytes += sent
+
+    def record_fetch(self, rows, received):
+        self.increment("reviews_db_rows_fetched_total", rows)
+        self.increment("reviews_db_bytes_received_total", received)
+        flow = getattr(self._local, "flow", None)
+        if flow is not None:
+            flow.rows += rows
+            flow.bytes += received
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+    def snapshot(self):
+        """Return every histogram (with p50/p95/p99) and counter as JSON-ready dicts"""
+        with self._lock:
+            histograms = [
+                {
+                    "name": name, "labels": dict(labels),
+                    "count": h.count, "sum": h.sum, "max": h.max,
+                    "p50": h.percentile(0.50), "p95": h.percentile(0.95),
+                    "p99": h.percentile(0.99),
+                }
+                for (name, labels), h in sorted(self._histograms.items())
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+        return {"histograms": histograms, "counters": counters}
+
+    def to_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        lines = []
+        described = set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            for (name, labels), h in sorted(self._histograms.items()):
+                describe(name, "histogram")
+                cumulative = 0
+                for bound, count in zip(h.buckets + ("+Inf",), h.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', bound),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {h.sum}")
+                lines.append(f"{name}_count{_labels(labels)} {h.count}")
+            for (name, labels), value in sorted(self._counters.items()):
+                describe(name, "counter")
+                lines.append(f"{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path):
+        """Write a JSON dump (.json paths) or a Prometheus text file, replacing it atomically"""
+        if path.endswith(".json"):
+            content = json.dumps(self.snapshot(), indent=2)
+        else:
+            content = self.to_prometheus()
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(content)
+        os.replace(temporary, path)
+
+
+def _labels(labels):
+    """Prometheus label set, e.g. {layer="storage",method="save_review"}"""
+    if not labels:
+        return ""
+    pairs = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+    return "{" + pairs + "}"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Flow:
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+        self.queries = 0
+        self.rows = 0
+        self.bytes = 0
+
+    def __enter__(self):
+        local = self.metrics._local
+        self._outer = getattr(local, "flow", None)
+        local.flow = self
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        seconds = time.perf_counter() - self._started
+        self.metrics._local.flow = self._outer
+        if self._outer is not None:
+            # A nested flow's work also belongs to the enclosing one
+            self._outer.queries += self.queries
+            self._outer.rows += self.rows
+            self._outer.bytes += self.bytes
+        metrics = self.metrics
+        metrics.observe("reviews_flow_seconds", seconds, flow=self.name)
+        metrics.observe("reviews_flow_queries", self.queries, COUNT_BUCKETS, flow=self.name)
+        metrics.observe("reviews_flow_rows", self.rows, COUNT_BUCKETS, flow=self.name)
+        metrics.increment("reviews_flow_bytes_total", self.bytes, flow=self.name)
+
+
+class InstrumentedProxy:
+    def __init__(self, target, metrics, layer):
+        """Time the public method calls of target; everything else passes straight through"""
+        self.__dict__.update(_target=target, _metrics=metrics, _layer=layer)
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        if name.startswith("_") or not callable(value):
+            return value
+        wrapped = _timed(self._metrics, self._layer, name, value)
+        self.__dict__[name] = wrapped  # later lookups skip __getattr__
+        return wrapped
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+
+def _timed(metrics, layer, name, method):
+    def call(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = method(*args, **kwargs)
+        except Exception:
+            metrics.record_call(layer, name, time.perf_counter() - start, error=True)
+            raise
+        if inspect.isgenerator(result):
+            return _timed_generator(metrics, layer, name, result, time.perf_counter() - start)
+        metrics.record_call(layer, name, time.perf_counter() - start, result_rows(result))
+        return result
+    call.__name__ = name
+    call.__doc__ = method.__doc__
+    return call
+
+
+def _timed_generator(metrics, layer, name, generator, seconds):
+    """Yield from a streaming result, recording the time spent producing it once exhausted"""
+    rows = 0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(generator)
+            except StopIteration:
+                seconds += time.perf_counter() - start
+                break
+            seconds += time.perf_counter() - start
+            rows += 1
+            yield item
+    except Exception:
+        metrics.record_call(layer, name, seconds, rows, error=True)
+        raise
+    metrics.record_call(layer, name, seconds, rows)
+
+
+class InstrumentedDriver:
+    def __init__(self, driver, metrics):
+        """DB-API module whose connections count round-trips, rows and bytes"""
+        self._driver = driver
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        return getattr(self._driver, name)
+
+    def connect(self, *args, **kwargs):
+        start = time.perf_counter()
+        connection = self._driver.connect(*args, **kwargs)
+        self._metrics.record_query("connect", time.perf_counter() - start, 0)
+        return InstrumentedConnection(connection, self._metrics)
+
+
+class InstrumentedConnection:
+    def __init__(self, connection, metrics):
+        self._connection = connection
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._connection.cursor(*args, **kwargs), self._metrics)
+
+    def commit(self):
+        start = time.perf_counter()
+        self._connection.commit()
+        self._metrics.record_query("commit", time.perf_counter() - start, 0)
+
+    def rollback(self):
+        start = time.perf_counter()
+        self._connection.rollback()
+        self._metrics.record_query("rollback", time.perf_counter() - start, 0)
+
+
+class InstrumentedCursor:
+    def __init__(self, cursor, metrics):
+        self._cursor = cursor
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def execute(self, sql, params=()):
+        sent = len(sql) + (rows_size([params]) if isinstance(params, (tuple, list))
+                           else value_size(params))
+        start = time.perf_counter()
+        result = self._cursor.execute(sql, params)
+        self._metrics.record_query(_statement(sql), time.perf_counter() - start, sent)
+        return result
+
+    def executemany(self, sql, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        sent = len(sql) * len(seq_of_params) + rows_size(seq_of_params)
+        start = time.perf_counter()
+        result = self._cursor.executemany(sql, seq_of_params)
+        # pymssql sends each parameter set as its own round-trip
+        self._metrics.record_query(_statement(sql), time.perf_counter() - start, sent,
+                                   round_trips=len(seq_of_params))
+        return result
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._metrics.record_fetch(1, rows_size([row]))
+        return row
+
+    def fetchmany(self, size=1):
+        rows = self._cursor.fetchmany(size)
+        self._metrics.record_fetch(len(rows), rows_size(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._metrics.record_fetch(len(rows), rows_size(rows))
+        return rows
+
+
+def _statement(sql):
+    """Statement type label from the first keyword of a query, e.g. "select" """
+    words = sql.split(None, 1)
+    return words[0].lower() if words else "unknown"
+
+
+# Shared by the services and the app; enabled by Settings.METRICS_ENABLED
+metrics = Metrics(enabled=Settings.METRICS_ENABLED)
@@ -0,0 +1,99 @@
+from collections import deque
+
+# Common character substitutions folded back to letters when leetspeak
+# normalization is on, e.g. "sp4m" -> "spam"
+LEETSPEAK = str.maketrans({
+    "0": "o", "1": "i", "3": "e", "4": "a", "5": "s", "7": "t",
+    "@": "a", "$": "s", "!": "i", "+": "t",
+})
+
+
+class ModerationMatcher:
+    def __init__(self, terms, whole_words=False, leetspeak=False):
+        """Aho-Corasick automaton that finds every listed term in one pass over a text
+
+        whole_words only reports matches with no letter or digit directly before
+        or after them in the original text; leetspeak folds common digit/symbol
+        substitutions to letters before matching.
+        """
+        self.whole_words = whole_words
+        self.leetspeak = leetspeak
+
+        # Node 0 is the root; goto[n] maps a character to the next node
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [()]  # terms ending at each node, including via fail links
+
+        for term in terms:
+            term = self._normalize(term.strip())
+            if term:
+                self._add(term)
+        self._link()
+
+    def find(self, text):
+        """Return the set of terms that occur in text"""
+        # Boundaries are checked before folding, so "spam!" still ends at "!"
+        original = text.lower()
+        text = self._fold(original)
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = set()
+        node = 0
+
+        for position, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            for term in outputs[node]:
+                if self.whole_words and not self._on_word_boundary(original, position, len(term)):
+                    continue
+                found.add(term)
+        return found
+
+    def matches(self, text):
+        """True if any listed term occurs in text"""
+        return bool(self.find(text))
+
+    def _normalize(self, text):
+        return self._fold(text.lower())
+
+    def _fold(self, text):
+        """Fold leetspeak substitutions in lowercase text (same length, position for position)"""
+        return text.translate(LEETSPEAK) if self.leetspeak else text
+
+    def _add(self, term):
+        """Insert a term into the trie"""
+        node = 0
+        for char in term:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][char] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append(())
+            node = next_node
+        self._outputs[node] = (term,)
+
+    def _link(self):
+        """Compute failure links breadth-first and merge outputs along them"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                if self._fail[child] == child:
+                    self._fail[child] = 0
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+
+    @staticmethod
+    def _on_word_boundary(text, end, length):
+        """True if the match ending at index end is not part of a longer word"""
+        start = end - length + 1
+        before = text[start - 1] if start > 0 else " "
+        after = text[end + 1] if end + 1 < len(text) else " "
+        return not before.isalnum() and not after.isalnum()
@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ReviewCache:
+    def __init__(self, max_entries=256, ttl=30):
+        """LRU cache of query results with a time-to-live and tag-based invalidation"""
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags), least recent first
+        self._tags = {}  # tag -> keys of entries carrying that tag
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "invalidations": 0,
+            "stale_hits": 0,
+        }
+
+    @property
+    def enabled(self):
+        return bool(self.max_entries) and bool(self.ttl)
+
+    def get(self, key):
+        """Return (True, value) on a fresh hit, (False, None) otherwise"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+
+            expires_at, value, _ = entry
+            if time.monotonic() >= expires_at:
+                # Left in place (until evicted or replaced) for get_stale()
+                self._stats["expirations"] += 1
+                self._stats["misses"] += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return True, value
+
+    def get_stale(self, key):
+        """Return (True, value) for any entry, even an expired one, else (False, None)
+
+        A fallback for when the value cannot be reloaded; invalidated entries
+        are gone and never returned.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            self._stats["stale_hits"] += 1
+            return True, entry[1]
+
+    def set(self, key, value, tags=()):
+        """Store a value; tags name what the value depends on, for invalidate()"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            tags = frozenset(tags)
+            self._entries[key] = (time.monotonic() + self.ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats["evictions"] += 1
+
+    def invalidate(self, *tags):
+        """Drop every entry carrying any of the given tags"""
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    self._stats["invalidations"] += 1
+
+    def clear(self):
+        """Drop every entry"""
+        with self._lock:
+            self._stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self):
+        """Return hit/miss counters, the hit rate and the current size"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            lookups = snapshot["hits"] + snapshot["misses"]
+            snapshot["hit_rate"] = round(snapshot["hits"] / lookups, 3) if lookups else 0.0
+            snapshot["entries"] = len(self._entries)
+            return snapshot
+
+    def _remove(self, key):
+        """Remove one entry and its tag references (caller holds the lock)"""
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
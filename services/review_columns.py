@@ -0,0 +1,261 @@
+import threading
+from collections import namedtuple
+
+from models.review import epoch_micros
+from services.azure_storage_service import normalize_item_name
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for the columnar store
+    np = None
+
+# One consistent set of column arrays; writers build a new one and swap it in
+ColumnArrays = namedtuple("ColumnArrays",
+                          "ratings category_ids helpful_votes timestamps item_codes")
+
+
+class ReviewColumns:
+    def __init__(self, review_ids, ratings, category_ids, helpful_votes, timestamps,
+                 item_codes, item_names):
+        """Columnar snapshot of the reviews table backed by NumPy arrays
+
+        Item names are dictionary-encoded: item_codes[i] indexes item_names, and
+        items are grouped case-insensitively like item_name_normalized.
+        Updates copy the arrays they change and replace all of them at once
+        under a lock, so readers always see rows from a single version.
+        """
+        if np is None:
+            raise ImportError("The columnar review store needs NumPy (pip install numpy)")
+
+        self.review_ids = list(review_ids)
+        self._arrays = ColumnArrays(
+            np.asarray(ratings, dtype=np.int8),
+            np.asarray(category_ids, dtype=np.int16),
+            np.asarray(helpful_votes, dtype=np.int32),
+            np.asarray(timestamps, dtype=np.int64),
+            np.asarray(item_codes, dtype=np.int32)
+        )
+        self.item_names = list(item_names)
+        self._item_lookup = {
+            normalize_item_name(name): code for code, name in enumerate(self.item_names)
+        }
+        self._row_lookup = None
+        self._lock = threading.Lock()
+
+    @property
+    def ratings(self):
+        return self._arrays.ratings
+
+    @property
+    def category_ids(self):
+        return self._arrays.category_ids
+
+    @property
+    def helpful_votes(self):
+        return self._arrays.helpful_votes
+
+    @property
+    def timestamps(self):
+        return self._arrays.timestamps
+
+    @property
+    def item_codes(self):
+        return self._arrays.item_codes
+
+    @classmethod
+    def from_reviews(cls, reviews):
+        """Build a snapshot from any iterable of Review objects in one pass"""
+        review_ids, ratings, category_ids, votes, timestamps, item_codes = [], [], [], [], [], []
+        item_names, item_lookup = [], {}
+
+        for review in reviews:
+            key = normalize_item_name(review.item_name)
+            code = item_lookup.get(key)
+            if code is None:
+                code = item_lookup[key] = len(item_names)
+                item_names.append(review.item_name)
+            review_ids.append(review.id)
+            ratings.append(review.rating)
+            category_ids.append(review.category_id)
+            votes.append(review.helpful_votes or 0)
+            timestamps.append(review.timestamp)
+            item_codes.append(code)
+
+        return cls(review_ids, ratings, category_ids, votes, timestamps, item_codes, item_names)
+
+    def __len__(self):
+        return len(self._arrays.ratings)
+
+    def append(self, reviews):
+        """Add newly saved reviews to the snapshot"""
+        added = ReviewColumns.from_reviews(reviews)
+        if not len(added):
+            return
+        with self._lock:
+            self._append(added)
+
+    def merge(self, reviews):
+        """Apply changed reviews: known ids are updated, new ones appended"""
+        with self._lock:
+            row_lookup = self._rows()
+            rows, updated, added = [], [], []
+            for review in reviews:
+                row = row_lookup.get(review.id)
+                if row is None:
+                    added.append(review)
+                else:
+                    rows.append(row)
+                    updated.append(review)
+
+            if rows:
+                arrays = ColumnArrays(*(array.copy() for array in self._arrays))
+                for row, review in zip(rows, updated):
+                    arrays.ratings[row] = review.rating
+                    arrays.category_ids[row] = review.category_id
+                    arrays.helpful_votes[row] = review.helpful_votes or 0
+                    arrays.timestamps[row] = review.timestamp
+                    arrays.item_codes[row] = self._item_code(review.item_name)
+                self._arrays = arrays
+
+            added = ReviewColumns.from_reviews(added)
+            if len(added):
+                self._append(added)
+
+    def add_votes(self, increments):
+        """Apply flushed helpful votes ({review_id: n})"""
+        with self._lock:
+            row_lookup = self._rows()
+            votes = self._arrays.helpful_votes.copy()
+            for review_id, count in increments.items():
+                row = row_lookup.get(review_id)
+                if row is not None:
+                    votes[row] += count
+            self._arrays = self._arrays._replace(helpful_votes=votes)
+
+    def mask(self, category_id=None, item_name=None, since=None, until=None):
+        """Boolean row filter; since/until bound the timestamp (inclusive, exclusive)"""
+        arrays = self._arrays
+        selected = np.ones(len(arrays.ratings), dtype=bool)
+        if category_id:
+            selected &= arrays.category_ids == category_id
+        if item_name:
+            code = self._item_lookup.get(normalize_item_name(item_name))
+            if code is None:
+                return np.zeros(len(arrays.ratings), dtype=bool)
+            selected &= arrays.item_codes == code
+        if since is not None:
+            selected &= arrays.timestamps >= epoch_micros(since)
+        if until is not None:
+            selected &= arrays.timestamps < epoch_micros(until)
+        return selected
+
+    def rating_histogram(self, mask=None):
+        """Number of reviews per rating 1-5"""
+        ratings, = self._masked(mask, "ratings")
+        counts = np.bincount(ratings, minlength=6)
+        return {i: int(counts[i]) for i in range(1, 6)}
+
+    def item_totals(self, mask=None):
+        """Per-item review counts, rating sums, rating histograms and vote totals
+
+        Returns arrays indexed by item code; histograms has one row per item
+        and one column per rating 1-5.
+        """
+        codes, ratings, votes = self._masked(mask, "item_codes", "ratings", "helpful_votes")
+
+        item_count = len(self.item_names)
+        counts = np.bincount(codes, minlength=item_count)
+        rating_sums = np.bincount(codes, weights=ratings, minlength=item_count)
+        vote_totals = np.bincount(codes, weights=votes, minlength=item_count)
+        histograms = np.bincount(
+            codes * 5 + (ratings.astype(np.int64) - 1), minlength=item_count * 5
+        ).reshape(item_count, 5)
+        return counts, rating_sums, histograms, vote_totals
+
+    def item_statistics(self, item_name):
+        """Running totals for one item, like AzureStorageService.load_item_stats rows"""
+        code = self._item_lookup.get(normalize_item_name(item_name))
+        if code is None:
+            return None
+
+        arrays = self._arrays
+        selected = arrays.item_codes == code
+        ratings = arrays.ratings[selected]
+        return self._totals_dict(
+            code, int(selected.sum()), int(ratings.sum()),
+            np.bincount(ratings, minlength=6)[1:],
+            int(arrays.helpful_votes[selected].sum())
+        )
+
+    def popular_items(self, category_id=None, limit=5):
+        """Running totals for the most reviewed items, most reviewed first"""
+        mask = self.mask(category_id=category_id) if category_id else None
+        counts, rating_sums, histograms, vote_totals = self.item_totals(mask)
+
+        reviewed = np.flatnonzero(counts)
+        if len(reviewed) > limit:
+            # argpartition finds the top `limit` items without a full sort
+            top = reviewed[np.argpartition(-counts[reviewed], limit - 1)[:limit]]
+        else:
+            top = reviewed
+        top = top[np.lexsort((-vote_totals[top], -counts[top]))]
+
+        return [
+            self._totals_dict(code, int(counts[code]), int(rating_sums[code]),
+                              histograms[code], int(vote_totals[code]))
+            for code in top
+        ]
+
+    def _totals_dict(self, code, total_reviews, rating_sum, histogram, helpful_votes):
+        return {
+            "item_name": self.item_names[code],
+            "total_reviews": total_reviews,
+            "rating_sum": rating_sum,
+            "rating_distribution": {i: int(histogram[i - 1]) for i in range(1, 6)},
+            "total_helpful_votes": helpful_votes
+        }
+
+    def _rows(self):
+        """review_id -> row number, built on first use (lock held)"""
+        if self._row_lookup is None:
+            self._row_lookup = {review_id: row for row, review_id in enumerate(self.review_ids)}
+        return self._row_lookup
+
+    def _masked(self, mask, *names):
+        """The named columns from one version of the arrays, filtered by mask
+
+        A mask built before rows were appended covers only the rows it saw.
+        """
+        arrays = self._arrays
+        columns = [getattr(arrays, name) for name in names]
+        if mask is None:
+            return columns
+        return [column[:len(mask)][mask] for column in columns]
+
+    def _item_code(self, item_name):
+        """The code for an item name, adding it to the dictionary if new (lock held)"""
+        key = normalize_item_name(item_name)
+        code = self._item_lookup.get(key)
+        if code is None:
+            code = self._item_lookup[key] = len(self.item_names)
+            self.item_names.append(item_name)
+        return code
+
+    def _append(self, added):
+        """Append another snapshot's rows and swap in the longer arrays (lock held)"""
+        # Re-encode the new rows' item codes against this snapshot's dictionary
+        codes = np.array([self._item_code(name) for name in added.item_names], dtype=np.int32)
+
+        if self._row_lookup is not None:
+            for offset, review_id in enumerate(added.review_ids):
+                self._row_lookup[review_id] = len(self.review_ids) + offset
+        self.review_ids.extend(added.review_ids)
+
+        arrays, new = self._arrays, added._arrays
+        self._arrays = ColumnArrays(
+            np.concatenate([arrays.ratings, new.ratings]),
+            np.concatenate([arrays.category_ids, new.category_ids]),
+            np.concatenate([arrays.helpful_votes, new.helpful_votes]),
+            np.concatenate([arrays.timestamps, new.timestamps]),
+            np.concatenate([arrays.item_codes, codes[new.item_codes]])
+        )
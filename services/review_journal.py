@@ -0,0 +1,116 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from models.review import Review
+
+COMPACT_AFTER_RECORDS = 1000  # rewrite the file with only the pending reviews past this many lines
+
+
+class ReviewJournal:
+    def __init__(self, path, dead_letter_path=None):
+        """Append-only file of submitted reviews not yet written to the database
+
+        Each line is a JSON record: {"add": review} when a review is accepted,
+        {"done": [ids]} once those reviews are in the database. Adds are
+        fsync'd before append() returns, so an acknowledged review survives a
+        crash; opening the journal again restores whatever was not done. The
+        file is truncated whenever nothing is pending and compacted down to the
+        pending reviews as batches complete. Reviews the database keeps
+        rejecting are moved to dead_letter_path (default <path>.failed).
+        """
+        self.path = path
+        self.dead_letter_path = dead_letter_path or f"{path}.failed"
+        self._pending = OrderedDict()  # review_id -> Review, oldest first
+        self._records = 0  # lines in the file
+        self._lock = threading.Lock()
+        self._load()
+        self._file = open(path, "ab")
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)
+
+    def append(self, reviews):
+        """Durably record reviews as accepted"""
+        lines = b"".join(
+            json.dumps({"add": review.to_dict()}).encode("utf-8") + b"\n" for review in reviews
+        )
+        with self._lock:
+            self._file.write(lines)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._records += len(reviews)
+            for review in reviews:
+                self._pending[review.id] = review
+
+    def pending(self, limit=None):
+        """Accepted reviews not yet marked done, oldest first"""
+        with self._lock:
+            reviews = list(self._pending.values())
+        return reviews[:limit] if limit else reviews
+
+    def mark_done(self, review_ids):
+        """Record that reviews are in the database"""
+        with self._lock:
+            for review_id in review_ids:
+                self._pending.pop(review_id, None)
+
+            if not self._pending:
+                # Nothing left to replay, start the file over
+                self._file.truncate(0)
+                self._records = 0
+            elif self._records >= COMPACT_AFTER_RECORDS:
+                self._compact()
+            else:
+                # Not fsync'd: if this line is lost, replay skips reviews
+                # that already exist in the database
+                self._file.write(json.dumps({"done": list(review_ids)}).encode("utf-8") + b"\n")
+                self._records += 1
+            self._file.flush()
+
+    def dead_letter(self, review, error):
+        """Move a review the database rejects out of the queue into the dead-letter file"""
+        line = json.dumps({"add": review.to_dict(), "error": error}).encode("utf-8") + b"\n"
+        with open(self.dead_letter_path, "ab") as dead_letter_file:
+            dead_letter_file.write(line)
+            dead_letter_file.flush()
+            os.fsync(dead_letter_file.fileno())
+        self.mark_done([review.id])
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def _compact(self):
+        """Rewrite the file with just the pending reviews (caller holds the lock)"""
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "wb") as journal_file:
+            for review in self._pending.values():
+                journal_file.write(json.dumps({"add": review.to_dict()}).encode("utf-8") + b"\n")
+            journal_file.flush()
+            os.fsync(journal_file.fileno())
+        self._file.close()
+        os.replace(temporary, self.path)
+        self._file = open(self.path, "ab")
+        self._records = len(self._pending)
+
+    def _load(self):
+        """Rebuild the pending reviews from an existing journal file"""
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb") as journal_file:
+            for line in journal_file:
+                self._records += 1
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash was never acknowledged
+                    continue
+                if "add" in record:
+                    review = Review.from_dict(record["add"])
+                    self._pending[review.id] = review
+                for review_id in record.get("done", ()):
+                    self._pending.pop(review_id, None)
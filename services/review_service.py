@@ -1,12 +1,66 @@
-from models.review import Review
-from services.azure_storage_service import AzureStorageService
-from services.validation_service import ValidationService
+import copy
+import threading
+import time
+import uuid
+from config.settings import Settings
+from models.review import Review, epoch_micros, is_time_ordered_id, new_review_id
+from services.azure_storage_service import AzureStorageService, normalize_item_name
+from services.item_statistics import aggregate_items, finish_item_stats, top_items
+from services.metrics import metrics
+from services.review_cache import ReviewCache
+from services.review_columns import ReviewColumns
+from services.review_journal import ReviewJournal
+from services.review_writer import ReviewWriter
+from services.search_index import SearchIndex
+from services.snapshot_storage import SnapshotStorage
+from services.validation_service import ValidationService, review_fields, review_metadata
+from services.vote_buffer import VoteBuffer
 
 class ReviewService:
-    def __init__(self): 
+    def __init__(self, storage=None): 
         """Initialize review service"""
-        self.storage = AzureStorageService()
+        self.storage = metrics.instrument(storage or self._default_storage(), "storage")
         self.validator = ValidationService()
+        self.cache = ReviewCache(
+            max_entries=Settings.CACHE_MAX_ENTRIES,
+            ttl=Settings.CACHE_TTL_SECONDS
+        )
+        self.search_index = SearchIndex()
+        self._search_index_lock = threading.Lock()  # only one thread builds the index
+        self.columns = None  # ReviewColumns snapshot, built when ITEM_STATS_SOURCE is "columns"
+        self._columns_lock = threading.Lock()  # only one thread builds the snapshot
+        self._row_version = None  # change high-water mark the local copies are synced to
+        self._synced_at = None
+        self.votes = VoteBuffer(
+            self.storage,
+            flush_interval=Settings.VOTE_FLUSH_INTERVAL,
+            flush_threshold=Settings.VOTE_FLUSH_THRESHOLD,
+            on_flush=self._votes_flushed
+        )
+        self.writer = None  # write-behind queue, when WRITE_BEHIND_JOURNAL is set
+        if Settings.WRITE_BEHIND_JOURNAL:
+            self.writer = ReviewWriter(
+                self.storage,
+                ReviewJournal(Settings.WRITE_BEHIND_JOURNAL),
+                flush_interval=Settings.WRITE_BEHIND_FLUSH_INTERVAL,
+                batch_size=Settings.BULK_INSERT_BATCH_SIZE,
+                on_flush=self._reviews_saved
+            )
+    
+    @staticmethod
+    def _default_storage():
+        """Azure SQL storage, behind the local snapshot when one is configured"""
+        storage = AzureStorageService()
+        if Settings.SNAPSHOT_PATH:
+            return SnapshotStorage(storage, Settings.SNAPSHOT_PATH)
+        return storage
+    
+    def close(self):
+        """Write any queued reviews and buffered votes, then release database connections"""
+        if self.writer is not None:
+            self.writer.close()
+        self.votes.close()
+        self.storage.close()
     
     def submit_review(self, category_id, item_name, rating, content):
         """Submit a new review"""
@@ -22,7 +76,13 @@ class ReviewService:
         # Create and save the review
         try:
             review = Review(category_id, item_name, rating, content)
-            success = self.storage.save_review(review)
+            if self.writer is not None:
+                # Journaled to disk now, written to the database in the background
+                success = self.writer.add(review)
+            else:
+                success = self.storage.save_review(review)
+                if success:
+                    self._reviews_saved([review])
             
             if success:
                 print("Review submitted successfully!")
@@ -35,31 +95,151 @@ class ReviewService:
             print(f"Error submitting review: {e}")
             return False
     
+    def submit_reviews(self, rows, batch_size=None, workers=None):
+        """Validate and save many reviews, one transaction per batch
+        
+        rows yields dicts with category_id, item_name, rating and content keys
+        (or tuples in that order). Invalid rows are reported and skipped, they
+        don't abort the rest of their batch.
+        """
+        result = {"total": 0, "saved": 0, "errors": []}
+        for report in self.import_reviews(rows, batch_size, workers):
+            result["total"] += report["rows"]
+            result["saved"] += report["saved"]
+            result["errors"].extend(report["errors"])
+        return result
+    
+    def import_reviews(self, rows, batch_size=None, workers=None):
+        """Stream rows into storage, yielding a report after each batch
+        
+        Each report holds the batch's row count, how many were saved and
+        (row index, error message) pairs for rejected rows. Only one batch is
+        held in memory at a time (per validation worker). Rows exported with
+        their id, anonymous_id, timestamp and helpful_votes keep them.
+        """
+        batch_size = batch_size or Settings.BULK_SUBMIT_BATCH_SIZE
+        offset = 0
+        
+        for chunk, chunk_errors in self.validator.iter_validate(rows, batch_size, workers):
+            report = {"rows": len(chunk), "saved": 0, "errors": []}
+            batch = []
+            for position, (row, errors) in enumerate(zip(chunk, chunk_errors)):
+                if errors:
+                    message = "; ".join(error["message"] for error in errors)
+                    report["errors"].append((offset + position, message))
+                else:
+                    batch.append((offset + position, self._imported_review(row)))
+            offset += len(chunk)
+            
+            if batch:
+                self._save_batch(batch, report)
+            yield report
+    
+    def _imported_review(self, row):
+        """A new Review from a validated row, keeping any exported metadata it has
+        
+        Older random (version 4) IDs, and missing ones, are replaced with
+        time-ordered IDs for the review's timestamp, so imported reviews sort
+        and paginate by age.
+        """
+        review = Review(*review_fields(row))
+        metadata = review_metadata(row)
+        if "anonymous_id" in metadata:
+            review.anonymous_id = metadata["anonymous_id"]
+        if "timestamp" in metadata:
+            review.timestamp = epoch_micros(metadata["timestamp"])
+        if "helpful_votes" in metadata:
+            review.helpful_votes = metadata["helpful_votes"]
+        review_id = str(uuid.UUID(str(metadata["id"]))) if "id" in metadata else None
+        if review_id and is_time_ordered_id(review_id):
+            review.id = review_id
+        elif "timestamp" in metadata:
+            review.id = new_review_id(review.created_at)
+        return review
+    
+    def _save_batch(self, batch, result):
+        """Save one batch of (row index, review) pairs and record the outcome"""
+        reviews = [review for _, review in batch]
+        if self.storage.save_reviews(reviews):
+            self._reviews_saved(reviews)
+            result["saved"] += len(batch)
+        else:
+            result["errors"].extend(
+                (index, "Failed to save review to database") for index, _ in batch
+            )
+    
     def get_all_reviews(self):
         """Get all reviews from database"""
         try:
-            return self.storage.load_all_reviews()
+            reviews = self._cached(("all",), ["all"], self.storage.load_all_reviews)
+            return self._with_pending_votes(reviews)
         except Exception as e:
             print(f"Error loading reviews: {e}")
             return []
     
     def get_reviews_by_category(self, category_id):
         """Get reviews for a specific category"""
-        all_reviews = self.get_all_reviews()
-        return [review for review in all_reviews if review.category_id == category_id]
+        try:
+            reviews = self._cached(
+                ("category", category_id), [("category", category_id)],
+                lambda: self.storage.load_reviews_by_category(category_id)
+            )
+            return self._with_pending_votes(reviews)
+        except Exception as e:
+            print(f"Error loading reviews: {e}")
+            return []
     
-    def search_reviews(self, search_term):
-        """Search reviews by content or item name"""
-        all_reviews = self.get_all_reviews()
-        search_term = search_term.lower()
+    def iter_reviews_by_category(self, category_id):
+        """Stream reviews for a specific category without loading them all at once"""
+        pending = self.votes.pending_votes()
+        for review in self.storage.iter_reviews(category_id=category_id):
+            if pending:
+                review.helpful_votes += pending.get(review.id, 0)
+            yield review
+    
+    def get_reviews_page(self, after=None, limit=None, category_id=None,
+                         item_name=None, search_term=None):
+        """Get one page of reviews and the cursor for the next page (None when done)
         
-        results = []
-        for review in all_reviews:
-            if (search_term in review.item_name.lower() or 
-                search_term in review.content.lower()):
-                results.append(review)
+        The cursor is the ID of the last review shown; IDs are time-ordered.
+        """
+        limit = limit or Settings.REVIEW_PAGE_SIZE
         
-        return results
+        try:
+            # Ask for one extra row to find out whether another page exists
+            reviews = self._cached(
+                ("page", after, limit, category_id,
+                 item_name and normalize_item_name(item_name),
+                 search_term and search_term.lower()),
+                self._filter_tags(category_id, item_name, search_term),
+                lambda: self.storage.load_reviews_page(
+                    after, limit + 1,
+                    category_id=category_id, item_name=item_name, search_term=search_term
+                )
+            )
+        except Exception as e:
+            print(f"Error loading reviews: {e}")
+            return [], None
+        
+        reviews = self._with_pending_votes(reviews)
+        if len(reviews) <= limit:
+            return reviews, None
+        
+        reviews = reviews[:limit]
+        return reviews, reviews[-1].id
+    
+    def search_reviews_page(self, search_term, category_id=None, after=None, limit=None):
+        """Get one page of search results, best match first, and the next page cursor"""
+        if not Settings.SEARCH_INDEX_ENABLED:
+            return self.get_reviews_page(after, limit, category_id=category_id,
+                                         search_term=search_term)
+        
+        limit = limit or Settings.REVIEW_PAGE_SIZE
+        offset = after or 0
+        results = self.search_reviews(search_term, category_id)
+        page = results[offset:offset + limit]
+        next_offset = offset + limit if len(results) > offset + limit else None
+        return page, next_offset
     
     def get_categories(self):
         """Get all categories"""
@@ -72,74 +252,241 @@ class ReviewService:
     def vote_helpful(self, review_id):
         """Mark a review as helpful"""
         try:
-            success = self.storage.update_helpful_votes(review_id)
-            if success:
-                print("Vote recorded!")
-            else:
-                print("Failed to record vote")
-            return success
+            # Buffered and written in batches, see VoteBuffer; a failed write is retried there
+            self.votes.add(review_id)
+            print("Vote recorded!")
+            return True
         except Exception as e:
             print(f"Error recording vote: {e}")
             return False
     
     def get_reviews_by_item(self, item_name):
         """Get all reviews for a specific item"""
-        all_reviews = self.get_all_reviews()
-        return [review for review in all_reviews 
-                if review.item_name.lower() == item_name.lower()]
+        try:
+            key = normalize_item_name(item_name)
+            reviews = self._cached(
+                ("item", key), [("item", key)],
+                lambda: self.storage.load_reviews_by_item(item_name)
+            )
+            return self._with_pending_votes(reviews)
+        except Exception as e:
+            print(f"Error loading reviews: {e}")
+            return []
     
     def search_reviews(self, search_term, category_id=None):
         """Search reviews by content or item name"""
-        all_reviews = self.get_all_reviews()
-        search_term = search_term.lower()
-        
-        results = []
-        for review in all_reviews:
-            if category_id and review.category_id != category_id:
-                continue
+        try:
+            index = self._ready_search_index() if Settings.SEARCH_INDEX_ENABLED else None
+            if index is not None:
+                return self._with_pending_votes(index.search(search_term, category_id))
             
-            if (search_term in review.item_name.lower() or 
-                search_term in review.content.lower()):
-                results.append(review)
-        
-        return results
+            reviews = self._cached(
+                ("search", search_term.lower(), category_id),
+                self._filter_tags(category_id, None, search_term),
+                lambda: self.storage.search_reviews(search_term, category_id)
+            )
+            return self._with_pending_votes(reviews)
+        except Exception as e:
+            print(f"Error searching reviews: {e}")
+            return []
     
     def get_item_statistics(self, item_name):
         """Get statistics for a specific item"""
-        reviews = self.get_reviews_by_item(item_name)
+        source = Settings.ITEM_STATS_SOURCE
+        columns = self._ready_columns() if source == "columns" else None
+        if source == "columns" and columns is None:
+            source = "table"  # until the snapshot can be built
         
-        if not reviews:
-            return {"item_name": item_name, "total_reviews": 0}
-        
-        ratings = [review.rating for review in reviews]
+        if source == "python":
+            items = aggregate_items(self.get_reviews_by_item(item_name))
+            totals = list(items.values())
+        elif source == "columns":
+            item_totals = columns.item_statistics(item_name)
+            totals = [item_totals] if item_totals else []
+        else:
+            key = normalize_item_name(item_name)
+            load = (self.storage.load_item_stats if source == "table"
+                    else self.storage.load_item_statistics)
+            totals = self._cached(("stats", source, key), ["stats"],
+                                  lambda: load(item_name=item_name))
         
-        import statistics
-        return {
-            "item_name": item_name,
-            "total_reviews": len(reviews),
-            "average_rating": round(statistics.mean(ratings), 1),
-            "rating_distribution": {i: ratings.count(i) for i in range(1, 6)},
-            "total_helpful_votes": sum(review.helpful_votes for review in reviews)
-        }
+        if not totals:
+            return {"item_name": item_name, "total_reviews": 0}
+        return finish_item_stats(totals[0])
     
     def get_popular_items(self, category_id=None, limit=5):
         """Get most reviewed items with statistics"""
-        all_reviews = self.get_all_reviews()
+        source = Settings.ITEM_STATS_SOURCE
+        columns = self._ready_columns() if source == "columns" else None
+        if source == "columns" and columns is None:
+            source = "table"  # until the snapshot can be built
+        
+        if source == "columns":
+            totals = columns.popular_items(category_id, limit)
+            return [finish_item_stats(stats) for stats in totals]
+        
+        if source != "python":
+            load = (self.storage.load_item_stats if source == "table"
+                    else self.storage.load_item_statistics)
+            totals = self._cached(("popular", source, category_id, limit), ["stats"],
+                                  lambda: load(category_id=category_id, limit=limit))
+            return [finish_item_stats(stats) for stats in totals]
         
         if category_id:
-            all_reviews = [r for r in all_reviews if r.category_id == category_id]
-        
-        # Count reviews per item
-        from collections import defaultdict
-        item_counts = defaultdict(int)
-        for review in all_reviews:
-            item_counts[review.item_name] += 1
-        
-        # Sort by review count and get statistics
-        popular_items = []
-        for item_name, count in sorted(item_counts.items(), 
-                                     key=lambda x: x[1], reverse=True)[:limit]:
-            stats = self.get_item_statistics(item_name)
-            popular_items.append(stats)
-        
-        return popular_items
\ No newline at end of file
+            all_reviews = self.get_reviews_by_category(category_id)
+        else:
+            all_reviews = self.get_all_reviews()
+        
+        # One pass for every item's totals, then a heap for the top ones
+        return top_items(aggregate_items(all_reviews), limit)
+    
+    def sync_changes(self, force=False):
+        """Merge reviews added or changed since the last sync into the local copies
+        
+        Runs at most every CHANGE_SYNC_SECONDS unless forced. Only the changed
+        rows are fetched: cached results holding them are dropped and the
+        search index and columns snapshot are patched in place.
+        """
+        now = time.monotonic()
+        if (not force and self._synced_at is not None
+                and now - self._synced_at < Settings.CHANGE_SYNC_SECONDS):
+            return
+        self._synced_at = now
+        
+        if self._row_version is None:
+            # Nothing is loaded yet, so start from the current high-water mark
+            self._row_version = self.storage.load_row_version()
+            return
+        
+        changes = self.storage.load_changes_since(self._row_version)
+        if changes is None:
+            return
+        reviews, self._row_version = changes
+        if reviews:
+            self._reviews_changed(reviews)
+    
+    def cache_stats(self):
+        """Get review cache hit/miss counters"""
+        return self.cache.stats()
+    
+    def _cached(self, key, tags, load):
+        """Return a cached query result, loading and caching it on a miss"""
+        self.sync_changes()
+        hit, reviews = self.cache.get(key)
+        if hit:
+            return reviews
+        
+        reviews = load()
+        if not self.storage.is_available():
+            # The database is unreachable: don't cache what was loaded, and
+            # prefer an expired result to the empty one a failed load returns
+            if not reviews:
+                stale, cached = self.cache.get_stale(key)
+                if stale:
+                    return cached
+            return reviews
+        
+        # Tag each review id too, so a flushed vote drops every result showing it
+        review_tags = [("review", r.id) for r in reviews if isinstance(r, Review)]
+        self.cache.set(key, reviews, list(tags) + review_tags)
+        return reviews
+    
+    def _filter_tags(self, category_id, item_name, search_term):
+        """Cache tags for a result filtered by category, item and/or search term"""
+        tags = []
+        if category_id:
+            tags.append(("category", category_id))
+        if item_name:
+            tags.append(("item", normalize_item_name(item_name)))
+        if search_term:
+            tags.append("search")
+        return tags or ["all"]
+    
+    def _reviews_saved(self, reviews):
+        """Show newly saved reviews: drop cached results they belong in, index them"""
+        tags = set()
+        for review in reviews:
+            tags.add(("category", review.category_id))
+            tags.add(("item", normalize_item_name(review.item_name)))
+        self.cache.invalidate("all", "search", "stats", *tags)
+        
+        if self.search_index.built_at is not None:
+            for review in reviews:
+                self.search_index.add(review)
+        if self.columns is not None:
+            self.columns.append(reviews)
+    
+    def _reviews_changed(self, reviews):
+        """Merge reviews inserted or updated elsewhere"""
+        tags = set()
+        for review in reviews:
+            tags.add(("review", review.id))
+            tags.add(("category", review.category_id))
+            tags.add(("item", normalize_item_name(review.item_name)))
+        self.cache.invalidate("all", "search", "stats", *tags)
+        
+        if self.search_index.built_at is not None:
+            for review in reviews:
+                self.search_index.add(review)
+        if self.columns is not None:
+            self.columns.merge(reviews)
+    
+    def _votes_flushed(self, increments):
+        """Invalidate cached results holding the pre-flush vote counts"""
+        self.cache.invalidate("stats", *(("review", review_id) for review_id in increments))
+        self.search_index.add_votes(increments)
+        if self.columns is not None:
+            self.columns.add_votes(increments)
+    
+    def _ready_search_index(self):
+        """Build the search index on first use, then keep it up to date with changes
+        
+        Returns None if the reviews cannot all be read; the next call retries.
+        """
+        # Sync first so the high-water mark is taken before the index is built
+        self.sync_changes()
+        index = self.search_index
+        if index.built_at is None:
+            with self._search_index_lock:
+                if index.built_at is None:
+                    try:
+                        index.build(self.storage.iter_reviews(raise_errors=True))
+                    except Exception as e:
+                        print(f"Search index not built, searching the database: {e}")
+                        return None
+        return index
+    
+    def _with_pending_votes(self, reviews):
+        """Add votes still waiting in the buffer so users see their vote immediately
+        
+        Reviews with pending votes are copied, cached objects are never modified.
+        """
+        pending = self.votes.pending_votes()
+        if not pending:
+            return reviews
+        
+        merged = []
+        for review in reviews:
+            if review.id in pending:
+                review = copy.copy(review)
+                review.helpful_votes += pending[review.id]
+            merged.append(review)
+        return merged
+    
+    def _ready_columns(self):
+        """Build the columnar snapshot on first use, then keep it up to date with changes
+        
+        Returns None if the reviews cannot all be read; the next call retries.
+        """
+        self.sync_changes()
+        if self.columns is None:
+            with self._columns_lock:
+                if self.columns is None:
+                    try:
+                        self.columns = ReviewColumns.from_reviews(
+                            self.storage.iter_reviews(raise_errors=True)
+                        )
+                    except Exception as e:
+                        print(f"Columnar snapshot not built, using item_stats: {e}")
+                        return None
+        return self.columns
\ No newline at end of file
@@ -0,0 +1,196 @@
+"""Compact on-disk snapshot of the reviews and categories tables.
+
+Layout: an 8-byte magic, then one 8-byte aligned block per column, then a
+JSON footer describing where each column lives, then a fixed-size trailer
+pointing at the footer. Fixed-width columns (ratings, category ids, helpful
+votes, epoch-microsecond timestamps, item codes) are raw native arrays; text
+columns are an offsets array plus one UTF-8 blob. Item names are
+dictionary-encoded through item_codes.
+
+ReviewSnapshot memory-maps the file and reads columns through memoryview
+casts, so opening it costs the same regardless of size and rows are only
+decoded when asked for. Rows are stored newest first, by descending review ID.
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from models.category import Category
+from models.review import Review
+
+MAGIC = b"RVSNAP1\n"
+TRAILER = struct.Struct("<QQ8s")  # footer offset, footer length, magic
+FIXED_COLUMNS = {
+    "ratings": "b",
+    "category_ids": "h",
+    "helpful_votes": "i",
+    "timestamps": "q",
+    "item_codes": "i",
+}
+TEXT_COLUMNS = ("ids", "contents", "anonymous_ids", "item_names")
+
+
+def write_snapshot(path, reviews, categories, row_version=0):
+    """Write reviews (newest first) and categories to path, replacing it atomically
+
+    row_version is the change high-water mark the reviews are current to.
+    """
+    fixed = {name: array(typecode) for name, typecode in FIXED_COLUMNS.items()}
+    text = {name: (array("Q", [0]), bytearray()) for name in TEXT_COLUMNS}
+    item_codes = {}
+
+    def add_text(column, value):
+        offsets, blob = text[column]
+        blob += value.encode("utf-8")
+        offsets.append(len(blob))
+
+    for review in reviews:
+        code = item_codes.get(review.item_name)
+        if code is None:
+            code = item_codes[review.item_name] = len(item_codes)
+            add_text("item_names", review.item_name)
+        fixed["ratings"].append(review.rating)
+        fixed["category_ids"].append(review.category_id)
+        fixed["helpful_votes"].append(review.helpful_votes or 0)
+        fixed["timestamps"].append(review.timestamp)
+        fixed["item_codes"].append(code)
+        add_text("ids", review.id)
+        add_text("contents", review.content)
+        add_text("anonymous_ids", review.anonymous_id)
+
+    footer = {
+        "version": 1,
+        "byteorder": sys.byteorder,
+        "rows": len(fixed["ratings"]),
+        "row_version": row_version,
+        "categories": [category.to_dict() for category in categories],
+        "columns": {},
+    }
+
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as snapshot_file:
+        snapshot_file.write(MAGIC)
+
+        def write_block(name, data, typecode):
+            padding = -snapshot_file.tell() % 8
+            snapshot_file.write(b"\0" * padding)
+            footer["columns"][name] = [snapshot_file.tell(), len(data), typecode]
+            snapshot_file.write(data)
+
+        for name, values in fixed.items():
+            write_block(name, values.tobytes(), values.typecode)
+        for name, (offsets, blob) in text.items():
+            write_block(f"{name}.offsets", offsets.tobytes(), "Q")
+            write_block(name, bytes(blob), "B")
+
+        footer_bytes = json.dumps(footer).encode("utf-8")
+        footer_offset = snapshot_file.tell()
+        snapshot_file.write(footer_bytes)
+        snapshot_file.write(TRAILER.pack(footer_offset, len(footer_bytes), MAGIC))
+        snapshot_file.flush()
+        os.fsync(snapshot_file.fileno())
+
+    os.replace(temp_path, path)
+
+
+class ReviewSnapshot:
+    def __init__(self, path):
+        """Memory-map a snapshot written by write_snapshot"""
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path} is empty, not a review snapshot")
+        self._view = memoryview(self._map)
+        try:
+            self._read_footer()
+        except (KeyError, TypeError, ValueError) as e:
+            self.close()
+            raise ValueError(f"{path} is not a readable review snapshot: {e}") from e
+
+    def __len__(self):
+        return self.row_count
+
+    def review_id(self, row):
+        return self._text("ids", row)
+
+    def content(self, row):
+        return self._text("contents", row)
+
+    def review(self, row):
+        """Decode one row into a Review"""
+        return Review.from_row((
+            self._text("ids", row),
+            self.category_ids[row],
+            self.item_names[self.item_codes[row]],
+            self.ratings[row],
+            self._text("contents", row),
+            self._text("anonymous_ids", row),
+            self.timestamps[row],
+            self.helpful_votes[row],
+        ))
+
+    def close(self):
+        """Release the memory map (columns must no longer be in use)"""
+        for column in getattr(self, "_columns", {}).values():
+            column.release()
+        if getattr(self, "_view", None) is not None:
+            self._view.release()
+            self._view = None
+        self._map.close()
+        self._file.close()
+
+    def _read_footer(self):
+        """Check the trailer and footer and map every column, raising ValueError if corrupt"""
+        file_length = len(self._map)
+        if file_length < len(MAGIC) + TRAILER.size:
+            raise ValueError(f"file is truncated ({file_length} bytes)")
+        footer_offset, footer_length, magic = TRAILER.unpack_from(
+            self._map, file_length - TRAILER.size
+        )
+        if magic != MAGIC or self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError("bad magic number")
+        if not len(MAGIC) <= footer_offset <= file_length - TRAILER.size - footer_length:
+            raise ValueError("footer lies outside the file")
+
+        footer = json.loads(bytes(self._view[footer_offset:footer_offset + footer_length]))
+        if footer["byteorder"] != sys.byteorder:
+            raise ValueError(f"written on a {footer['byteorder']}-endian machine")
+
+        self.row_count = footer["rows"]
+        self.row_version = footer["row_version"]
+        self.categories = [Category.from_dict(data) for data in footer["categories"]]
+
+        self._columns = columns = {}
+        expected = {name: self.row_count for name in FIXED_COLUMNS}
+        expected.update((f"{name}.offsets", self.row_count + 1)
+                        for name in TEXT_COLUMNS if name != "item_names")
+        for name in [*FIXED_COLUMNS, *TEXT_COLUMNS, *(f"{name}.offsets" for name in TEXT_COLUMNS)]:
+            offset, length, typecode = footer["columns"][name]
+            if not len(MAGIC) <= offset <= footer_offset - length:
+                raise ValueError(f"column {name} lies outside the file")
+            if typecode == "B":
+                columns[name] = self._view[offset:offset + length]
+            else:
+                # Release the uncast slice at once, or a failed check leaves the map pinned
+                with self._view[offset:offset + length] as block:
+                    columns[name] = block.cast(typecode)
+            if len(columns[name]) != expected.get(name, len(columns[name])):
+                raise ValueError(f"column {name} has {len(columns[name])} values, "
+                                 f"expected {expected[name]}")
+
+        self.ratings = columns["ratings"]
+        self.category_ids = columns["category_ids"]
+        self.helpful_votes = columns["helpful_votes"]
+        self.timestamps = columns["timestamps"]
+        self.item_codes = columns["item_codes"]
+        self.item_names = [self._text("item_names", code)
+                           for code in range(len(columns["item_names.offsets"]) - 1)]
+
+    def _text(self, column, row):
+        offsets = self._columns[f"{column}.offsets"]
+        return str(self._columns[column][offsets[row]:offsets[row + 1]], "utf-8")
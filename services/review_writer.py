@@ -0,0 +1,136 @@
+import threading
+
+
+class ReviewWriter:
+    def __init__(self, storage, journal, flush_interval=2, batch_size=250, on_flush=None):
+        """Write-behind queue for submitted reviews
+
+        Reviews are appended to a ReviewJournal and acknowledged at once; a
+        background thread writes them to storage in batches every
+        flush_interval seconds (with no interval, whenever a batch fills).
+        Reviews left in the journal by an earlier run are written first.
+        """
+        self.storage = storage
+        self.journal = journal
+        self.on_flush = on_flush  # called with the list of reviews after each successful write
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        # While set, pending reviews may already be in the database: the last
+        # run stopped between saving a batch and marking it done, or a failed
+        # save committed but lost its acknowledgement
+        self._replaying = len(journal) > 0
+        self._flush_lock = threading.Lock()
+        self._worker_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._worker = None
+        if self._replaying:
+            self._ensure_worker()
+            if self._worker is not None:
+                self._wake.set()
+            else:
+                self.flush()
+
+    def add(self, review):
+        """Journal a review; it is written to the database in the background"""
+        self.journal.append([review])
+        self._ensure_worker()
+        if len(self.journal) >= self.batch_size:
+            if self._worker is not None:
+                self._wake.set()
+            else:
+                self.flush()
+        return True
+
+    def pending_reviews(self):
+        """Reviews accepted but not yet in the database, oldest first"""
+        return self.journal.pending()
+
+    def flush(self):
+        """Write every journaled review, one batch at a time; False if a write fails"""
+        with self._flush_lock:
+            while True:
+                batch = self.journal.pending(self.batch_size)
+                if not batch:
+                    self._replaying = False
+                    return True
+
+                if self._replaying:
+                    existing = self.storage.existing_review_ids([review.id for review in batch])
+                    if existing is None:
+                        return False
+                    if existing:
+                        self.journal.mark_done(existing)
+                        batch = [review for review in batch if review.id not in existing]
+                        if not batch:
+                            continue
+
+                if self.storage.save_reviews(batch):
+                    self._written(batch)
+                    continue
+
+                # The save may have committed before failing, so dedupe before
+                # any retry, and don't let one bad row hold up the queue
+                self._replaying = True
+                if not self.storage.is_available() or not self._write_one_by_one(batch):
+                    # Left in the journal for the next flush
+                    return False
+
+    def close(self):
+        """Stop the background writer, write what is still pending and close the journal"""
+        self._stop.set()
+        self._wake.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        success = self.flush()
+        self.journal.close()
+        return success
+
+    def _ensure_worker(self):
+        """Start the background write thread on first use"""
+        if self._worker is not None or not self.flush_interval or self._stop.is_set():
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="review-writer", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if not self._stop.is_set():
+                self.flush()
+
+    def _write_one_by_one(self, batch):
+        """Retry a failed batch row by row, dead-lettering rows the database rejects
+
+        Returns False if the database became unreachable part way through.
+        """
+        existing = self.storage.existing_review_ids([review.id for review in batch])
+        if existing is None:
+            return False
+        if existing:
+            self.journal.mark_done(existing)
+
+        for review in batch:
+            if review.id in existing:
+                continue
+            if self.storage.save_reviews([review]):
+                self._written([review])
+            elif not self.storage.is_available():
+                return False
+            else:
+                print(f"Review {review.id} was rejected by the database, "
+                      f"moved to {self.journal.dead_letter_path}")
+                self.journal.dead_letter(review, "rejected by the database")
+        return True
+
+    def _written(self, reviews):
+        self.journal.mark_done([review.id for review in reviews])
+        if self.on_flush:
+            self.on_flush(reviews)
@@ -0,0 +1,191 @@
+import bisect
+import heapq
+import math
+import re
+import threading
+import time
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class SearchIndex:
+    def __init__(self, k1=1.2, b=0.75, item_name_weight=2, min_prefix_length=3,
+                 max_prefix_terms=50):
+        """In-memory inverted index over review item names and content, BM25 ranked"""
+        self.k1 = k1
+        self.b = b
+        self.item_name_weight = item_name_weight  # an item name word counts this many times
+        self.min_prefix_length = min_prefix_length  # shorter query words only match whole terms
+        self.max_prefix_terms = max_prefix_terms  # a prefix matches at most its most common terms
+
+        self._postings = {}  # term -> {review_id: weighted term frequency}
+        self._terms = []  # sorted vocabulary, for prefix lookups
+        self._doc_terms = {}  # review_id -> {term: frequency}, used to remove a review
+        self._lengths = {}  # review_id -> weighted token count
+        self._docs = {}  # review_id -> Review
+        self._total_length = 0
+        self._lock = threading.RLock()
+        self.built_at = None
+
+    def __len__(self):
+        return len(self._docs)
+
+    def build(self, reviews):
+        """Replace the index contents with the given reviews"""
+        with self._lock:
+            self._postings = {}
+            self._terms = []
+            self._doc_terms = {}
+            self._lengths = {}
+            self._docs = {}
+            self._total_length = 0
+
+            for review in reviews:
+                self._add(review, sort_terms=False)
+            self._terms = sorted(self._postings)
+            self.built_at = time.monotonic()
+
+    def add(self, review):
+        """Index one review, replacing any earlier version of it"""
+        with self._lock:
+            self._add(review, sort_terms=True)
+
+    def remove(self, review_id):
+        """Drop a review from the index"""
+        with self._lock:
+            terms = self._doc_terms.pop(review_id, None)
+            if terms is None:
+                return
+            del self._docs[review_id]
+            self._total_length -= self._lengths.pop(review_id)
+
+            for term in terms:
+                postings = self._postings[term]
+                del postings[review_id]
+                if not postings:
+                    del self._postings[term]
+                    index = bisect.bisect_left(self._terms, term)
+                    del self._terms[index]
+
+    def add_votes(self, increments):
+        """Apply flushed helpful votes ({review_id: n}) to indexed reviews"""
+        with self._lock:
+            for review_id, count in increments.items():
+                review = self._docs.get(review_id)
+                if review is not None:
+                    review.helpful_votes = (review.helpful_votes or 0) + count
+
+    def search(self, query, category_id=None, limit=None):
+        """Reviews matching every query word (as a word prefix), best match first
+
+        The postings of the matched terms are copied under the lock and scored
+        outside it, so a long search does not hold up add() and add_votes().
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+
+        with self._lock:
+            # Each query word matches the indexed terms it is a prefix of
+            expansions = []
+            for word in words:
+                postings = [dict(self._postings[term]) for term in self._expand(word)]
+                if not postings:
+                    return []
+                expansions.append(postings)
+            doc_count = len(self._docs)
+            average_length = self._total_length / doc_count
+
+        # Scan each word's postings once, keeping each review's best term score,
+        # starting from the word with the fewest postings
+        expansions.sort(key=lambda postings: sum(map(len, postings)))
+        scores = None
+        for postings in expansions:
+            word_scores = self._word_scores(postings, doc_count, average_length,
+                                            only=scores)
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = {review_id: score + scores[review_id]
+                          for review_id, score in word_scores.items()}
+            if not scores:
+                return []
+
+        scored = []
+        for review_id, score in scores.items():
+            review = self._docs.get(review_id)
+            if review is None or (category_id and review.category_id != category_id):
+                continue
+            scored.append((score, review.timestamp, review))
+
+        # Best score first, newest first among equal scores
+        scored.sort(key=lambda entry: (entry[0], entry[1]), reverse=True)
+        results = [review for _, _, review in scored]
+        return results[:limit] if limit else results
+
+    def _add(self, review, sort_terms):
+        """Index one review (caller holds the lock)"""
+        if review.id in self._docs:
+            self.remove(review.id)
+
+        terms = {}
+        for term in tokenize(review.item_name):
+            terms[term] = terms.get(term, 0) + self.item_name_weight
+        for term in tokenize(review.content):
+            terms[term] = terms.get(term, 0) + 1
+
+        self._docs[review.id] = review
+        self._doc_terms[review.id] = terms
+        self._lengths[review.id] = sum(terms.values())
+        self._total_length += self._lengths[review.id]
+        for term, frequency in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                if sort_terms:
+                    bisect.insort(self._terms, term)
+            postings[review.id] = frequency
+
+    def _expand(self, prefix):
+        """Indexed terms starting with prefix (caller holds the lock)
+
+        Words shorter than min_prefix_length only match themselves, and a
+        prefix matching more than max_prefix_terms terms keeps the most common.
+        """
+        if len(prefix) < self.min_prefix_length:
+            return [prefix] if prefix in self._postings else []
+
+        index = bisect.bisect_left(self._terms, prefix)
+        terms = []
+        while index < len(self._terms) and self._terms[index].startswith(prefix):
+            terms.append(self._terms[index])
+            index += 1
+        if len(terms) > self.max_prefix_terms:
+            terms = heapq.nlargest(self.max_prefix_terms, terms,
+                                   key=lambda term: len(self._postings[term]))
+        return terms
+
+    def _word_scores(self, term_postings, doc_count, average_length, only=None):
+        """review_id -> best BM25 weight among one query word's terms
+
+        With only, reviews outside it are skipped (they missed an earlier word).
+        """
+        scores = {}
+        for postings in term_postings:
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for review_id, frequency in postings.items():
+                if only is not None and review_id not in only:
+                    continue
+                length = self._lengths.get(review_id)
+                if length is None:  # removed since the postings were copied
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * length / average_length)
+                score = idf * frequency * (self.k1 + 1) / (frequency + norm)
+                if score > scores.get(review_id, 0.0):
+                    scores[review_id] = score
+        return scores
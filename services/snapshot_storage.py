@@ -0,0 +1,305 @@
+import bisect
+import copy
+import heapq
+import os
+import threading
+import time
+
+from config.settings import Settings
+from services.azure_storage_service import normalize_item_name
+from services.item_statistics import aggregate_items
+from services.review_snapshot import ReviewSnapshot, write_snapshot
+
+
+class SnapshotStorage:
+    def __init__(self, storage, path, catch_up_seconds=None, rewrite_rows=None):
+        """Serve review reads from a local snapshot file, topped up from the database
+
+        Wraps an AzureStorageService. Reviews and categories are read from a
+        memory-mapped snapshot plus the rows inserted or updated since its
+        row_version high-water mark, which are fetched at most every
+        catch_up_seconds. While the database is unreachable, reads keep working
+        from the snapshot and writes are refused.
+        Anything not overridden here is passed straight to the wrapped storage.
+        """
+        self.storage = storage
+        self.path = path
+        self.catch_up_seconds = (Settings.SNAPSHOT_CATCH_UP_SECONDS
+                                 if catch_up_seconds is None else catch_up_seconds)
+        self.rewrite_rows = rewrite_rows or Settings.SNAPSHOT_REWRITE_ROWS
+        self.snapshot = None
+        self.online = True
+
+        self._delta = {}  # review_id -> Review added or changed since the snapshot
+        self._delta_order = None  # newest first, rebuilt when _delta changes
+        self._row_version = 0
+        self._caught_up_at = None
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name):
+        return getattr(self.storage, name)
+
+    def open(self):
+        """Open the snapshot, building it from the database if it is missing or unreadable"""
+        if self.snapshot is not None:
+            return True
+
+        if os.path.exists(self.path):
+            try:
+                self.snapshot = ReviewSnapshot(self.path)
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable snapshot {self.path}: {e}")
+
+        if self.snapshot is None:
+            if not self.refresh_snapshot():
+                return False
+
+        self._row_version = self.snapshot.row_version
+        return True
+
+    def refresh_snapshot(self):
+        """Write a fresh snapshot straight from the database"""
+        categories = self.storage.load_categories()
+        changes = self.storage.load_changes_since() if categories else None
+        if changes is None:
+            self.online = False
+            print("Cannot build the review snapshot: database unavailable")
+            return False
+
+        reviews, row_version = changes
+        with self._lock:
+            self._replace_snapshot(sorted(reviews, key=lambda review: review.id, reverse=True),
+                                   categories, row_version)
+            self._delta, self._delta_order = {}, None
+            self._row_version = row_version
+            self._caught_up_at = time.monotonic()
+            self.online = True
+        return True
+
+    def catch_up(self, force=False):
+        """Fetch reviews changed after the high-water mark; False if the database is unreachable"""
+        if not self.open():
+            return False
+
+        now = time.monotonic()
+        if (not force and self._caught_up_at is not None
+                and now - self._caught_up_at < self.catch_up_seconds):
+            return self.online
+        self._caught_up_at = now
+
+        changes = self.storage.load_changes_since(self._row_version)
+        if changes is None:
+            if self.online:
+                print("Database unavailable - showing reviews from the local snapshot (read-only)")
+            self.online = False
+            return False
+
+        reviews, row_version = changes
+        with self._lock:
+            for review in reviews:
+                self._delta[review.id] = review
+            if reviews:
+                self._delta_order = None
+            self._row_version = row_version
+        self.online = True
+        return True
+
+    def close(self):
+        """Fold the catch-up rows into the snapshot file if there are many, then close"""
+        if self.snapshot is not None:
+            if len(self._delta) >= self.rewrite_rows:
+                reviews = list(self.iter_reviews())
+                self._replace_snapshot(reviews, self.snapshot.categories, self._row_version)
+            self.snapshot.close()
+            self.snapshot = None
+        self.storage.close()
+
+    def save_review(self, review):
+        """Save a review to the database and show it in snapshot reads right away"""
+        if not self._writable():
+            return False
+        success = self.storage.save_review(review)
+        if success:
+            self._add_delta([review])
+        return success
+
+    def save_reviews(self, reviews, batch_size=None):
+        """Save reviews to the database and show them in snapshot reads right away"""
+        if not self._writable():
+            return False
+        success = self.storage.save_reviews(reviews, batch_size)
+        if success:
+            self._add_delta(reviews)
+        return success
+
+    def update_helpful_votes(self, review_id):
+        """Increment helpful votes for a review"""
+        return self.apply_helpful_votes({review_id: 1})
+
+    def apply_helpful_votes(self, increments):
+        """Write buffered votes to the database; the next read fetches the updated rows"""
+        if not self._writable():
+            return False
+        success = self.storage.apply_helpful_votes(increments)
+        if success:
+            self._caught_up_at = None
+        return success
+
+    def load_categories(self):
+        """Categories as of the snapshot"""
+        if not self.open():
+            return self.storage.load_categories()
+        return list(self.snapshot.categories)
+
+    def load_all_reviews(self):
+        """All reviews, newest first"""
+        return list(self.iter_reviews())
+
+    def load_reviews_by_category(self, category_id):
+        """Reviews for one category, newest first"""
+        return list(self.iter_reviews(category_id=category_id))
+
+    def load_reviews_by_item(self, item_name):
+        """Reviews for one item (case-insensitive), newest first"""
+        return list(self.iter_reviews(item_name=item_name))
+
+    def search_reviews(self, search_term, category_id=None):
+        """Reviews whose item name or content contains the search term"""
+        return list(self.iter_reviews(category_id=category_id, search_term=search_term))
+
+    def iter_reviews(self, category_id=None, item_name=None, search_term=None,
+                     batch_size=None, raise_errors=False):
+        """Stream matching reviews newest first from the snapshot and catch-up rows"""
+        self.catch_up()
+        if self.snapshot is None:
+            return self.storage.iter_reviews(category_id, item_name, search_term, batch_size,
+                                             raise_errors)
+        return self._scan(category_id, item_name, search_term)
+
+    def load_reviews_page(self, after_id=None, limit=20,
+                          category_id=None, item_name=None, search_term=None):
+        """The next page of reviews older than the review after_id"""
+        self.catch_up()
+        if self.snapshot is None:
+            return self.storage.load_reviews_page(after_id, limit,
+                                                  category_id, item_name, search_term)
+
+        page = []
+        for review in self._scan(category_id, item_name, search_term, after_id):
+            page.append(review)
+            if len(page) >= limit:
+                break
+        return page
+
+    def load_item_stats(self, category_id=None, item_name=None, limit=None):
+        """Per-item running totals from the database, or from the snapshot when offline"""
+        if self.catch_up():
+            return self.storage.load_item_stats(category_id, item_name, limit)
+        return self._snapshot_item_stats(category_id, item_name, limit)
+
+    def load_item_statistics(self, category_id=None, item_name=None, limit=None):
+        """Per-item running totals from the database, or from the snapshot when offline"""
+        if self.catch_up():
+            return self.storage.load_item_statistics(category_id, item_name, limit)
+        return self._snapshot_item_stats(category_id, item_name, limit)
+
+    def _snapshot_item_stats(self, category_id, item_name, limit):
+        """Aggregate item totals over snapshot reads, most reviewed first"""
+        if self.snapshot is None:
+            return []
+        items = aggregate_items(self._scan(category_id, item_name))
+        key = lambda stats: (stats["total_reviews"], stats["total_helpful_votes"])
+        if limit:
+            return heapq.nlargest(limit, items.values(), key=key)
+        return sorted(items.values(), key=key, reverse=True)
+
+    def _scan(self, category_id=None, item_name=None, search_term=None, after=None):
+        """Yield matching reviews newest first (by ID), older than the review ID after
+
+        Changed rows replace their snapshot versions; both streams are already
+        newest first, so they are merged rather than sorted.
+        """
+        with self._lock:
+            snapshot = self.snapshot
+            delta = self._ordered_delta()
+            changed = set(self._delta)
+        term = search_term.lower() if search_term else None
+        item_key = normalize_item_name(item_name) if item_name else None
+
+        def delta_reviews():
+            for review in delta:
+                if after is not None and review.id >= after:
+                    continue
+                if category_id and review.category_id != category_id:
+                    continue
+                if item_key and normalize_item_name(review.item_name) != item_key:
+                    continue
+                if term and term not in review.item_name.lower() and term not in review.content.lower():
+                    continue
+                yield copy.copy(review)
+
+        def snapshot_reviews():
+            # Filter on the fixed-width columns first; only decode rows that match
+            codes = None
+            if item_key:
+                codes = {code for code, name in enumerate(snapshot.item_names)
+                         if normalize_item_name(name) == item_key}
+                if not codes:
+                    return
+
+            start = 0 if after is None else self._snapshot_position(snapshot, after)
+            for row in range(start, len(snapshot)):
+                if category_id and snapshot.category_ids[row] != category_id:
+                    continue
+                if codes is not None and snapshot.item_codes[row] not in codes:
+                    continue
+                if term and (term not in snapshot.item_names[snapshot.item_codes[row]].lower()
+                             and term not in snapshot.content(row).lower()):
+                    continue
+                if changed and snapshot.review_id(row) in changed:
+                    continue
+                yield snapshot.review(row)
+
+        if not delta:
+            yield from snapshot_reviews()
+        else:
+            yield from heapq.merge(delta_reviews(), snapshot_reviews(),
+                                   key=lambda review: review.id, reverse=True)
+
+    @staticmethod
+    def _snapshot_position(snapshot, after):
+        """First snapshot row older than the review ID after (rows are newest first)"""
+        return bisect.bisect_left(range(len(snapshot)), True,
+                                  key=lambda row: snapshot.review_id(row) < after)
+
+    def _ordered_delta(self):
+        """Catch-up reviews newest first (caller holds the lock)"""
+        if self._delta_order is None:
+            self._delta_order = sorted(self._delta.values(),
+                                       key=lambda review: review.id, reverse=True)
+        return self._delta_order
+
+    def _add_delta(self, reviews):
+        with self._lock:
+            if self.snapshot is None:
+                return
+            for review in reviews:
+                self._delta[review.id] = copy.copy(review)
+            self._delta_order = None
+
+    def _writable(self):
+        """Refuse writes while the database is unreachable"""
+        if not self.online and not self.storage.ping():
+            print("The database is offline - reviews are read-only until it is back")
+            return False
+        self.online = True
+        return True
+
+    def _replace_snapshot(self, reviews, categories, row_version):
+        """Write reviews (newest first) to the snapshot file and reopen it"""
+        reviews = list(reviews)
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+        write_snapshot(self.path, reviews, categories, row_version)
+        self.snapshot = ReviewSnapshot(self.path)
@@ -0,0 +1,227 @@
+"""Local stand-in for pymssql backed by sqlite3.
+
+Accepts the same connect() keyword arguments and the same %s parameter style
+as pymssql, so AzureStorageService can run against it without a network or an
+Azure SQL database (for benchmarks, scripted sessions and local development).
+"""
+import re
+import sqlite3
+import time
+from datetime import datetime
+
+paramstyle = "pyformat"
+Error = sqlite3.Error
+OperationalError = sqlite3.OperationalError
+InterfaceError = sqlite3.InterfaceError
+
+# Store DATETIME2 values as ISO 8601 text ("T" separator), which sorts correctly
+sqlite3.register_adapter(datetime, datetime.isoformat)
+
+# Seconds added to every round-trip to imitate a remote server. A new
+# connection costs three round-trips (TCP, TLS and login).
+simulated_latency = 0.0
+
+
+def _round_trip(count=1):
+    if simulated_latency:
+        time.sleep(simulated_latency * count)
+
+
+def connect(server=None, user=None, password=None, database=None, port=None,
+            timeout=None, login_timeout=None, **kwargs):
+    """Open a connection; database is a file path or a shared in-memory name"""
+    database = database or "reviews"
+    if database.endswith(".db") or database.endswith(".sqlite"):
+        target, uri = database, False
+    else:
+        target, uri = f"file:{database}?mode=memory&cache=shared", True
+    _round_trip(3)
+    raw = sqlite3.connect(target, uri=uri, timeout=timeout or 5,
+                          check_same_thread=False)
+    # sqlite serializes writers, so no row version is ever held by an open transaction
+    raw.create_function("MIN_ACTIVE_ROWVERSION", 0, lambda: 2 ** 63 - 1, deterministic=True)
+    return Connection(raw)
+
+
+_FETCH_NEXT = re.compile(r"OFFSET\s+0\s+ROWS\s+FETCH\s+NEXT\s+%s\s+ROWS\s+ONLY",
+                         re.IGNORECASE)
+# Table hints such as WITH (UPDLOCK, SERIALIZABLE); sqlite locks the whole database instead
+_TABLE_HINTS = re.compile(r"\s+WITH\s*\(\s*(?:UPDLOCK|HOLDLOCK|SERIALIZABLE|ROWLOCK)[\w\s,]*\)",
+                          re.IGNORECASE)
+
+
+def _translate(sql):
+    """Translate pymssql-style SQL into sqlite3 syntax"""
+    sql = _FETCH_NEXT.sub("LIMIT %s", sql)
+    sql = _TABLE_HINTS.sub("", sql)
+    return sql.replace("%s", "?")
+
+
+class Connection:
+    def __init__(self, raw):
+        self._raw = raw
+
+    def cursor(self):
+        return Cursor(self._raw.cursor())
+
+    def commit(self):
+        _round_trip()
+        self._raw.commit()
+
+    def rollback(self):
+        _round_trip()
+        self._raw.rollback()
+
+    def close(self):
+        self._raw.close()
+
+
+class Cursor:
+    def __init__(self, raw):
+        self._raw = raw
+
+    @property
+    def rowcount(self):
+        return self._raw.rowcount
+
+    @property
+    def description(self):
+        return self._raw.description
+
+    def execute(self, sql, params=()):
+        if params is None:
+            params = ()
+        elif not isinstance(params, (tuple, list, dict)):
+            params = (params,)
+        _round_trip()
+        self._raw.execute(_translate(sql), params)
+
+    def executemany(self, sql, seq_of_params):
+        # Like pymssql, one round-trip per parameter set
+        seq_of_params = list(seq_of_params)
+        _round_trip(len(seq_of_params))
+        self._raw.executemany(_translate(sql), seq_of_params)
+
+    def fetchone(self):
+        return self._raw.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._raw.fetchmany(size)
+
+    def fetchall(self):
+        return self._raw.fetchall()
+
+    def close(self):
+        self._raw.close()
+
+    def __iter__(self):
+        return iter(self._raw)
+
+
+def create_schema(connection):
+    """Create the reviews and categories tables with the default categories"""
+    from config.settings import Settings
+
+    cursor = connection.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS categories (
+            id INT PRIMARY KEY,
+            name NVARCHAR(100) NOT NULL,
+            description NVARCHAR(500)
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS reviews (
+            id NVARCHAR(50) PRIMARY KEY,
+            category_id INT NOT NULL,
+            item_name NVARCHAR(200) NOT NULL,
+            rating INT NOT NULL,
+            content NVARCHAR NOT NULL,
+            anonymous_id NVARCHAR(50) NOT NULL,
+            timestamp DATETIME2 NOT NULL,
+            helpful_votes INT DEFAULT 0,
+            row_version BIGINT,
+            item_name_normalized NVARCHAR(200)
+                GENERATED ALWAYS AS (LOWER(TRIM(item_name))) STORED
+        )
+    """)
+    # Listings run newest first in (time-ordered) primary key order
+    cursor.execute("DROP INDEX IF EXISTS IX_reviews_category_id")
+    cursor.execute("DROP INDEX IF EXISTS IX_reviews_item_name_normalized")
+    cursor.execute("CREATE INDEX IF NOT EXISTS IX_reviews_category_newest "
+                   "ON reviews (category_id, id DESC)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS IX_reviews_item_newest "
+                   "ON reviews (item_name_normalized, id DESC)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS IX_reviews_timestamp "
+                   "ON reviews (timestamp DESC)")
+
+    # Imitate SQL Server's ROWVERSION: a database-wide counter stamped on
+    # every inserted or updated row
+    cursor.execute("SELECT COUNT(*) FROM pragma_table_info('reviews') WHERE name = 'row_version'")
+    if cursor.fetchone()[0] == 0:
+        cursor.execute("ALTER TABLE reviews ADD COLUMN row_version BIGINT")
+        cursor.execute("UPDATE reviews SET row_version = rowid")
+    cursor.execute("CREATE INDEX IF NOT EXISTS IX_reviews_row_version "
+                   "ON reviews (row_version)")
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS TR_reviews_row_version_insert
+        AFTER INSERT ON reviews
+        BEGIN
+            UPDATE reviews SET row_version = (SELECT COALESCE(MAX(row_version), 0) + 1 FROM reviews)
+            WHERE id = NEW.id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS TR_reviews_row_version_update
+        AFTER UPDATE OF category_id, item_name, rating, content, helpful_votes ON reviews
+        BEGIN
+            UPDATE reviews SET row_version = (SELECT COALESCE(MAX(row_version), 0) + 1 FROM reviews)
+            WHERE id = NEW.id;
+        END
+    """)
+
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS item_stats (
+            item_name_normalized NVARCHAR(200) NOT NULL,
+            category_id INT NOT NULL,
+            item_name NVARCHAR(200) NOT NULL,
+            total_reviews INT NOT NULL DEFAULT 0,
+            rating_sum INT NOT NULL DEFAULT 0,
+            rating_1 INT NOT NULL DEFAULT 0,
+            rating_2 INT NOT NULL DEFAULT 0,
+            rating_3 INT NOT NULL DEFAULT 0,
+            rating_4 INT NOT NULL DEFAULT 0,
+            rating_5 INT NOT NULL DEFAULT 0,
+            total_helpful_votes INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (item_name_normalized, category_id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS IX_item_stats_popular "
+                   "ON item_stats (category_id, total_reviews DESC)")
+
+    cursor.execute("SELECT COUNT(*) FROM categories")
+    if cursor.fetchone()[0] == 0:
+        for category in Settings.DEFAULT_CATEGORIES:
+            cursor.execute(
+                "INSERT INTO categories (id, name, description) VALUES (%s, %s, %s)",
+                (category["id"], category["name"], category["description"])
+            )
+    connection.commit()
+
+
+def local_storage(database, wal=False):
+    """AzureStorageService on a stand-in database, creating the schema if missing
+
+    database is a file path or a shared in-memory name (keep a connection to
+    an in-memory database open, it disappears with its last connection).
+    wal switches a database file to WAL mode, so readers don't block the writer.
+    """
+    from services import sqlite_driver
+    from services.azure_storage_service import AzureStorageService
+
+    connection = connect(database=database)
+    create_schema(connection)
+    if wal:
+        connection.cursor().execute("PRAGMA journal_mode=WAL")
+    connection.close()
+    return AzureStorageService(driver=sqlite_driver, database=database)
@@ -1,46 +1,213 @@
+import uuid
+from functools import lru_cache
 from config.settings import Settings
+from models.review import epoch_micros
+from services.moderation import ModerationMatcher
+
+@lru_cache(maxsize=4)
+def build_moderation_matcher(terms, whole_words, leetspeak):
+    """Compile the moderation automaton once per distinct term list and options"""
+    return ModerationMatcher(terms, whole_words=whole_words, leetspeak=leetspeak)
+
+def load_moderation_terms(settings):
+    """INAPPROPRIATE_WORDS plus any terms listed in MODERATION_TERMS_FILE"""
+    terms = list(settings.INAPPROPRIATE_WORDS)
+    if settings.MODERATION_TERMS_FILE:
+        with open(settings.MODERATION_TERMS_FILE, encoding="utf-8") as terms_file:
+            terms.extend(line.strip() for line in terms_file if line.strip())
+    return tuple(terms)
+
+def review_fields(row):
+    """(category_id, item_name, rating, content) from a dict or a 4-tuple row"""
+    if isinstance(row, dict):
+        return row.get("category_id"), row.get("item_name"), row.get("rating"), row.get("content")
+    category_id, item_name, rating, content = row
+    return category_id, item_name, rating, content
+
+# Fields an exported review carries besides the four it is submitted with
+IMPORT_METADATA_FIELDS = ("id", "anonymous_id", "timestamp", "helpful_votes")
+MAX_ANONYMOUS_ID_LENGTH = 50  # NVARCHAR(50) column
+
+def review_metadata(row):
+    """The id, anonymous_id, timestamp and helpful_votes a dict row supplies (None and "" are absent)"""
+    if not isinstance(row, dict):
+        return {}
+    return {field: row[field] for field in IMPORT_METADATA_FIELDS
+            if row.get(field) not in (None, "")}
+
+def _chunked(rows, size):
+    """Split any iterable into lists of at most size rows"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+_worker_validator = None
+
+def _init_worker():
+    """Process pool initializer: one ValidationService per worker process"""
+    global _worker_validator
+    _worker_validator = ValidationService()
+
+def _validate_chunk_in_worker(rows):
+    return _worker_validator._validate_chunk(rows)
 
 class ValidationService:
     def __init__(self):
         """Initialize validation service"""
         self.settings = Settings()
+        self.moderation = build_moderation_matcher(
+            load_moderation_terms(self.settings),
+            self.settings.MODERATION_WHOLE_WORDS,
+            self.settings.MODERATION_LEETSPEAK
+        )
     
     def validate_review(self, category_id, item_name, rating, content):
         """Validate all review input data"""
+        errors = self.review_errors(category_id, item_name, rating, content)
+        if errors:
+            return False, errors[0]["message"]
+        return True, "Valid"
+    
+    def review_errors(self, category_id, item_name, rating, content):
+        """Validate review input and return every problem found
+        
+        Each error is a dict with a field ("category", "item_name", "rating",
+        "length" or "moderation") and a message; moderation errors also list
+        the matched terms.
+        """
+        errors = []
         
         # Check category ID
         if not isinstance(category_id, int) or not (1 <= category_id <= 4):
-            return False, "Category must be 1, 2, 3, or 4"
+            errors.append({"field": "category", "message": "Category must be 1, 2, 3, or 4"})
         
         # Check item name
-        if not item_name or len(item_name.strip()) < 2:
-            return False, "Item name must be at least 2 characters"
+        if not isinstance(item_name, str) or len(item_name.strip()) < 2:
+            errors.append({"field": "item_name", "message": "Item name must be at least 2 characters"})
         
         # Check rating
         if not isinstance(rating, int) or not (1 <= rating <= 5):
-            return False, "Rating must be between 1 and 5"
+            errors.append({"field": "rating", "message": "Rating must be between 1 and 5"})
         
         # Check content length
-        content = content.strip()
+        content = content.strip() if isinstance(content, str) else ""
         if len(content) < self.settings.MIN_REVIEW_LENGTH:
-            return False, f"Review must be at least {self.settings.MIN_REVIEW_LENGTH} characters"
-        
-        if len(content) > self.settings.MAX_REVIEW_LENGTH:
-            return False, f"Review cannot exceed {self.settings.MAX_REVIEW_LENGTH} characters"
+            errors.append({
+                "field": "length",
+                "message": f"Review must be at least {self.settings.MIN_REVIEW_LENGTH} characters"
+            })
+        elif len(content) > self.settings.MAX_REVIEW_LENGTH:
+            errors.append({
+                "field": "length",
+                "message": f"Review cannot exceed {self.settings.MAX_REVIEW_LENGTH} characters"
+            })
         
         # Check for inappropriate content
-        if self._contains_inappropriate_content(content):
-            return False, "Review contains inappropriate content"
+        terms = self.find_inappropriate_terms(content)
+        if terms:
+            errors.append({
+                "field": "moderation",
+                "message": "Review contains inappropriate content",
+                "terms": terms
+            })
         
-        return True, "Valid"
+        return errors
+    
+    def metadata_errors(self, metadata):
+        """Validate the optional fields of an imported review (see review_metadata)"""
+        errors = []
+        
+        if "id" in metadata:
+            try:
+                uuid.UUID(str(metadata["id"]))
+            except ValueError:
+                errors.append({"field": "id", "message": "Review ID must be a UUID"})
+        
+        anonymous_id = metadata.get("anonymous_id")
+        if anonymous_id is not None and (not isinstance(anonymous_id, str)
+                                         or len(anonymous_id) > MAX_ANONYMOUS_ID_LENGTH):
+            errors.append({
+                "field": "anonymous_id",
+                "message": f"Anonymous ID must be text of at most {MAX_ANONYMOUS_ID_LENGTH} characters"
+            })
+        
+        if "timestamp" in metadata:
+            try:
+                epoch_micros(metadata["timestamp"])
+            except (TypeError, ValueError, OverflowError):
+                errors.append({"field": "timestamp", "message": "Timestamp must be an ISO date and time"})
+        
+        votes = metadata.get("helpful_votes")
+        if votes is not None and (not isinstance(votes, int) or isinstance(votes, bool) or votes < 0):
+            errors.append({"field": "helpful_votes", "message": "Helpful votes must be a whole number of at least 0"})
+        
+        return errors
+    
+    def validate_many(self, rows, chunk_size=None, workers=None):
+        """Validate many review rows and return one error list per row (empty if valid)
+        
+        rows yields dicts with category_id, item_name, rating and content keys
+        (or tuples in that order); dicts may also carry the fields in
+        IMPORT_METADATA_FIELDS, which are validated too. With workers > 1, chunks are validated in a
+        process pool; each worker compiles the moderation terms once.
+        """
+        results = []
+        for _, chunk_results in self.iter_validate(rows, chunk_size, workers):
+            results.extend(chunk_results)
+        return results
+    
+    def iter_validate(self, rows, chunk_size=None, workers=None):
+        """Validate rows chunk by chunk, yielding (chunk, error lists) in input order
+        
+        At most two chunks per worker are in flight, so memory stays bounded
+        however many rows there are.
+        """
+        chunk_size = chunk_size or self.settings.VALIDATION_CHUNK_SIZE
+        workers = workers or self.settings.VALIDATION_WORKERS
+        chunks = _chunked(rows, chunk_size)
+        
+        if workers <= 1:
+            for chunk in chunks:
+                yield chunk, self._validate_chunk(chunk)
+            return
+        
+        from collections import deque
+        from concurrent.futures import ProcessPoolExecutor
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            in_flight = deque()
+            for chunk in chunks:
+                in_flight.append((chunk, pool.submit(_validate_chunk_in_worker, chunk)))
+                if len(in_flight) >= workers * 2:
+                    chunk, future = in_flight.popleft()
+                    yield chunk, future.result()
+            while in_flight:
+                chunk, future = in_flight.popleft()
+                yield chunk, future.result()
+    
+    def _validate_chunk(self, rows):
+        """Error lists for one chunk of rows"""
+        results = []
+        for row in rows:
+            try:
+                results.append(self.review_errors(*review_fields(row))
+                               + self.metadata_errors(review_metadata(row)))
+            except (TypeError, ValueError) as e:
+                results.append([{"field": "row", "message": f"Malformed row: {e}"}])
+        return results
     
     def _contains_inappropriate_content(self, content):
         """Check for inappropriate words"""
-        content_lower = content.lower()
-        for word in self.settings.INAPPROPRIATE_WORDS:
-            if word in content_lower:
-                return True
-        return False
+        return self.moderation.matches(content)
+    
+    def find_inappropriate_terms(self, content):
+        """List the moderation terms found in the content"""
+        return sorted(self.moderation.find(content))
     
     def validate_search_term(self, search_term):
         """Validate search input"""
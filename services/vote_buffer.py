@@ -0,0 +1,98 @@
+import threading
+from collections import defaultdict
+
+
+class VoteBuffer:
+    def __init__(self, storage, flush_interval=5, flush_threshold=100, on_flush=None):
+        """Coalesce helpful votes in memory and write them to storage in batches"""
+        self.storage = storage
+        self.on_flush = on_flush  # called with {review_id: count} after a successful write
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        
+        self._pending = defaultdict(int)  # review_id -> votes not yet written
+        self._pending_total = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+    
+    def add(self, review_id, count=1):
+        """Record a vote; flushes right away once flush_threshold votes are pending
+        
+        Returns True once the vote is buffered. A failed flush keeps it pending
+        for the next one, so the caller must not retry it.
+        """
+        with self._lock:
+            self._pending[review_id] += count
+            self._pending_total += count
+            should_flush = self._pending_total >= self.flush_threshold
+        
+        self._ensure_worker()
+        if should_flush:
+            self.flush()
+        return True
+    
+    def pending(self, review_id):
+        """Votes recorded for a review but not yet written to storage"""
+        with self._lock:
+            return self._pending.get(review_id, 0)
+    
+    def pending_votes(self):
+        """Snapshot of all unwritten votes"""
+        with self._lock:
+            return dict(self._pending)
+    
+    def flush(self):
+        """Write all pending votes in one batch, keeping them if the write fails"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return True
+                batch = self._pending
+                self._pending = defaultdict(int)
+                self._pending_total = 0
+            
+            if self.storage.apply_helpful_votes(batch):
+                if self.on_flush:
+                    self.on_flush(batch)
+                return True
+            
+            # Put the votes back so the next flush retries them
+            with self._lock:
+                for review_id, count in batch.items():
+                    self._pending[review_id] += count
+                    self._pending_total += count
+            return False
+    
+    def close(self):
+        """Stop the background flusher and write anything still pending
+        
+        Votes that still cannot be written are reported, as they are lost.
+        """
+        self._stop.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+        if self.flush():
+            return True
+        
+        with self._lock:
+            lost, reviews = self._pending_total, len(self._pending)
+        print(f"Lost {lost} helpful votes for {reviews} reviews that could not be written at shutdown")
+        return False
+    
+    def _ensure_worker(self):
+        """Start the periodic flush thread on first use"""
+        if self._worker is not None or not self.flush_interval or self._stop.is_set():
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="vote-buffer-flush", daemon=True
+                )
+                self._worker.start()
+    
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
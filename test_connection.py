@@ -1,5 +1,6 @@
 import pymssql
 import os
+import sys
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -85,6 +86,70 @@ def create_tables():
             )
         """)
         
+        # Normalized item name so per-item lookups can use an index
+        cursor.execute("""
+            IF COL_LENGTH('reviews', 'item_name_normalized') IS NULL
+            ALTER TABLE reviews
+                ADD item_name_normalized AS LOWER(LTRIM(RTRIM(item_name))) PERSISTED
+        """)
+        
+        # Bumped by SQL Server on every insert and update, for change sync
+        cursor.execute("""
+            IF COL_LENGTH('reviews', 'row_version') IS NULL
+            ALTER TABLE reviews ADD row_version ROWVERSION
+        """)
+        
+        # Review IDs are time-ordered, so per-category and per-item listings
+        # read newest first in ID order. These replace the older indexes that
+        # ordered by timestamp.
+        for name in ("IX_reviews_category_id", "IX_reviews_item_name_normalized"):
+            cursor.execute(f"""
+                IF EXISTS (SELECT * FROM sys.indexes
+                           WHERE name = '{name}' AND object_id = OBJECT_ID('reviews'))
+                DROP INDEX {name} ON reviews
+            """)
+        
+        # Indexes for category, item, time-window and changed-since lookups
+        indexes = [
+            ("IX_reviews_category_newest", "category_id, id DESC"),
+            ("IX_reviews_item_newest", "item_name_normalized, id DESC"),
+            ("IX_reviews_timestamp", "timestamp DESC"),
+            ("IX_reviews_row_version", "row_version")
+        ]
+        for name, columns in indexes:
+            cursor.execute(f"""
+                IF NOT EXISTS (SELECT * FROM sys.indexes
+                               WHERE name = '{name}' AND object_id = OBJECT_ID('reviews'))
+                CREATE INDEX {name} ON reviews ({columns})
+            """)
+        
+        # Per-item statistics maintained by AzureStorageService on every write.
+        # category_id 0 holds each item's totals across all categories.
+        cursor.execute("SELECT OBJECT_ID('item_stats')")
+        backfill_stats = cursor.fetchone()[0] is None
+        cursor.execute("""
+            IF NOT EXISTS (SELECT * FROM sysobjects WHERE name='item_stats' AND xtype='U')
+            CREATE TABLE item_stats (
+                item_name_normalized NVARCHAR(200) NOT NULL,
+                category_id INT NOT NULL,
+                item_name NVARCHAR(200) NOT NULL,
+                total_reviews INT NOT NULL DEFAULT 0,
+                rating_sum INT NOT NULL DEFAULT 0,
+                rating_1 INT NOT NULL DEFAULT 0,
+                rating_2 INT NOT NULL DEFAULT 0,
+                rating_3 INT NOT NULL DEFAULT 0,
+                rating_4 INT NOT NULL DEFAULT 0,
+                rating_5 INT NOT NULL DEFAULT 0,
+                total_helpful_votes INT NOT NULL DEFAULT 0,
+                PRIMARY KEY (item_name_normalized, category_id)
+            )
+        """)
+        cursor.execute("""
+            IF NOT EXISTS (SELECT * FROM sys.indexes
+                           WHERE name = 'IX_item_stats_popular' AND object_id = OBJECT_ID('item_stats'))
+            CREATE INDEX IX_item_stats_popular ON item_stats (category_id, total_reviews DESC)
+        """)
+        
         connection.commit()
         
         # Insert default categories
@@ -110,18 +175,56 @@ def create_tables():
         
         print("Tables created successfully!")
         connection.close()
+        
+        if backfill_stats:
+            print("Building item statistics from existing reviews...")
+            rebuild_item_stats()
         return True
         
     except Exception as e:
         print(f"Failed to create tables: {e}")
         return False
 
+def rebuild_item_stats():
+    """Recompute the item_stats table from the reviews table"""
+    from services.azure_storage_service import AzureStorageService
+    
+    storage = AzureStorageService()
+    success = storage.rebuild_item_stats()
+    storage.close()
+    
+    print("Item statistics rebuilt!" if success else "Failed to rebuild item statistics")
+    return success
+
+def migrate_review_ids():
+    """Give reviews created before time-ordered IDs a new ID from their timestamp"""
+    from services.azure_storage_service import AzureStorageService
+    
+    storage = AzureStorageService()
+    migrated = storage.migrate_review_ids()
+    storage.close()
+    
+    if migrated is None:
+        print("Failed to migrate review IDs")
+        return False
+    print(f"Migrated {migrated} review IDs")
+    if migrated:
+        print("Delete any local review snapshot file (SNAPSHOT_PATH) so it is rebuilt")
+    return True
+
 if __name__ == "__main__":
     print("Testing Azure SQL Database Setup...")
     print("=" * 50)
     
     if test_azure_connection():
-        print("\nCreating database tables...")
-        create_tables()
+        if "--rebuild-stats" in sys.argv:
+            print("\nRebuilding item statistics...")
+            rebuild_item_stats()
+        elif "--migrate-ids" in sys.argv:
+            print("\nMigrating review IDs to time-ordered IDs...")
+            migrate_review_ids()
+        else:
+            print("\nCreating database tables...")
+            create_tables()
     else:
         print("\nPlease check your .env file and Azure database settings.")
\ No newline at end of file
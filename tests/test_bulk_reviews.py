@@ -0,0 +1,85 @@
+import json
+
+import bulk_reviews
+from models.review import is_time_ordered_id
+from services.validation_service import ValidationService, review_metadata
+
+REVIEWS = [
+    {"id": "0190a1b2-c3d4-7e5f-8a9b-0c1d2e3f4a5b", "category_id": 1, "item_name": "Calculus Notes",
+     "rating": 5, "content": "Clear worked examples for every chapter.",
+     "anonymous_id": "user_1a2b3c4d", "timestamp": "2024-06-01T09:30:00.123456", "helpful_votes": 7},
+    {"id": "0190a1b2-c3d4-7e5f-8a9b-0c1d2e3f4a5c", "category_id": 3, "item_name": "Study Room B",
+     "rating": 2, "content": "Noisy in the afternoons, quiet early on.",
+     "anonymous_id": "user_5e6f7a8b", "timestamp": "2024-06-02T18:00:00", "helpful_votes": 0},
+]
+
+
+def write_jsonl(path, rows):
+    with open(path, "w", encoding="utf-8") as output_file:
+        for row in rows:
+            output_file.write(json.dumps(row) + "\n")
+
+
+def read_jsonl(path):
+    with open(path, encoding="utf-8") as input_file:
+        return sorted((json.loads(line) for line in input_file), key=lambda row: row["id"])
+
+
+def test_export_import_roundtrip_keeps_every_field(tmp_path):
+    source = tmp_path / "source.jsonl"
+    write_jsonl(source, REVIEWS)
+    first_db, second_db = str(tmp_path / "first.db"), str(tmp_path / "second.db")
+
+    assert bulk_reviews.main(["--local", first_db, "import", str(source)]) == 0
+    exported_csv = str(tmp_path / "export.csv")
+    assert bulk_reviews.main(["--local", first_db, "export", exported_csv]) == 0
+
+    assert bulk_reviews.main(["--local", second_db, "import", exported_csv]) == 0
+    exported_jsonl = str(tmp_path / "export.jsonl")
+    assert bulk_reviews.main(["--local", second_db, "export", exported_jsonl]) == 0
+
+    assert read_jsonl(exported_jsonl) == REVIEWS
+
+
+def test_rows_without_metadata_still_import(tmp_path):
+    source = tmp_path / "source.csv"
+    source.write_text("category_id,item_name,rating,content\n"
+                      "2,Library Cafe,4,Good coffee and plenty of seats.\n", encoding="utf-8")
+    database = str(tmp_path / "reviews.db")
+    assert bulk_reviews.main(["--local", database, "import", str(source)]) == 0
+
+    exported = str(tmp_path / "export.jsonl")
+    assert bulk_reviews.main(["--local", database, "export", exported]) == 0
+    [review] = read_jsonl(exported)
+    assert review["item_name"] == "Library Cafe"
+    assert review["helpful_votes"] == 0
+    assert review["anonymous_id"].startswith("user_")
+
+
+def test_random_ids_are_rekeyed_in_timestamp_order(tmp_path):
+    old_ids = ["f47ac10b-58cc-4372-a567-0e02b2c3d479", "0a1b2c3d-4e5f-4a6b-8c7d-9e0f1a2b3c4d"]
+    rows = [dict(review, id=old_id) for review, old_id in zip(REVIEWS, old_ids)]
+    source = tmp_path / "source.jsonl"
+    write_jsonl(source, rows)
+    database = str(tmp_path / "reviews.db")
+    assert bulk_reviews.main(["--local", database, "import", str(source)]) == 0
+
+    exported = str(tmp_path / "export.jsonl")
+    assert bulk_reviews.main(["--local", database, "export", exported]) == 0
+    imported = read_jsonl(exported)
+    assert all(is_time_ordered_id(review["id"]) for review in imported)
+    assert not {review["id"] for review in imported} & set(old_ids)
+    # IDs now sort like the timestamps
+    assert [review["timestamp"] for review in imported] == sorted(r["timestamp"] for r in REVIEWS)
+
+
+def test_invalid_metadata_is_rejected():
+    validator = ValidationService()
+    row = dict(REVIEWS[0], id="not-a-uuid", timestamp="yesterday", helpful_votes=-1,
+               anonymous_id="x" * 51)
+    [errors] = validator.validate_many([row])
+    assert {error["field"] for error in errors} == {"id", "timestamp", "helpful_votes", "anonymous_id"}
+
+
+def test_empty_metadata_fields_are_absent():
+    assert review_metadata({"id": "", "timestamp": None, "helpful_votes": 3}) == {"helpful_votes": 3}
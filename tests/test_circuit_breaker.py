@@ -0,0 +1,70 @@
+import pytest
+
+from services import circuit_breaker
+from services.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker, "time", clock)
+    monkeypatch.setattr(circuit_breaker.random, "uniform", lambda low, high: high)  # no jitter
+    return clock
+
+
+def test_closed_open_half_open_closed(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=5, max_reset_timeout=60)
+    breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CLOSED and not breaker.healthy
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+
+    clock.now += 5
+    breaker.allow()  # the one trial call
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()  # a second caller waits for the trial
+
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.healthy
+    breaker.allow()
+
+
+def assert_reopens_after(breaker, clock, delay):
+    """The open circuit rejects calls until delay seconds pass, then lets one trial through"""
+    clock.now += delay - 0.1
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()
+    clock.now += 0.1
+    breaker.allow()
+    assert breaker.state == HALF_OPEN
+
+
+def test_failed_trial_reopens_with_the_delay_doubled_up_to_the_maximum(clock):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, max_reset_timeout=12)
+    breaker.record_failure()
+    assert_reopens_after(breaker, clock, 5)
+
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert_reopens_after(breaker, clock, 10)
+
+    breaker.record_failure()
+    assert_reopens_after(breaker, clock, 12)  # capped at max_reset_timeout
+
+    breaker.record_success()
+    breaker.record_failure()
+    assert_reopens_after(breaker, clock, 5)  # a success resets the backoff
+    assert breaker.stats()["opened"] == 4
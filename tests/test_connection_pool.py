@@ -0,0 +1,92 @@
+import time
+
+import pytest
+
+from services import sqlite_driver
+from services.circuit_breaker import CLOSED, CircuitBreaker, CircuitOpenError
+from services.connection_pool import ConnectionPool, PoolTimeoutError
+
+
+def connect(database):
+    return lambda: sqlite_driver.connect(database=database)
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_first_checkout_fills_the_pool_to_min_size(tmp_path):
+    pool = ConnectionPool(connect(str(tmp_path / "pool.db")), min_size=3, max_size=5)
+    assert pool.stats()["size"] == 0
+
+    with pool.connection():
+        pass
+    assert wait_for(lambda: pool.stats()["size"] == 3)
+    assert pool.stats()["idle"] == 3
+    pool.close()
+    assert pool.stats()["size"] == 0
+
+
+def test_connections_are_reused_and_checkouts_wait_for_a_free_one(tmp_path):
+    pool = ConnectionPool(connect(str(tmp_path / "pool.db")), min_size=1, max_size=1,
+                          checkout_timeout=0.05)
+    with pool.connection() as first:
+        with pytest.raises(PoolTimeoutError):
+            pool.acquire()
+    with pool.connection() as second:
+        assert second is first
+
+    stats = pool.stats()
+    assert stats["handshakes"] == 1 and stats["handshakes_avoided"] == 1 and stats["waits"] == 1
+    pool.close()
+
+
+def test_connection_is_discarded_after_an_error_in_its_block(tmp_path):
+    pool = ConnectionPool(connect(str(tmp_path / "pool.db")), max_size=2)
+    with pytest.raises(sqlite_driver.Error):
+        with pool.connection() as connection:
+            connection.cursor().execute("SELECT * FROM missing_table")
+    assert pool.stats()["discarded"] == 1 and pool.stats()["size"] == 0
+    pool.close()
+
+
+def test_idle_connections_are_evicted_down_to_min_size(tmp_path):
+    pool = ConnectionPool(connect(str(tmp_path / "pool.db")), min_size=1, max_size=3,
+                          max_idle_time=0)
+    connections = [pool.acquire() for _ in range(3)]
+    for connection in connections:
+        pool.release(connection)
+    with pool.connection():
+        pass
+    assert pool.stats()["evictions"] == 2 and pool.stats()["size"] == 1
+    pool.close()
+
+
+def test_breaker_opens_after_failed_connects_and_closes_on_recovery(tmp_path):
+    path = str(tmp_path / "pool.db")
+    down = [True]
+
+    def flaky_connect():
+        if down[0]:
+            raise sqlite_driver.OperationalError("server unreachable")
+        return sqlite_driver.connect(database=path)
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05,
+                             failure_exceptions=(sqlite_driver.OperationalError,))
+    pool = ConnectionPool(flaky_connect, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(sqlite_driver.OperationalError):
+            pool.acquire()
+    with pytest.raises(CircuitOpenError):
+        pool.acquire()  # fails fast without trying to connect
+    assert pool.stats()["handshakes"] == 0
+
+    down[0] = False
+    time.sleep(0.06)
+    with pool.connection():
+        pass
+    assert breaker.state == CLOSED
+    pool.close()
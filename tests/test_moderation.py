@@ -0,0 +1,26 @@
+import pytest
+
+from services.moderation import ModerationMatcher
+
+TERMS = ["spam", "offensive"]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("This is spam!", {"spam"}),
+    ("so offensive!!", {"offensive"}),
+    ("$pam, again", {"spam"}),
+    ("pure sp@m+", {"spam"}),
+    ("(spam)", {"spam"}),
+    ("spammer", set()),
+    ("spam4life", set()),
+    ("antispam", set()),
+])
+def test_whole_words_with_leetspeak_check_boundaries_in_the_original_text(text, expected):
+    matcher = ModerationMatcher(TERMS, whole_words=True, leetspeak=True)
+    assert matcher.find(text) == expected
+
+
+def test_substring_and_leetspeak_matching():
+    assert ModerationMatcher(TERMS).find("Antispam and offensively") == {"spam", "offensive"}
+    assert ModerationMatcher(TERMS).find("5p4m") == set()
+    assert ModerationMatcher(TERMS, leetspeak=True).find("5p4m") == {"spam"}
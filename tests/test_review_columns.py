@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from models.review import Review
+from services.review_columns import ReviewColumns
+
+
+def make_review(item_name, rating, category_id=1, votes=0):
+    review = Review(category_id, item_name, rating, "A review long enough to keep.")
+    review.helpful_votes = votes
+    return review
+
+
+def test_append_merge_and_votes():
+    first = make_review("Desk Lamp", 4)
+    columns = ReviewColumns.from_reviews([first])
+
+    columns.append([make_review("desk lamp", 2), make_review("Chair", 5, category_id=2)])
+    assert len(columns) == 3
+    assert columns.item_statistics("DESK LAMP")["total_reviews"] == 2
+
+    first.rating = 1
+    columns.merge([first, make_review("Shelf", 3)])
+    assert len(columns) == 4
+    assert columns.item_statistics("Desk Lamp")["rating_distribution"][1] == 1
+
+    columns.add_votes({first.id: 3, "unknown": 9})
+    assert columns.item_statistics("Desk Lamp")["total_helpful_votes"] == 3
+    assert [item["item_name"] for item in columns.popular_items(limit=1)] == ["Desk Lamp"]
+
+
+def test_readers_see_consistent_arrays_while_writers_append():
+    columns = ReviewColumns.from_reviews([make_review("Item 0", 3)])
+    review_ids = [columns.review_ids[0]]
+    stop = threading.Event()
+    failures = []
+
+    def read():
+        while not stop.is_set():
+            try:
+                counts, _, histograms, _ = columns.item_totals(columns.mask(category_id=1))
+                assert counts.sum() == histograms.sum()
+                columns.popular_items(limit=3)
+            except Exception as e:
+                failures.append(e)
+                return
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    try:
+        for number in range(300):
+            columns.append([make_review(f"Item {number % 7}", number % 5 + 1)])
+            columns.add_votes({review_ids[0]: 1})
+    finally:
+        stop.set()
+        for reader in readers:
+            reader.join()
+
+    assert not failures
+    assert len(columns) == 301
+    assert columns.item_statistics("Item 0")["total_helpful_votes"] == 300
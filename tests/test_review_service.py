@@ -0,0 +1,44 @@
+import types
+
+from models.review import Review
+from services import sqlite_driver
+from services.azure_storage_service import AzureStorageService
+from services.review_service import ReviewService
+
+
+class FlakyDriver(types.SimpleNamespace):
+    """sqlite_driver whose connect() fails while down is set"""
+
+    def __init__(self):
+        super().__init__(**{name: getattr(sqlite_driver, name) for name in dir(sqlite_driver)
+                            if not name.startswith("__") and name != "connect"})
+        self.down = False
+
+    def connect(self, **kwargs):
+        if self.down:
+            raise sqlite_driver.OperationalError("server unreachable")
+        return sqlite_driver.connect(**kwargs)
+
+
+def test_search_index_built_during_an_outage_is_retried(tmp_path):
+    path = str(tmp_path / "reviews.db")
+    seed = sqlite_driver.local_storage(path)
+    assert seed.save_reviews([Review(1, "Library Cafe", 4, "Quiet coffee spot to study.")])
+    seed.close()
+
+    driver = FlakyDriver()
+    storage = AzureStorageService(driver=driver, database=path)
+    storage.breaker.reset_timeout = 0
+    driver.down = True
+
+    service = ReviewService(storage=storage)
+    try:
+        assert service.search_reviews("coffee") == []
+        assert service.search_index.built_at is None
+
+        driver.down = False
+        service.sync_changes(force=True)
+        assert [review.item_name for review in service.search_reviews("coffee")] == ["Library Cafe"]
+        assert len(service.search_index) == 1
+    finally:
+        service.close()
@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+from models.category import Category
+from models.review import Review
+from services.review_snapshot import TRAILER, ReviewSnapshot, write_snapshot
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    path = str(tmp_path / "reviews.snapshot")
+    reviews = [Review(1, f"Item {number}", number % 5 + 1, "Worth reading twice.")
+               for number in range(20)]
+    write_snapshot(path, sorted(reviews, key=lambda review: review.id, reverse=True),
+                   [Category(1, "Books", "Textbooks and notes")], row_version=42)
+    return path
+
+
+def rewrite(path, data):
+    with open(path, "wb") as snapshot_file:
+        snapshot_file.write(data)
+
+
+def read(path):
+    with open(path, "rb") as snapshot_file:
+        return snapshot_file.read()
+
+
+def test_snapshot_roundtrip(snapshot_path):
+    snapshot = ReviewSnapshot(snapshot_path)
+    try:
+        assert len(snapshot) == 20
+        assert snapshot.row_version == 42
+        assert snapshot.review(0).content == "Worth reading twice."
+    finally:
+        snapshot.close()
+
+
+@pytest.mark.parametrize("length", [0, 5, TRAILER.size, 100, -1, -TRAILER.size - 1])
+def test_truncated_snapshot_raises_value_error(snapshot_path, length):
+    data = read(snapshot_path)
+    rewrite(snapshot_path, data[:length])
+    with pytest.raises(ValueError):
+        ReviewSnapshot(snapshot_path)
+
+
+def test_footer_pointing_past_the_file_raises_value_error(snapshot_path):
+    data = read(snapshot_path)
+    footer_offset, footer_length, magic = TRAILER.unpack_from(data, len(data) - TRAILER.size)
+    rewrite(snapshot_path, data[:-TRAILER.size] + TRAILER.pack(footer_offset, footer_length + 10**6, magic))
+    with pytest.raises(ValueError):
+        ReviewSnapshot(snapshot_path)
+
+
+@pytest.mark.parametrize("change", [
+    lambda footer: footer.pop("row_version"),
+    lambda footer: footer["columns"].pop("contents"),
+    lambda footer: footer["columns"]["ratings"].__setitem__(1, 3),
+    lambda footer: footer["columns"]["ids.offsets"].__setitem__(0, 10**9),
+    lambda footer: footer.__setitem__("rows", "many"),
+])
+def test_bad_footer_raises_value_error(snapshot_path, change):
+    data = read(snapshot_path)
+    footer_offset, footer_length, magic = TRAILER.unpack_from(data, len(data) - TRAILER.size)
+    footer = json.loads(data[footer_offset:footer_offset + footer_length])
+    change(footer)
+    footer_bytes = json.dumps(footer).encode("utf-8")
+    rewrite(snapshot_path, data[:footer_offset] + footer_bytes
+            + TRAILER.pack(footer_offset, len(footer_bytes), magic))
+    with pytest.raises(ValueError):
+        ReviewSnapshot(snapshot_path)
+    os.remove(snapshot_path)
@@ -0,0 +1,139 @@
+import json
+
+import pytest
+
+from models.review import Review
+from services import review_journal, sqlite_driver
+from services.review_journal import ReviewJournal
+from services.review_writer import ReviewWriter
+
+
+def make_review(number):
+    return Review(1, f"Item {number}", 4, f"Review number {number} with enough text.")
+
+
+def stored_ids(storage):
+    connection = sqlite_driver.connect(database=storage.database)
+    cursor = connection.cursor()
+    cursor.execute("SELECT id FROM reviews")
+    ids = [row[0] for row in cursor.fetchall()]
+    connection.close()
+    return ids
+
+
+def line_count(path):
+    with open(path, "rb") as journal_file:
+        return sum(1 for _ in journal_file)
+
+
+class LostAcknowledgement:
+    """Storage whose next save_reviews commits but reports failure"""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.lose_next = True
+
+    def save_reviews(self, reviews):
+        saved = self.storage.save_reviews(reviews)
+        if self.lose_next:
+            self.lose_next = False
+            return False
+        return saved
+
+    def __getattr__(self, name):
+        return getattr(self.storage, name)
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = sqlite_driver.local_storage(str(tmp_path / "reviews.db"))
+    yield storage
+    storage.close()
+
+
+def test_replays_a_journal_whose_last_line_was_cut_short(tmp_path, storage):
+    path = str(tmp_path / "reviews.journal")
+    reviews = [make_review(number) for number in range(3)]
+    with open(path, "wb") as journal_file:
+        for review in reviews:
+            journal_file.write(json.dumps({"add": review.to_dict()}).encode("utf-8") + b"\n")
+        journal_file.write(json.dumps({"done": [reviews[0].id]}).encode("utf-8") + b"\n")
+        journal_file.write(b'{"add": {"id": "cut-sh')  # crashed mid-write, never acknowledged
+
+    journal = ReviewJournal(path)
+    assert [review.id for review in journal.pending()] == [reviews[1].id, reviews[2].id]
+
+    writer = ReviewWriter(storage, journal, flush_interval=0)
+    assert sorted(stored_ids(storage)) == sorted([reviews[1].id, reviews[2].id])
+    assert len(journal) == 0
+    writer.close()
+    assert line_count(path) == 0
+
+
+def test_batch_that_committed_but_reported_failure_is_not_written_twice(tmp_path, storage):
+    journal = ReviewJournal(str(tmp_path / "reviews.journal"))
+    flushed = []
+    writer = ReviewWriter(LostAcknowledgement(storage), journal, flush_interval=0,
+                          batch_size=10, on_flush=flushed.extend)
+    reviews = [make_review(number) for number in range(3)]
+    for review in reviews:
+        writer.add(review)
+
+    assert writer.flush()
+    assert sorted(stored_ids(storage)) == sorted(review.id for review in reviews)
+    assert len(journal) == 0
+    assert not (tmp_path / "reviews.journal.failed").exists()
+    writer.close()
+
+
+def test_row_the_database_keeps_rejecting_is_dead_lettered(tmp_path, storage):
+    journal = ReviewJournal(str(tmp_path / "reviews.journal"))
+    writer = ReviewWriter(storage, journal, flush_interval=0, batch_size=10)
+    good, bad, later = make_review(1), make_review(2), make_review(3)
+    bad.item_name = None  # violates NOT NULL on every attempt
+    for review in (good, bad, later):
+        writer.add(review)
+
+    assert writer.flush()
+    assert sorted(stored_ids(storage)) == sorted([good.id, later.id])
+    assert len(journal) == 0
+    with open(journal.dead_letter_path, encoding="utf-8") as dead_letter_file:
+        [record] = [json.loads(line) for line in dead_letter_file]
+    assert record["add"]["id"] == bad.id
+    assert record["error"]
+    writer.close()
+
+
+def test_unreachable_database_keeps_reviews_in_the_journal(tmp_path, storage):
+    journal = ReviewJournal(str(tmp_path / "reviews.journal"))
+    writer = ReviewWriter(storage, journal, flush_interval=0, batch_size=10)
+    review = make_review(1)
+    writer.add(review)
+
+    storage.database = str(tmp_path / "missing" / "reviews.db")  # cannot be opened
+    assert not writer.flush()
+    assert [pending.id for pending in journal.pending()] == [review.id]
+    assert not (tmp_path / "reviews.journal.failed").exists()
+    journal.close()
+
+
+def test_journal_truncates_when_empty_and_compacts_when_long(tmp_path, monkeypatch):
+    monkeypatch.setattr(review_journal, "COMPACT_AFTER_RECORDS", 6)
+    path = str(tmp_path / "reviews.journal")
+    journal = ReviewJournal(path)
+    reviews = [make_review(number) for number in range(5)]
+
+    journal.append(reviews[:2])
+    journal.mark_done([reviews[0].id, reviews[1].id])
+    assert line_count(path) == 0
+
+    journal.append(reviews)
+    journal.mark_done([reviews[0].id])  # 6 lines: written as a done record
+    assert line_count(path) == 6
+    journal.mark_done([reviews[1].id])  # past the limit: compacted to the pending adds
+    assert line_count(path) == 3
+    journal.close()
+
+    reopened = ReviewJournal(path)
+    assert [review.id for review in reopened.pending()] == [review.id for review in reviews[2:]]
+    reopened.close()
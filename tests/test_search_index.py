@@ -0,0 +1,50 @@
+from models.review import Review
+from services.search_index import SearchIndex
+
+
+def make_review(item_name, content, category_id=1):
+    return Review(category_id, item_name, 4, content)
+
+
+def test_every_word_must_match_and_item_names_weigh_more():
+    index = SearchIndex()
+    named = make_review("Statistics Tutor", "Patient and clear explanations.")
+    mentioned = make_review("Math Lab", "Good for statistics homework help.")
+    unrelated = make_review("Cafe", "Quiet tables and patient staff.")
+    index.build([named, mentioned, unrelated])
+
+    assert index.search("statistics") == [named, mentioned]
+    assert index.search("stat patient") == [named]
+    assert index.search("statistics", category_id=2) == []
+    assert index.search("missing words") == []
+
+
+def test_short_words_match_whole_terms_only():
+    index = SearchIndex(min_prefix_length=3)
+    exact = make_review("Room S", "Bookable study room with a whiteboard.")
+    prefixed = make_review("Seminar Hall", "Seats plenty of students for talks.")
+    index.build([exact, prefixed])
+
+    assert index.search("s.") == [exact]
+    assert set(index.search("sem")) == {prefixed}
+
+
+def test_prefix_expansion_keeps_the_most_common_terms():
+    index = SearchIndex(max_prefix_terms=2)
+    reviews = [make_review("Item", f"mentions {word} in this review")
+               for word in ["alpha", "alpha", "alpha", "alpine", "alpine", "alps"]]
+    index.build(reviews)
+
+    assert len(index.search("alp")) == 5
+
+
+def test_changes_after_a_search_are_seen_by_the_next_one():
+    index = SearchIndex()
+    first = make_review("Library", "Plenty of quiet corners to read.")
+    index.build([first])
+    assert index.search("quiet") == [first]
+
+    second = make_review("Garden", "Quiet benches under the trees.")
+    index.add(second)
+    index.remove(first.id)
+    assert index.search("quiet") == [second]
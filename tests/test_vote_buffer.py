@@ -0,0 +1,39 @@
+from services.vote_buffer import VoteBuffer
+
+
+class FakeStorage:
+    def __init__(self):
+        self.available = True
+        self.written = {}
+
+    def apply_helpful_votes(self, increments):
+        if not self.available:
+            return False
+        for review_id, count in increments.items():
+            self.written[review_id] = self.written.get(review_id, 0) + count
+        return True
+
+
+def test_failed_threshold_flush_keeps_the_vote_and_reports_it_recorded():
+    storage = FakeStorage()
+    buffer = VoteBuffer(storage, flush_interval=0, flush_threshold=2)
+    storage.available = False
+
+    assert buffer.add("a")
+    assert buffer.add("a")  # threshold flush fails, the vote stays buffered
+    assert buffer.pending("a") == 2
+
+    storage.available = True
+    assert buffer.close()
+    assert storage.written == {"a": 2}
+
+
+def test_close_reports_votes_it_could_not_write(capsys):
+    storage = FakeStorage()
+    storage.available = False
+    buffer = VoteBuffer(storage, flush_interval=0, flush_threshold=100)
+    buffer.add("a")
+    buffer.add("b", 2)
+
+    assert not buffer.close()
+    assert "Lost 3 helpful votes for 2 reviews" in capsys.readouterr().out
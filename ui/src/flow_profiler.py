@@ -0,0 +1,79 @@
+import builtins
+import cProfile
+import io
+import os
+import pstats
+import time
+from contextlib import contextmanager
+
+
+class FlowProfiler:
+    def __init__(self, directory, top=20):
+        """Profile each menu flow with cProfile, one accumulated profile per flow
+
+        Time spent waiting at input prompts is left out of both the profiles
+        and the flow timings. close() writes <flow>.prof files (for pstats or
+        snakeviz) and summary.txt with the hottest functions to directory.
+        """
+        self.directory = directory
+        self.top = top
+        self._profiles = {}  # flow name -> cProfile.Profile
+        self._runs = {}  # flow name -> [runs, seconds]
+
+    @contextmanager
+    def profile(self, name):
+        """Profile the with-block as one run of the named flow"""
+        profile = self._profiles.get(name)
+        if profile is None:
+            profile = self._profiles[name] = cProfile.Profile()
+
+        waited = [0.0]
+        original_input = builtins.input
+
+        def paused_input(prompt=""):
+            profile.disable()
+            started = time.perf_counter()
+            try:
+                return original_input(prompt)
+            finally:
+                waited[0] += time.perf_counter() - started
+                profile.enable()
+
+        builtins.input = paused_input
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            builtins.input = original_input
+            runs = self._runs.setdefault(name, [0, 0.0])
+            runs[0] += 1
+            runs[1] += time.perf_counter() - started - waited[0]
+
+    def summary(self):
+        """Per-flow run counts and timings, then the functions with the most own time"""
+        output = io.StringIO()
+        output.write(f"{'Flow':24} {'Runs':>5} {'Seconds':>9}\n")
+        for name, (runs, seconds) in sorted(self._runs.items()):
+            output.write(f"{name:24} {runs:5} {seconds:9.3f}\n")
+
+        if self._profiles:
+            profiles = list(self._profiles.values())
+            stats = pstats.Stats(profiles[0], stream=output)
+            for profile in profiles[1:]:
+                stats.add(profile)
+            output.write(f"\nTop {self.top} functions by own time, all flows:\n")
+            stats.strip_dirs().sort_stats("tottime").print_stats(self.top)
+        return output.getvalue()
+
+    def close(self):
+        """Write the per-flow profiles and the summary, and return the summary"""
+        os.makedirs(self.directory, exist_ok=True)
+        for name, profile in self._profiles.items():
+            profile.dump_stats(os.path.join(self.directory, f"{name}.prof"))
+
+        summary = self.summary()
+        with open(os.path.join(self.directory, "summary.txt"), "w", encoding="utf-8") as summary_file:
+            summary_file.write(summary)
+        return summary
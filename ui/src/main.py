@@ -1,23 +1,38 @@
-
+import argparse
 import os
 import sys
+from functools import lru_cache
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 
 from menu import Menu
 from display import Display
 from input_handler import InputHandler
+from flow_profiler import FlowProfiler
+from scripted_input import ScriptedInput
+from config.settings import Settings
+from models.review import MICROS_PER_DAY, micros_to_datetime
+from services.metrics import metrics
 from services.review_service import ReviewService
 
 def clear_screen():
     """Clear the terminal screen."""
+    if not sys.stdout.isatty():
+        # Keep piped and scripted session output free of escape codes
+        return
     os.system('clear' if os.name == 'posix' else 'cls')
 
+@lru_cache(maxsize=4096)
+def format_day(day):
+    """Display date for a day number (days since 1970-01-01), formatted once per day"""
+    return micros_to_datetime(day * MICROS_PER_DAY).strftime("%B %d, %Y")
+
 class AnonymousReviewsApp:
-    def __init__(self):
+    def __init__(self, review_service=None, profiler=None):
         self.display = Display()
         self.menu = Menu()
         self.input_handler = InputHandler()
-        self.review_service = ReviewService()
+        self.review_service = metrics.instrument(review_service or ReviewService(), "service")
+        self.profiler = profiler  # FlowProfiler when run with --profile
         self.running = True
     
     def run(self):
@@ -39,20 +54,33 @@ class AnonymousReviewsApp:
             return
         
         while self.running:
-            self.show_main_menu()
-            choice = self.get_menu_choice(1, 5)
-            
-            if choice == 1:
-                self.submit_review_flow()
-            elif choice == 2:
-                self.browse_reviews_flow()
-            elif choice == 3:
-                self.search_reviews_flow()
-            elif choice == 4:
-                self.view_popular_items_flow()
-            elif choice == 5:
+            try:
+                self.show_main_menu()
+                choice = self.get_menu_choice(1, 5)
+                
+                if choice == 1:
+                    self.run_flow("submit_review", self.submit_review_flow)
+                elif choice == 2:
+                    self.run_flow("browse_reviews", self.browse_reviews_flow)
+                elif choice == 3:
+                    self.run_flow("search_reviews", self.search_reviews_flow)
+                elif choice == 4:
+                    self.run_flow("view_popular_items", self.view_popular_items_flow)
+                elif choice == 5:
+                    self.exit_application()
+            except EOFError:
+                # End of an input script (or Ctrl-D)
                 self.exit_application()
     
+    def run_flow(self, name, flow):
+        """Run a menu flow, recording metrics and a profile when enabled"""
+        with metrics.flow(name):
+            if self.profiler is None:
+                flow()
+            else:
+                with self.profiler.profile(name):
+                    flow()
+    
     def show_main_menu(self):
         """Display main menu exactly like your existing app"""
         clear_screen()
@@ -137,21 +165,22 @@ class AnonymousReviewsApp:
         category_choice = self.get_menu_choice(1, len(categories))
         category_id = categories[category_choice - 1].id
         
-        reviews = self.review_service.get_reviews_by_category(category_id)
+        # Stream the category so the summary never holds every review in memory
+        reviews = self.review_service.iter_reviews_by_category(category_id)
         
-        if not reviews:
+        if not self.show_reviews_summary(reviews):
             print(f"\nNo reviews found for {categories[category_choice - 1].name}")
         else:
-            self.show_reviews_summary(reviews)
-            
             # Option to view detailed reviews
             print("\nEnter item name to view detailed reviews (or press Enter to go back):")
             item_name = input().strip()
             
             if item_name:
-                item_reviews = self.review_service.get_reviews_by_item(item_name)
+                item_reviews = self.page_through(
+                    lambda after: self.review_service.get_reviews_page(after, item_name=item_name),
+                    self.show_detailed_reviews
+                )
                 if item_reviews:
-                    self.show_detailed_reviews(item_reviews)
                     self.review_interaction_menu(item_reviews)
                 else:
                     print("No reviews found for that item.")
@@ -181,13 +210,16 @@ class AnonymousReviewsApp:
         else:
             category_id = None
         
-        results = self.review_service.search_reviews(search_term, category_id)
+        print(f"\nReviews matching '{search_term}':")
+        results = self.page_through(
+            lambda after: self.review_service.search_reviews_page(
+                search_term, category_id, after
+            ),
+            self.show_search_results
+        )
         
         if not results:
             print(f"\nNo reviews found matching '{search_term}'")
-        else:
-            print(f"\nFound {len(results)} reviews matching '{search_term}':")
-            self.show_search_results(results)
         
         self.wait_for_enter()
     
@@ -315,21 +347,49 @@ class AnonymousReviewsApp:
         """Wait for user to press Enter"""
         input("\nPress Enter to continue...")
     
+    def page_through(self, fetch_page, show_page):
+        """Show results a page at a time, fetching the next page only when asked"""
+        shown = []
+        after = None
+        
+        while True:
+            page, after = fetch_page(after)
+            if not page:
+                break
+            
+            show_page(page, len(shown) + 1)
+            shown.extend(page)
+            
+            if after is None:
+                break
+            more = input("\nPress Enter for more results, or 'q' to stop: ")
+            if more.strip().lower().startswith('q'):
+                break
+        
+        return shown
+    
     def show_reviews_summary(self, reviews):
-        """Display summary of reviews grouped by item - exactly like your existing app"""
+        """Display summary of reviews grouped by item, returns the number of reviews"""
         items = {}
+        total = 0
         for review in reviews:
+            total += 1
             if review.item_name not in items:
                 items[review.item_name] = {
-                    'reviews': [],
+                    'latest': review,
                     'total_rating': 0,
                     'count': 0
                 }
-            items[review.item_name]['reviews'].append(review)
-            items[review.item_name]['total_rating'] += review.rating
-            items[review.item_name]['count'] += 1
+            data = items[review.item_name]
+            if review.timestamp > data['latest'].timestamp:
+                data['latest'] = review
+            data['total_rating'] += review.rating
+            data['count'] += 1
+        
+        if not total:
+            return 0
         
-        print(f"\nFound {len(reviews)} reviews for {len(items)} items:")
+        print(f"\nFound {total} reviews for {len(items)} items:")
         print("-" * 60)
         
         for item_name, data in items.items():
@@ -340,17 +400,20 @@ class AnonymousReviewsApp:
             print(f"  Total Reviews: {data['count']}")
             
             # Show latest review snippet
-            latest_review = max(data['reviews'], key=lambda r: r.timestamp)
+            latest_review = data['latest']
             snippet = latest_review.content[:60] + "..." if len(latest_review.content) > 60 else latest_review.content
             print(f"  Latest: \"{snippet}\"")
             print("-" * 60)
+        
+        return total
     
-    def show_detailed_reviews(self, reviews):
+    def show_detailed_reviews(self, reviews, start=1):
         """Display detailed individual reviews"""
-        print(f"\nDetailed Reviews ({len(reviews)} total):")
-        print("=" * 60)
+        if start == 1:
+            print("\nDetailed Reviews:")
+            print("=" * 60)
         
-        for i, review in enumerate(reviews, 1):
+        for i, review in enumerate(reviews, start):
             print(f"Review #{i}")
             print(f"Item: {review.item_name}")
             print(f"Rating: {self.format_rating(review.rating)} ({review.rating}/5)")
@@ -360,9 +423,9 @@ class AnonymousReviewsApp:
             print(f"Reviewer: {review.anonymous_id}")
             print("-" * 60)
     
-    def show_search_results(self, reviews):
+    def show_search_results(self, reviews, start=1):
         """Display search results"""
-        for i, review in enumerate(reviews, 1):
+        for i, review in enumerate(reviews, start):
             print(f"\n{i}. {review.item_name} - {self.format_rating(review.rating)}")
             snippet = review.content[:100] + "..." if len(review.content) > 100 else review.content
             print(f"   \"{snippet}\"")
@@ -396,25 +459,50 @@ class AnonymousReviewsApp:
         
         return "★" * full_stars + "☆" * half_star + "☆" * empty_stars
     
-    def format_date(self, timestamp: str) -> str:
-        """Format timestamp for display"""
-        try:
-            from datetime import datetime
-            dt = datetime.fromisoformat(timestamp)
-            return dt.strftime("%B %d, %Y")
-        except:
-            return timestamp
+    def format_date(self, timestamp: int) -> str:
+        """Format an epoch-microsecond timestamp for display"""
+        return format_day(timestamp // MICROS_PER_DAY)
     
     def exit_application(self):
         """Handle application exit"""
         clear_screen()
         print("\nThank you for using Anonymous Reviews Platform!")
         print("Your feedback helps improve our community.")
+        # Make sure buffered helpful votes reach the database
+        self.review_service.close()
+        if metrics.enabled and Settings.METRICS_EXPORT_PATH:
+            metrics.export(Settings.METRICS_EXPORT_PATH)
+            print(f"Metrics written to {Settings.METRICS_EXPORT_PATH}")
+        if self.profiler is not None:
+            print("\n" + self.profiler.close())
+            print(f"Profiles written to {self.profiler.directory}")
         self.running = False
 
-def main():
+def local_review_service(path):
+    """ReviewService on a local sqlite stand-in database file, created if missing"""
+    from services import sqlite_driver
+    return ReviewService(storage=sqlite_driver.local_storage(path))
+
+def main(argv=None):
     """Main application entry point"""
-    app = AnonymousReviewsApp()
+    parser = argparse.ArgumentParser(description="Anonymous Reviews Platform")
+    parser.add_argument("--local", metavar="DB_FILE",
+                        help="use a local sqlite stand-in database file (*.db) instead of Azure SQL")
+    parser.add_argument("--script", metavar="PATH",
+                        help="answer prompts from this file, one answer per line, then exit")
+    parser.add_argument("--profile", metavar="DIR", default=os.getenv("REVIEWS_PROFILE_DIR"),
+                        help="profile each menu flow and write the profiles and a summary to DIR "
+                             "(default: $REVIEWS_PROFILE_DIR)")
+    parser.add_argument("--profile-top", type=int, default=20,
+                        help="number of hot functions listed in the profile summary")
+    args = parser.parse_args(argv)
+    
+    if args.script:
+        ScriptedInput.from_file(args.script).install()
+    profiler = FlowProfiler(args.profile, top=args.profile_top) if args.profile else None
+    review_service = local_review_service(args.local) if args.local else None
+    
+    app = AnonymousReviewsApp(review_service, profiler)
     app.run()
 
 if __name__ == "__main__":
@@ -0,0 +1,31 @@
+import builtins
+
+
+class ScriptedInput:
+    def __init__(self, answers):
+        """Answer input() prompts from a list instead of the keyboard
+
+        Each prompt and its answer are echoed so the output reads like the
+        interactive session. EOFError is raised once the answers run out.
+        """
+        self.answers = list(answers)
+        self.position = 0
+
+    @classmethod
+    def from_file(cls, path):
+        """Read answers one per line; lines starting with # are comments, blank lines press Enter"""
+        with open(path, encoding="utf-8") as script_file:
+            lines = [line.rstrip("\r\n") for line in script_file]
+        return cls(line for line in lines if not line.startswith("#"))
+
+    def install(self):
+        """Replace the built-in input() with this script"""
+        builtins.input = self
+
+    def __call__(self, prompt=""):
+        if self.position >= len(self.answers):
+            raise EOFError("End of input script")
+        answer = self.answers[self.position]
+        self.position += 1
+        print(f"{prompt}{answer}")
+        return answer